@@ -6,19 +6,25 @@ Features include booking, rescheduling, and canceling appointments.
 """
 
 import streamlit as st
-import pandas as pd
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from datetime import datetime, timedelta
-import calendar
+import json
 import os
 import sys
-from PIL import Image
 
 # Add the current directory to the path to import local modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from sheets_integration import SheetsIntegration
+from sheets_integration import SheetsIntegration, ReservationStatus
+from scheduling import Slot, bookable_window, default_schedule, load_schedule
+from intervals import format_minutes, to_minutes
+from dates import calendar_table, format_date, format_slot, parse_date
+from cards import cards_html
+from storage_backends import DEFAULT_ROOM, SQLiteBackend, _parse_duration
+from rate_limiting import DEFAULT_REQUESTS_PER_MINUTE
+from archive import ParquetArchive
 
 # Import logo utilities from the root directory instead of assets folder
-from logo_utils import get_logo_as_base64
+from logo_utils import get_logo_variant, publish_logo
 
 # Set page configuration
 st.set_page_config(
@@ -36,9 +42,14 @@ if 'selected_date' not in st.session_state:
 if 'edit_appointment_id' not in st.session_state:
     st.session_state.edit_appointment_id = None
 if 'show_success' not in st.session_state:
-    st.session_state.show_success = False
+    st.session_state.show_success = None  # Tab to show the success message in
 if 'success_message' not in st.session_state:
     st.session_state.success_message = ""
+if 'rendered_versions' not in st.session_state:
+    st.session_state.rendered_versions = {}  # Snapshot version each tab fragment last rendered
+
+# Seconds between checks for appointments changed by other sessions
+UPDATE_CHECK_INTERVAL = 5
 
 # Initialize Google Sheets integration
 @st.cache_resource
@@ -49,13 +60,64 @@ def get_sheets_integration():
     if os.path.exists('credentials.json'):
         credentials_path = 'credentials.json'
     
-    return SheetsIntegration(credentials_path)
+    # Set WRITE_BEHIND=1 to acknowledge bookings immediately and write them to
+    # the sheet from a background thread
+    write_behind = os.environ.get('WRITE_BEHIND', '0').lower() in ('1', 'true', 'yes')
+    
+    # Set APPOINTMENTS_DB to a file path to store appointments in a local SQLite database
+    backend = None
+    if os.environ.get('APPOINTMENTS_DB'):
+        backend = SQLiteBackend(os.environ['APPOINTMENTS_DB'])
+    
+    # Set SYNC_MODE=delta to refresh the sheet snapshot incrementally instead of
+    # re-reading the whole sheet
+    sync_mode = os.environ.get('SYNC_MODE', 'full')
+    
+    # Google Sheets API calls allowed per minute across all sessions (0 disables the limit)
+    requests_per_minute = int(os.environ.get('SHEETS_REQUESTS_PER_MINUTE', DEFAULT_REQUESTS_PER_MINUTE))
+    
+    # One background thread per process keeps the shared snapshot current, so
+    # sessions never read the sheet themselves (BACKGROUND_REFRESH=0 disables it)
+    background_refresh = os.environ.get('BACKGROUND_REFRESH', '1').lower() in ('1', 'true', 'yes')
+    
+    # Set SPREADSHEET_KEY to the ID in the spreadsheet URL to open it directly
+    # instead of searching Drive for it by title
+    spreadsheet_key = os.environ.get('SPREADSHEET_KEY') or None
+    
+    # Set ARCHIVE_DIR to the directory archive.py --parquet moved old appointments
+    # to; on Google Sheets they are in archive worksheets by default
+    archive = None
+    if os.environ.get('ARCHIVE_DIR'):
+        archive = ParquetArchive(os.environ['ARCHIVE_DIR'])
+    
+    return SheetsIntegration(credentials_path, write_behind=write_behind, backend=backend,
+                             sync_mode=sync_mode, requests_per_minute=requests_per_minute,
+                             background_refresh=background_refresh, spreadsheet_key=spreadsheet_key,
+                             archive=archive)
 
 sheets = get_sheets_integration()
 
+@st.cache_resource
+def get_schedule():
+    """Get the presentation schedule (SCHEDULE_FILE, or Saturdays and Tuesdays at 12:00)."""
+    if os.environ.get('SCHEDULE_FILE'):
+        return load_schedule(os.environ['SCHEDULE_FILE'])
+    return default_schedule()
+
+schedule = get_schedule()
+
+# Presentation lengths offered in the booking form, in minutes, with the schedule's own
+DURATION_OPTIONS = sorted({30, 45, 60, 90} | {rule.duration for rule in schedule.rules})
+
 # Custom CSS for styling
 def load_css():
-    """Load custom CSS styles."""
+    """
+    Load custom CSS styles.
+    
+    The stylesheet is emitted on every full rerun (Streamlit drops elements a
+    run doesn't emit), but it is above global.minCachedMessageSize in
+    .streamlit/config.toml, so after the first run the browser is only sent its hash.
+    """
     st.markdown("""
     <style>
         /* Main container styling */
@@ -78,8 +140,9 @@ def load_css():
             justify-content: center;
             margin-bottom: 1rem;
         }
-        .logo-image {
-            height: 100px;
+        .logo-container img {
+            max-width: 100%;
+            height: auto;
         }
         
         /* Card styling */
@@ -189,149 +252,108 @@ def load_css():
     </style>
     """, unsafe_allow_html=True)
 
+# Display width of the logo in the header (CSS pixels)
+LOGO_WIDTH = 300
+
 # Display logo and header
 def display_header():
     """Display the application header with logo."""
-    logo_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "logo.png")
+    logo_html = None
+    if st.get_option("server.enableStaticServing"):
+        try:
+            # WebP and PNG files at 1x and 2x, cached by the browser across reruns
+            logo_html = publish_logo(LOGO_WIDTH)
+        except OSError as e:
+            print(f"Error publishing the logo: {e}")
     
-    if os.path.exists(logo_path):
-        logo = Image.open(logo_path)
+    if logo_html is not None:
+        st.markdown(f'<div class="logo-container">{logo_html}</div>', unsafe_allow_html=True)
+    else:
+        # Same bytes on every rerun, so Streamlit serves them from one media URL
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
-            st.image(logo, width=300)
-    else:
-        # Use base64 encoded logo as fallback
-        logo_base64 = get_logo_as_base64()
-        st.markdown(f"""
-        <div class="logo-container">
-            <img src="{logo_base64}" class="logo-image">
-        </div>
-        """, unsafe_allow_html=True)
+            st.image(get_logo_variant(LOGO_WIDTH), width=LOGO_WIDTH)
     
     st.markdown("<h1 style='text-align: center; color: #008080;'>Presentation Appointment Booking</h1>", unsafe_allow_html=True)
     st.markdown("<p style='text-align: center; color: #daa520; font-size: 1.2rem;'>Schedule, manage, and track real estate project presentations</p>", unsafe_allow_html=True)
     st.markdown("<hr>", unsafe_allow_html=True)
 
-# Generate available dates (only Saturdays and Tuesdays)
-def get_available_dates(num_weeks=4):
+def display_write_warning():
+    """Warn when writes queued for the sheet keep failing to flush."""
+    stats = sheets.get_write_stats()
+    if stats and stats['failures']:
+        st.warning(f"{stats['pending']} changes are not saved to Google Sheets yet "
+                   f"({stats['failures']} failed attempts, last error: {stats['last_error']}). "
+                   "They are kept and will be retried.")
+
+# Calendar of the days with presentation slots (holidays excluded)
+@st.cache_resource(max_entries=4)
+def get_calendar(today, num_weeks=4):
     """
-    Generate a list of available dates (Saturdays and Tuesdays) for the next few weeks.
+    Get the calendar table of the dates with presentation slots for the next few weeks.
+    
+    Built once per day and shared by every session.
     
     Args:
+        today: Today's date, so a new table is built when the day changes
         num_weeks: Number of weeks to generate dates for
         
     Returns:
-        list: List of date objects
+        tuple: One tuple of CalendarDay per week (see dates.py)
     """
-    today = datetime.now().date()
-    dates = []
-    
-    # Start from today and go forward
-    current_date = today
-    
-    # Generate dates for the specified number of weeks
-    for _ in range(num_weeks * 7):  # 7 days per week
-        # Check if the day is Saturday (5) or Tuesday (1)
-        if current_date.weekday() == 5 or current_date.weekday() == 1:
-            # Only include dates from today onwards
-            if current_date >= today:
-                dates.append(current_date)
-        
-        # Move to the next day
-        current_date += timedelta(days=1)
-    
-    return dates
+    return calendar_table(schedule.dates(*bookable_window(num_weeks, today)))
 
-# Format date for display
-def format_date(date_obj, include_day=True):
+def get_free_slots_by_date(num_weeks=4):
     """
-    Format a date object for display.
+    Get the free presentation slots of the next few weeks, grouped by date.
     
     Args:
-        date_obj: Date object to format
-        include_day: Whether to include the day name
+        num_weeks: Number of weeks to look ahead
         
     Returns:
-        str: Formatted date string
+        dict: Mapping of date object to its free Slot tuples, sorted by time and room
     """
-    if include_day:
-        return date_obj.strftime("%A, %d %B %Y")
-    return date_obj.strftime("%d %B %Y")
+    free = {}
+    for slot in sheets.get_free_slots(schedule, *bookable_window(num_weeks)):
+        free.setdefault(slot.date, []).append(slot)
+    return free
 
-# Check if a date is available for booking
-def is_date_available(date_obj):
-    """
-    Check if a date is available for booking.
-    
-    Args:
-        date_obj: Date object to check
-        
-    Returns:
-        bool: True if the date is available, False otherwise
-    """
-    # Convert date object to string format used in the sheet
-    date_str = date_obj.strftime("%Y-%m-%d")
-    
-    # Check if the slot is available
-    return sheets.is_slot_available(date_str, "12:00")
+def toggle_date(date):
+    """Select a date of the calendar, or clear the selection if it is already selected."""
+    st.session_state.selected_date = None if st.session_state.selected_date == date else date
 
 # Display calendar view
 def display_calendar_view():
     """Display the calendar view for selecting dates."""
     st.markdown("### Select a Date for Presentation")
-    st.markdown("Presentations are available on **Saturdays** and **Tuesdays** at **12:00 PM** for 30 minutes.")
+    st.markdown(f"Presentations are available on **{schedule.describe()}**.")
     
-    # Get available dates
-    available_dates = get_available_dates(num_weeks=4)
+    # Available dates grouped by week, with their labels (built once per day)
+    weeks = get_calendar(datetime.now().date(), num_weeks=4)
     
-    # Group dates by week for better display
-    weeks = {}
-    for date in available_dates:
-        # Get the week number
-        week_num = date.isocalendar()[1]
-        if week_num not in weeks:
-            weeks[week_num] = []
-        weeks[week_num].append(date)
+    # Free slots of all dates in one pass; a date is available if any slot is free
+    free_slots = get_free_slots_by_date(num_weeks=4)
     
     # Display weeks
-    for week_num, dates in weeks.items():
-        cols = st.columns(len(dates))
-        for i, date in enumerate(dates):
+    for week in weeks:
+        cols = st.columns(len(week))
+        for i, day in enumerate(week):
             # Check if the date is available
-            is_available = is_date_available(date)
+            is_available = day.date in free_slots
             
             # Check if this is the selected date
-            is_selected = st.session_state.selected_date == date
-            
-            # Determine the CSS class
-            if is_selected:
-                css_class = "calendar-day calendar-day-selected"
-            elif is_available:
-                css_class = "calendar-day calendar-day-available"
-            else:
-                css_class = "calendar-day calendar-day-unavailable"
+            is_selected = st.session_state.selected_date == day.date
             
-            # Display the date
+            # Display the date; the click reruns the booking tab with the new selection
             with cols[i]:
-                day_name = date.strftime("%A")
-                day_num = date.strftime("%d")
-                month = date.strftime("%b")
-                
-                # Create a clickable date card
-                if st.button(
-                    f"{day_name}\n{day_num} {month}",
-                    key=f"date_{date}",
+                st.button(
+                    day.label,
+                    key=f"date_{day.key}",
                     disabled=not is_available and not is_selected,
+                    on_click=toggle_date,
+                    args=(day.date,),
                     use_container_width=True
-                ):
-                    # Update the selected date
-                    if is_selected:
-                        st.session_state.selected_date = None
-                    else:
-                        st.session_state.selected_date = date
-                    
-                    # Rerun the app to update the UI
-                    st.rerun()
+                )
 
 # Display booking form
 def display_booking_form():
@@ -340,8 +362,23 @@ def display_booking_form():
         st.markdown(f"### Book Presentation for {format_date(st.session_state.selected_date)}")
         st.markdown("Please fill in the details below to book your presentation slot.")
         
+        # Length first: it decides which slots of the selected date are free.
+        # Outside the form, so changing it refreshes the slot list
+        selected_date = st.session_state.selected_date
+        duration = st.selectbox("Duration", DURATION_OPTIONS, index=DURATION_OPTIONS.index(schedule.rules[0].duration),
+                                format_func=lambda minutes: f"{minutes} minutes", key="duration")
+        slots = sheets.get_free_slots(schedule, selected_date, selected_date + timedelta(days=1), duration=duration)
+        if not slots:
+            next_slot = sheets.next_free_slot(schedule, selected_date, duration=duration)
+            if next_slot is not None:
+                st.info(f"No {duration}-minute slot is free on this date. "
+                        f"The next one is {format_slot(next_slot, include_date=True)}.")
+        
         # Create a form
         with st.form(key="booking_form"):
+            # Time and room
+            slot = st.selectbox("Time and Room", slots, format_func=format_slot, key="slot")
+            
             # Company details
             company_name = st.text_input("Company Name", key="company_name")
             project_name = st.text_input("Project Name", key="project_name")
@@ -355,138 +392,138 @@ def display_booking_form():
                 # Validate form
                 if not company_name or not project_name or not area or not representative:
                     st.error("Please fill in all fields.")
+                elif slot is None:
+                    st.error("There are no free slots left on this date. Please choose another date.")
                 else:
                     # Format date for the sheet
-                    date_str = st.session_state.selected_date.strftime("%Y-%m-%d")
+                    date_str = selected_date.isoformat()
                     
-                    # Add the appointment
-                    success = sheets.add_appointment(
+                    # Check the slot is still free and book it in one step
+                    result = sheets.reserve_slot(
+                        date_str,
+                        slot.time,
                         company_name,
                         project_name,
                         area,
-                        date_str,
-                        "12:00",
-                        representative
+                        representative,
+                        room=slot.room,
+                        duration=slot.duration
                     )
                     
-                    if success:
+                    if result.reserved:
                         # Show success message
-                        st.session_state.show_success = True
-                        st.session_state.success_message = f"Appointment booked successfully for {format_date(st.session_state.selected_date)} at 12:00 PM."
+                        flash_success(f"Appointment booked successfully for {format_slot(slot, include_date=True)}.", 'booking')
                         
                         # Reset the selected date
                         st.session_state.selected_date = None
                         
-                        # Rerun the app to update the UI
-                        st.rerun()
+                        # Rerun to update the UI
+                        rerun_after_write()
+                    elif result.status is ReservationStatus.CONFLICT:
+                        st.error("This slot has just been booked by someone else. Please choose another slot.")
                     else:
                         st.error("Failed to book appointment. Please try again.")
 
-# Display appointment card
-def display_appointment_card(appointment):
+def open_edit_form(appointment_id):
+    """Switch the appointments tab to the edit form of an appointment."""
+    st.session_state.edit_appointment_id = appointment_id
+    st.session_state.view = 'edit'
+
+def close_edit_form():
+    """Switch the appointments tab back to the appointments list."""
+    st.session_state.edit_appointment_id = None
+    st.session_state.view = 'appointments'
+
+def appointment_label(appointment):
+    """Label of an appointment in the action bar, e.g. "Acme - Tower · Saturday, 17 October 2026 at 12:00"."""
+    formatted_date = format_date(appointment.date) if appointment.date else appointment.presentation_date
+    return f"{appointment.company_name} - {appointment.project_name} · {formatted_date} at {appointment.time}"
+
+# Display the edit and cancel actions of a page of appointments
+def display_action_bar(appointments, status):
     """
-    Display an appointment card.
+    Display the appointment picker with the edit and cancel buttons.
+    
+    The cards are one HTML block, so their actions are in one bar below them.
     
     Args:
-        appointment: Dictionary containing appointment details
+        appointments: Appointment records of the page
+        status: Status group of the page, to keep each group's widgets apart
     """
-    # Parse the date
-    try:
-        date_obj = datetime.strptime(appointment['Presentation Date'], "%Y-%m-%d").date()
-        formatted_date = format_date(date_obj)
-    except:
-        formatted_date = appointment['Presentation Date']
-    
-    # Determine the status badge class
-    status = appointment['Status']
-    if status == "Confirmed":
-        badge_class = "badge badge-confirmed"
-    elif status == "Cancelled":
-        badge_class = "badge badge-cancelled"
-    else:  # Rescheduled
-        badge_class = "badge badge-rescheduled"
-    
-    # Create the card
-    st.markdown(f"""
-    <div class="card">
-        <div class="card-title">{appointment['Company Name']} - {appointment['Project Name']}</div>
-        <div class="card-subtitle">{appointment['Area']}</div>
-        <div class="card-content">
-            <p><strong>Date:</strong> {formatted_date}</p>
-            <p><strong>Time:</strong> {appointment['Time']} PM</p>
-            <p><strong>Representative:</strong> {appointment['Developer Representative']}</p>
-        </div>
-        <div class="card-footer">
-            <span class="{badge_class}">{status}</span>
-            <div>
-                <button onclick="document.getElementById('edit_{appointment['ID']}').click()">Edit</button>
-                <button onclick="document.getElementById('cancel_{appointment['ID']}').click()">Cancel</button>
-            </div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    labels = {appointment.id: appointment_label(appointment) for appointment in appointments}
+    col1, col2, col3 = st.columns([4, 1, 1], vertical_alignment="bottom")
+    appointment_id = col1.selectbox("Appointment", list(labels), format_func=labels.get, key=f"action_{status}")
     
-    # Hidden buttons for edit and cancel actions
-    if st.button("Edit", key=f"edit_{appointment['ID']}", help="Edit this appointment", type="primary", use_container_width=True):
-        st.session_state.edit_appointment_id = appointment['ID']
-        st.session_state.view = 'edit'
-        st.rerun()
+    col2.button("Edit", key=f"edit_{status}", help="Edit this appointment", type="primary",
+                on_click=open_edit_form, args=(appointment_id,), use_container_width=True)
     
-    if st.button("Cancel", key=f"cancel_{appointment['ID']}", help="Cancel this appointment", type="secondary", use_container_width=True):
+    if col3.button("Cancel", key=f"cancel_{status}", help="Cancel this appointment", type="secondary", use_container_width=True):
         # Cancel the appointment
-        success = sheets.cancel_appointment(appointment['ID'])
+        success = sheets.cancel_appointment(appointment_id)
         
         if success:
             # Show success message
-            st.session_state.show_success = True
-            st.session_state.success_message = f"Appointment cancelled successfully."
+            flash_success("Appointment cancelled successfully.", 'appointments')
             
-            # Rerun the app to update the UI
-            st.rerun()
+            # Rerun to update the UI
+            rerun_after_write()
         else:
             st.error("Failed to cancel appointment. Please try again.")
 
+# Status groups of the appointments view; cancelled ones are listed newest first
+STATUS_GROUPS = ["Confirmed", "Rescheduled", "Cancelled"]
+NEWEST_FIRST = {"Cancelled"}
+
+# Number of appointment cards per page
+APPOINTMENTS_PAGE_SIZE = 10
+
+def change_page(status, step):
+    """Move the appointments list of a status group to the previous or next page."""
+    key = f"page_{status}"
+    st.session_state[key] = max(0, st.session_state.get(key, 0) + step)
+
 # Display all appointments
 def display_appointments():
-    """Display all appointments."""
-    # Get all appointments
-    df = sheets.get_all_appointments()
+    """Display one page of the appointments of the selected status."""
+    # Counts come from an aggregate query; only the selected page is loaded
+    counts = sheets.count_appointments()
     
-    if df.empty:
+    if not any(counts.get(status) for status in STATUS_GROUPS):
         st.info("No appointments found.")
         return
     
-    # Convert DataFrame to list of dictionaries
-    appointments = df.to_dict('records')
-    
-    # Group appointments by status
-    confirmed = [a for a in appointments if a['Status'] == 'Confirmed']
-    rescheduled = [a for a in appointments if a['Status'] == 'Rescheduled']
-    cancelled = [a for a in appointments if a['Status'] == 'Cancelled']
+    # Only the selected status group is rendered
+    status = st.radio(
+        "Status",
+        STATUS_GROUPS,
+        format_func=lambda status: f"{status} ({counts.get(status, 0)})",
+        key="appointments_status",
+        horizontal=True,
+        label_visibility="collapsed"
+    )
     
-    # Display tabs for different status groups
-    tab1, tab2, tab3 = st.tabs(["Confirmed", "Rescheduled", "Cancelled"])
+    total = counts.get(status, 0)
+    if not total:
+        st.info(f"No {status.lower()} appointments.")
+        return
     
-    with tab1:
-        if confirmed:
-            for appointment in confirmed:
-                display_appointment_card(appointment)
-        else:
-            st.info("No confirmed appointments.")
+    num_pages = (total + APPOINTMENTS_PAGE_SIZE - 1) // APPOINTMENTS_PAGE_SIZE
+    page = min(st.session_state.get(f"page_{status}", 0), num_pages - 1)
     
-    with tab2:
-        if rescheduled:
-            for appointment in rescheduled:
-                display_appointment_card(appointment)
-        else:
-            st.info("No rescheduled appointments.")
+    appointments = sheets.get_appointments(status, offset=page * APPOINTMENTS_PAGE_SIZE,
+                                           limit=APPOINTMENTS_PAGE_SIZE, newest_first=status in NEWEST_FIRST)
+    # All cards of the page in one element; each card's HTML is memoized by content
+    st.markdown(cards_html(appointments), unsafe_allow_html=True)
+    display_action_bar(appointments, status)
     
-    with tab3:
-        if cancelled:
-            for appointment in cancelled:
-                display_appointment_card(appointment)
-        else:
-            st.info("No cancelled appointments.")
+    if num_pages > 1:
+        col1, col2, col3 = st.columns([1, 2, 1])
+        col1.button("← Previous", key=f"prev_{status}", disabled=page == 0,
+                    on_click=change_page, args=(status, -1), use_container_width=True)
+        col2.markdown(f"<p style='text-align: center;'>Page {page + 1} of {num_pages}</p>",
+                      unsafe_allow_html=True)
+        col3.button("Next →", key=f"next_{status}", disabled=page >= num_pages - 1,
+                    on_click=change_page, args=(status, 1), use_container_width=True)
 
 # Display edit form
 def display_edit_form():
@@ -496,7 +533,7 @@ def display_edit_form():
         appointment = sheets.get_appointment_by_id(st.session_state.edit_appointment_id)
         
         if appointment:
-            st.markdown(f"### Edit Appointment")
+            st.markdown("### Edit Appointment")
             st.markdown("Update the details below and click 'Update Appointment' to save changes.")
             
             # Create a form
@@ -507,20 +544,43 @@ def display_edit_form():
                 area = st.text_input("Area/Location", value=appointment['Area'])
                 representative = st.text_input("Developer Representative Name", value=appointment['Developer Representative'])
                 
-                # Get available dates for the dropdown
-                available_dates = get_available_dates(num_weeks=8)
-                
-                # Format dates for the dropdown
-                date_options = [format_date(date) for date in available_dates]
+                # Slots free for a presentation of this one's length (overlapping
+                # slots can't be selected; the appointment doesn't block itself), with
+                # the current slot first and the next free one after it second
+                appointment_id = st.session_state.edit_appointment_id
+                today = datetime.now().date()
+                current_slot = Slot(
+                    parse_date(appointment['Presentation Date']) or today,
+                    appointment['Time'],
+                    appointment.get('Room') or DEFAULT_ROOM,
+                    _parse_duration(appointment.get('Duration', ""))
+                )
+                current_minutes = to_minutes(current_slot.time)
+                if current_slot.date >= today and current_minutes is not None:
+                    # The minute after the current slot, on the next day after 23:59
+                    after_days, after_minutes = divmod(current_minutes + 1, 24 * 60)
+                    next_slot = sheets.next_free_slot(schedule, current_slot.date + timedelta(days=after_days),
+                                                      format_minutes(after_minutes), duration=current_slot.duration,
+                                                      ignore_id=appointment_id)
+                else:
+                    next_slot = sheets.next_free_slot(schedule, today, duration=current_slot.duration,
+                                                      ignore_id=appointment_id)
                 
-                # Add the current date to the options if it's not already there
-                current_date_obj = datetime.strptime(appointment['Presentation Date'], "%Y-%m-%d").date()
-                current_date_str = format_date(current_date_obj)
-                if current_date_str not in date_options:
-                    date_options.insert(0, current_date_str)
+                slot_options = [current_slot]
+                if next_slot is not None:
+                    slot_options.append(next_slot)
+                slot_options += [
+                    slot for slot in sheets.get_free_slots(schedule, *bookable_window(8), duration=current_slot.duration,
+                                                           ignore_id=appointment_id)
+                    if slot not in (current_slot, next_slot)
+                ]
                 
-                # Date selection
-                selected_date_str = st.selectbox("Presentation Date", date_options, index=date_options.index(current_date_str))
+                # Slot selection
+                selected_slot = st.selectbox(
+                    "Presentation Slot", slot_options,
+                    format_func=lambda option: format_slot(option, include_date=True)
+                                               + (" (next free)" if option == next_slot else "")
+                )
                 
                 # Submit button
                 submit_button = st.form_submit_button("Update Appointment")
@@ -530,23 +590,20 @@ def display_edit_form():
                     if not company_name or not project_name or not area or not representative:
                         st.error("Please fill in all fields.")
                     else:
-                        # Parse the selected date
-                        try:
-                            selected_date_obj = datetime.strptime(selected_date_str, "%A, %d %B %Y").date()
-                            date_str = selected_date_obj.strftime("%Y-%m-%d")
-                        except:
-                            date_str = appointment['Presentation Date']
-                        
                         # Determine if this is a reschedule
-                        is_reschedule = date_str != appointment['Presentation Date']
+                        is_reschedule = selected_slot != current_slot
                         
+                        status = None
                         if is_reschedule:
-                            # Reschedule the appointment
-                            success = sheets.reschedule_appointment(
-                                st.session_state.edit_appointment_id,
-                                date_str,
-                                "12:00"
+                            # Check the slot is still free and move the appointment in one step
+                            result = sheets.reschedule_appointment(
+                                appointment_id,
+                                selected_slot.date.isoformat(),
+                                selected_slot.time,
+                                selected_slot.room
                             )
+                            success = result.reserved
+                            status = result.status
                         else:
                             # Update the appointment
                             success = sheets.update_appointment(
@@ -559,53 +616,103 @@ def display_edit_form():
                         
                         if success:
                             # Show success message
-                            st.session_state.show_success = True
-                            st.session_state.success_message = f"Appointment updated successfully."
-                            
-                            # Reset the edit appointment ID
-                            st.session_state.edit_appointment_id = None
+                            flash_success("Appointment updated successfully.", 'appointments')
                             
                             # Go back to the appointments view
-                            st.session_state.view = 'appointments'
+                            close_edit_form()
                             
-                            # Rerun the app to update the UI
-                            st.rerun()
+                            # Rerun to update the UI
+                            rerun_after_write()
+                        elif status is ReservationStatus.CONFLICT:
+                            st.error("This slot has just been booked by someone else. Please choose another slot.")
                         else:
                             st.error("Failed to update appointment. Please try again.")
             
-            # Cancel button
-            if st.button("Cancel", help="Cancel editing", type="secondary"):
-                # Reset the edit appointment ID
-                st.session_state.edit_appointment_id = None
-                
-                # Go back to the appointments view
-                st.session_state.view = 'appointments'
-                
-                # Rerun the app to update the UI
-                st.rerun()
+            # Cancel button; goes back to the appointments view
+            st.button("Cancel", help="Cancel editing", type="secondary", on_click=close_edit_form)
         else:
             st.error("Appointment not found.")
             
-            # Reset the edit appointment ID
-            st.session_state.edit_appointment_id = None
-            
             # Go back to the appointments view
-            st.session_state.view = 'appointments'
+            close_edit_form()
             
-            # Rerun the app to update the UI
-            st.rerun()
+            # Rerun the tab to update the UI
+            rerun_fragment()
 
-# Main application
-def main():
-    """Main application function."""
-    # Load custom CSS
-    load_css()
+def debug_panel_enabled():
+    """Check whether the API debug panel is enabled (DEBUG_PANEL=1 or ?debug=1)."""
+    if os.environ.get('DEBUG_PANEL', '0').lower() in ('1', 'true', 'yes'):
+        return True
+    return st.query_params.get('debug', '0').lower() in ('1', 'true', 'yes')
+
+def display_debug_panel():
+    """Display the Google Sheets API calls of this rerun in the sidebar."""
+    import pandas as pd
     
-    # Display header
-    display_header()
+    run = sheets.metrics.current_run()
+    if run is None:
+        return
     
-    # Display success message if needed
-    if st.session_state.show_success:
+    with st.sidebar:
+        st.markdown("### 🔧 API Calls")
+        col1, col2 = st.columns(2)
+        col1.metric("Calls this rerun", run['calls'])
+        col2.metric("API time", f"{run['seconds'] * 1000:.0f} ms")
+        if run['errors']:
+            st.warning(f"{run['errors']} failed calls in this rerun")
+        
+        if run['by_caller']:
+            st.markdown("**By caller**")
+            st.dataframe(pd.DataFrame(sorted(run['by_caller'].items(), key=lambda item: -item[1]),
+                                      columns=["Caller", "Calls"]), hide_index=True)
+            st.markdown("**By method**")
+            st.dataframe(pd.DataFrame(sorted(run['by_method'].items(), key=lambda item: -item[1]),
+                                      columns=["Method", "Calls"]), hide_index=True)
+        
+        # Calls of the recent reruns, to spot calls-per-render patterns
+        runs = sheets.metrics.to_json()['runs']
+        if len(runs) > 1:
+            st.markdown("**Recent reruns**")
+            st.bar_chart(pd.DataFrame({'Calls': [r['calls'] for r in runs]}, index=[r['id'] for r in runs]))
+        
+        stats = sheets.get_cache_stats()
+        st.caption(f"Snapshot cache: {stats['hits']} hits, {stats['misses']} misses, "
+                   f"{stats['full_syncs']} full / {stats['delta_syncs']} delta syncs")
+        
+        st.download_button("Export JSON", json.dumps(sheets.metrics.to_json(), indent=2),
+                           file_name="sheets_api_metrics.json", mime="application/json")
+        st.download_button("Export Prometheus", sheets.metrics.to_prometheus(),
+                           file_name="sheets_api_metrics.prom", mime="text/plain")
+
+def in_fragment_rerun():
+    """Check whether only a fragment is rerunning (e.g. after a click inside it)."""
+    ctx = get_script_run_ctx()
+    return ctx is not None and bool(ctx.fragment_ids_this_run)
+
+def rerun_fragment():
+    """Rerun the current fragment only, or the whole page during a full rerun."""
+    st.rerun(scope="fragment" if in_fragment_rerun() else "app")
+
+def rerun_after_write():
+    """
+    Rerun after a booking, edit or cancellation.
+    
+    While the update watcher runs, only the tab that made the change reruns; the
+    watcher sees that the other tab shows an older snapshot and reruns the page
+    within UPDATE_CHECK_INTERVAL. Otherwise the whole page reruns.
+    """
+    if not sheets.background_refresh_running:
+        st.rerun()
+    rerun_fragment()
+
+def flash_success(message, tab):
+    """Show a success message at the top of a tab ('booking' or 'appointments') on its next run."""
+    st.session_state.show_success = tab
+    st.session_state.success_message = message
+
+def display_success_message(tab):
+    """Display the success message of a tab, once."""
+    if st.session_state.show_success == tab:
         st.markdown(f"""
         <div class="success-message">
             {st.session_state.success_message}
@@ -613,26 +720,77 @@ def main():
         """, unsafe_allow_html=True)
         
         # Reset the success message after displaying it
-        st.session_state.show_success = False
+        st.session_state.show_success = None
         st.session_state.success_message = ""
+
+def start_tab(tab):
+    """Start a tab fragment: group its API calls and remember the snapshot it renders."""
+    # Full reruns are grouped in main()
+    if in_fragment_rerun():
+        sheets.metrics.start_run(f"{st.session_state.view}/{tab}")
+    st.session_state.rendered_versions[tab] = sheets.snapshot_version
+    display_success_message(tab)
+
+# Each tab is a fragment: clicks inside it rerun only the tab, not the CSS,
+# header and the other tab
+@st.fragment
+def booking_tab():
+    """Display the calendar and the booking form."""
+    start_tab('booking')
+    
+    # Display calendar view
+    display_calendar_view()
+    
+    # Display booking form if a date is selected
+    display_booking_form()
+
+@st.fragment
+def appointments_tab():
+    """Display the appointments, or the edit form of one of them."""
+    start_tab('appointments')
+    
+    # Check if we're in edit mode
+    if st.session_state.view == 'edit':
+        display_edit_form()
+    else:
+        # Display all appointments
+        display_appointments()
+
+@st.fragment(run_every=UPDATE_CHECK_INTERVAL)
+def watch_for_updates():
+    """Rerun the page when a tab shows an older snapshot than the current one."""
+    current = sheets.snapshot_version
+    if any(version != current for version in st.session_state.rendered_versions.values()):
+        st.rerun()
+
+# Main application
+def main():
+    """Main application function."""
+    # Group the Google Sheets API calls of this rerun
+    sheets.metrics.start_run(st.session_state.view)
+    
+    # Load custom CSS
+    load_css()
+    
+    # Display header
+    display_header()
+    display_write_warning()
     
     # Create tabs for booking and viewing appointments
     tab1, tab2 = st.tabs(["📅 Book Appointment", "📋 View Appointments"])
     
     with tab1:
-        # Display calendar view
-        display_calendar_view()
-        
-        # Display booking form if a date is selected
-        display_booking_form()
+        booking_tab()
     
     with tab2:
-        # Check if we're in edit mode
-        if st.session_state.view == 'edit':
-            display_edit_form()
-        else:
-            # Display all appointments
-            display_appointments()
+        appointments_tab()
+    
+    # Watch for snapshots newer than the tabs show (after the tabs recorded theirs)
+    if sheets.background_refresh_running:
+        watch_for_updates()
+    
+    if debug_panel_enabled():
+        display_debug_panel()
 
 if __name__ == "__main__":
     main()
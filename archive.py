@@ -0,0 +1,350 @@
+"""
+Archive of historical appointments for the Al-Hayah Appointment Booking App
+
+SheetsIntegration.archive_appointments() moves past appointments, and
+appointments cancelled before a cutoff, out of the storage the app reads, so
+the appointment worksheet only holds upcoming bookings. Archived rows are
+partitioned by the year or month of their presentation date, either into
+archive worksheets of the same spreadsheet ("Archive 2025", "Archive 2025-04")
+or into Parquet files in a local directory (period=2025/part-<ID>.parquet,
+readable as one hive-partitioned dataset).
+
+Each archive keeps an index of appointment ID to partition, built from the ID
+column of every partition on first use, so an archived appointment is found
+with one read of its partition.
+
+Usage:
+    python archive.py --cutoff 2025-01-01
+    python archive.py --parquet archive/ --granularity month --dry-run
+"""
+
+from abc import ABC, abstractmethod
+import argparse
+from datetime import datetime
+import os
+import re
+import sys
+import threading
+import time
+
+from id_generator import generate_id
+from storage_backends import FIELD_COLUMNS, HEADERS, LAST_COLUMN, _appended_row_number, _cell
+
+# Partition sizes: one partition per year or per month of presentation
+GRANULARITIES = ("year", "month")
+
+# Seconds before an ID missing from the index makes it reload, to find
+# appointments archived by another process since it was read
+INDEX_TTL = 60
+
+_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+def partition_of(row, granularity="year"):
+    """
+    Get the archive partition of a row.
+
+    Args:
+        row: Row in HEADERS order
+        granularity: "year" or "month"
+
+    Returns:
+        str: YYYY or YYYY-MM of the presentation date, or "undated" without a valid date
+    """
+    date = _cell(row, FIELD_COLUMNS['presentation_date'])
+    if not _ISO_DATE.fullmatch(date):
+        return "undated"
+    return date[:4] if granularity == "year" else date[:7]
+
+class ArchiveStore(ABC):
+    """Archived appointment rows in partitions, with an index of where each ID is."""
+
+    def __init__(self, granularity="year"):
+        """
+        Initialize the archive.
+
+        Args:
+            granularity: "year" or "month"; only affects where new rows are written
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown archive granularity: {granularity} (use year or month)")
+        self.granularity = granularity
+        self._index = None
+        self._index_loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _load_index(self):
+        """
+        Read the IDs of every partition.
+
+        Returns:
+            dict: Mapping of appointment ID to its location in the archive
+        """
+
+    @abstractmethod
+    def _write(self, partition, rows):
+        """
+        Write rows to a partition, creating it if needed.
+
+        Args:
+            partition: Partition name (see partition_of())
+            rows: Rows padded to the width of HEADERS
+
+        Returns:
+            list: Location of each row, in order
+        """
+
+    @abstractmethod
+    def _read(self, location, appointment_id):
+        """
+        Read the row of an appointment.
+
+        Args:
+            location: Where the index says the appointment is
+            appointment_id: Unique ID of the appointment
+
+        Returns:
+            list: The row, or None if it isn't there
+        """
+
+    def _get_index(self, reload=False):
+        """Get the ID index, loading it on first use (called with the lock held)."""
+        if self._index is None or reload:
+            self._index = self._load_index()
+            self._index_loaded_at = time.monotonic()
+        return self._index
+
+    def add(self, rows):
+        """
+        Archive rows, each in the partition of its presentation date.
+
+        Rows whose ID is already archived are skipped, so an archival run that
+        stopped after writing the archive can simply be run again.
+
+        Args:
+            rows: List of rows in HEADERS order
+
+        Returns:
+            int: Number of rows written
+        """
+        width = len(HEADERS)
+        with self._lock:
+            index = self._get_index(reload=True)
+            partitions = {}
+            seen = set()
+            for row in rows:
+                if row and row[0] not in index and row[0] not in seen:
+                    seen.add(row[0])
+                    partitions.setdefault(partition_of(row, self.granularity), []).append(
+                        [_cell(row, col) for col in range(width)])
+
+            for partition, partition_rows in sorted(partitions.items()):
+                for row, location in zip(partition_rows, self._write(partition, partition_rows)):
+                    index[row[0]] = location
+            return len(seen)
+
+    def get_by_id(self, appointment_id):
+        """
+        Get the row of an archived appointment.
+
+        Args:
+            appointment_id: Unique ID of the appointment
+
+        Returns:
+            list: The row, or None if the appointment isn't archived
+        """
+        with self._lock:
+            location = self._get_index().get(appointment_id)
+            if location is None and time.monotonic() - self._index_loaded_at >= INDEX_TTL:
+                location = self._get_index(reload=True).get(appointment_id)
+        if location is None:
+            return None
+        return self._read(location, appointment_id)
+
+    def count(self):
+        """
+        Count the archived appointments.
+
+        Returns:
+            int: Number of appointments in the index
+        """
+        with self._lock:
+            return len(self._get_index())
+
+class SheetsArchive(ArchiveStore):
+    """Archive worksheets next to the appointment worksheet, one per partition."""
+
+    def __init__(self, spreadsheet, granularity="year", title_prefix="Archive "):
+        """
+        Initialize the archive.
+
+        Args:
+            spreadsheet: The gspread spreadsheet of the appointment worksheet (or an
+                         object with the same interface, e.g. its rate-limited proxy)
+            granularity: "year" or "month"
+            title_prefix: Start of the archive worksheet titles; the partition follows
+        """
+        super().__init__(granularity)
+        self.spreadsheet = spreadsheet
+        self.title_prefix = title_prefix
+        self._titles = set()
+
+    @staticmethod
+    def _range(title, cells):
+        """A1 range on a worksheet, with the title quoted."""
+        return "'{}'!{}".format(title.replace("'", "''"), cells)
+
+    def _load_index(self):
+        # One metadata request, then the ID columns of every archive worksheet in one request
+        self._titles = {worksheet.title for worksheet in self.spreadsheet.worksheets()
+                        if worksheet.title.startswith(self.title_prefix)}
+        if not self._titles:
+            return {}
+
+        titles = sorted(self._titles)
+        response = self.spreadsheet.values_batch_get([self._range(title, "A2:A") for title in titles])
+        index = {}
+        for title, value_range in zip(titles, response.get('valueRanges', [])):
+            for i, values in enumerate(value_range.get('values', [])):
+                if _cell(values, 0):
+                    index.setdefault(values[0], (title, i + 2))
+        return index
+
+    def _write(self, partition, rows):
+        title = self.title_prefix + partition
+        if title not in self._titles:
+            self.spreadsheet.add_worksheet(title=title, rows=len(rows) + 1, cols=len(HEADERS))
+            self.spreadsheet.values_update(self._range(title, "A1"), params={'valueInputOption': 'RAW'},
+                                           body={'values': [HEADERS]})
+            self._titles.add(title)
+
+        # The whole partition in one request
+        response = self.spreadsheet.values_append(self._range(title, "A1"),
+                                                  params={'valueInputOption': 'RAW',
+                                                          'insertDataOption': 'INSERT_ROWS'},
+                                                  body={'values': rows})
+        first = _appended_row_number(response)
+        return [(title, first + i if first is not None else None) for i in range(len(rows))]
+
+    def _read(self, location, appointment_id):
+        title, row_num = location
+        if row_num is None:
+            # The append response didn't say where the row went
+            ids = self.spreadsheet.values_get(self._range(title, "A2:A")).get('values', [])
+            row_num = next((i + 2 for i, values in enumerate(ids) if _cell(values, 0) == appointment_id), None)
+            if row_num is None:
+                return None
+
+        values = self.spreadsheet.values_get(
+            self._range(title, f"A{row_num}:{LAST_COLUMN}{row_num}")).get('values', [])
+        row = values[0] if values else []
+        # Archive rows never move unless someone edits the worksheet by hand
+        return row if _cell(row, 0) == appointment_id else None
+
+class ParquetArchive(ArchiveStore):
+    """Parquet files in a local directory, one folder per partition."""
+
+    def __init__(self, directory, granularity="year"):
+        """
+        Initialize the archive.
+
+        Args:
+            directory: Directory holding the partition folders; created on first write
+            granularity: "year" or "month"
+        """
+        super().__init__(granularity)
+        self.directory = directory
+
+    @staticmethod
+    def _pyarrow():
+        """Import pyarrow, which only the Parquet archive needs."""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("The Parquet archive needs pyarrow (pip install pyarrow)") from None
+        return pa, pq
+
+    def _files(self):
+        """Paths of every archive file, oldest partition and file first."""
+        if not os.path.isdir(self.directory):
+            return []
+        paths = []
+        for folder in sorted(os.listdir(self.directory)):
+            if folder.startswith("period="):
+                folder = os.path.join(self.directory, folder)
+                paths.extend(os.path.join(folder, name) for name in sorted(os.listdir(folder))
+                             if name.endswith(".parquet"))
+        return paths
+
+    def _load_index(self):
+        files = self._files()
+        if not files:
+            return {}
+
+        # Only the ID column of each file is read
+        _, pq = self._pyarrow()
+        index = {}
+        for path in files:
+            for appointment_id in pq.read_table(path, columns=["ID"], partitioning=None).column("ID").to_pylist():
+                index.setdefault(appointment_id, path)
+        return index
+
+    def _write(self, partition, rows):
+        pa, pq = self._pyarrow()
+        folder = os.path.join(self.directory, f"period={partition}")
+        os.makedirs(folder, exist_ok=True)
+
+        # Parquet files can't be appended to, so every run adds a file to the
+        # partition; IDs sort by creation time, so the file names do too
+        path = os.path.join(folder, f"part-{generate_id()}.parquet")
+        schema = pa.schema([(header, pa.string()) for header in HEADERS])
+        table = pa.table({header: list(values) for header, values in zip(HEADERS, zip(*rows))}, schema=schema)
+
+        # Written under another name first, so a crash never leaves a partial file in the index
+        pq.write_table(table, path + ".tmp")
+        os.replace(path + ".tmp", path)
+        return [path] * len(rows)
+
+    def _read(self, location, appointment_id):
+        _, pq = self._pyarrow()
+        records = pq.read_table(location, filters=[("ID", "==", appointment_id)], partitioning=None).to_pylist()
+        return [records[0][header] for header in HEADERS] if records else None
+
+def _parse_cutoff(value):
+    """Parse the --cutoff argument (YYYY-MM-DD)."""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date: {value} (expected YYYY-MM-DD)") from None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cutoff", type=_parse_cutoff, default=None,
+                        help="First presentation date kept (YYYY-MM-DD); defaults to today")
+    parser.add_argument("--parquet", metavar="DIR",
+                        help="Archive to Parquet files in this directory instead of archive worksheets")
+    parser.add_argument("--granularity", choices=GRANULARITIES, default="year",
+                        help="One archive partition per year or per month")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the appointments to archive")
+    args = parser.parse_args()
+
+    from bulk_io import _connect
+    from storage_backends import SheetsBackend
+
+    sheets = _connect()
+    if args.parquet:
+        sheets.archive = ParquetArchive(args.parquet, args.granularity)
+    elif isinstance(sheets.backend, SheetsBackend):
+        sheets.archive = SheetsArchive(sheets.backend.worksheet.spreadsheet, args.granularity)
+    else:
+        sys.exit("Error: archiving a local database needs --parquet DIR")
+
+    try:
+        count = sheets.archive_appointments(args.cutoff, dry_run=args.dry_run)
+    except (ImportError, RuntimeError) as e:
+        sys.exit(f"Error: {e}")
+    print(f"{'Would archive' if args.dry_run else 'Archived'} {count} appointments")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+asyncio front end for the Al-Hayah Appointment Booking App storage
+
+AsyncSheetsIntegration exposes every public SheetsIntegration method as a
+coroutine. Calls run in a shared thread pool on the same pooled, keep-alive
+HTTP session, so independent requests awaited together (e.g. with
+asyncio.gather) go out concurrently and cost one round trip of latency instead
+of one per request.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import functools
+
+from sheets_integration import SheetsIntegration
+
+class AsyncSheetsIntegration:
+    def __init__(self, sheets=None, max_workers=8, **kwargs):
+        """
+        Initialize the asyncio front end.
+
+        Args:
+            sheets: SheetsIntegration to wrap; if None, one is created with kwargs
+            max_workers: Maximum number of calls running at once
+            **kwargs: Arguments for SheetsIntegration when sheets is None
+        """
+        self.sheets = sheets if sheets is not None else SheetsIntegration(**kwargs)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sheets-async")
+
+    def __getattr__(self, name):
+        attribute = getattr(self.sheets, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def method(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(attribute, *args, **kwargs))
+
+        return method
+
+    async def get_appointments_by_ids(self, appointment_ids):
+        """
+        Get several appointments concurrently.
+
+        Args:
+            appointment_ids: IDs of the appointments
+
+        Returns:
+            dict: Mapping of each ID to its appointment data, or None if not found
+        """
+        appointment_ids = list(appointment_ids)
+        results = await asyncio.gather(*(self.get_appointment_by_id(appointment_id)
+                                         for appointment_id in appointment_ids))
+        return dict(zip(appointment_ids, results))
+
+    async def close(self):
+        """Wait for running calls and release the thread pool, without blocking the event loop."""
+        await asyncio.to_thread(self._executor.shutdown, wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
@@ -0,0 +1,104 @@
+"""
+Benchmark for the asyncio front end (async_integration.py).
+
+Edits appointments on a fake worksheet with simulated latency, awaiting the
+calls one by one against awaiting them together with asyncio.gather, then
+closes the front end while edits are still running. A ticker task measures the
+longest stall of the event loop during close(), which must stay short: the
+thread pool is shut down on a worker thread, not on the loop.
+
+Usage:
+    python benchmarks/bench_async.py --calls 20 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from async_integration import AsyncSheetsIntegration
+from fake_sheets import FakeWorksheet
+from run_benchmarks import generate_rows
+from sheets_integration import SheetsIntegration
+
+# Ticker period of the stall measurement, in seconds
+TICK = 0.001
+
+def new_front_end(rows, latency, max_workers):
+    """Create an async front end on a fresh fake worksheet, with the snapshot loaded."""
+    worksheet = FakeWorksheet(rows, latency=latency)
+    sheets = SheetsIntegration(None, worksheet=worksheet, requests_per_minute=None)
+    sheets.get_all_appointments()
+    return AsyncSheetsIntegration(sheets, max_workers=max_workers)
+
+async def longest_stall(coroutine):
+    """Run a coroutine and get its result with the longest gap between ticks of the loop, in seconds."""
+    stall = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal stall
+        last = time.perf_counter()
+        while running:
+            await asyncio.sleep(TICK)
+            now = time.perf_counter()
+            stall = max(stall, now - last - TICK)
+            last = now
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    result = await coroutine
+    running = False
+    await task
+    return result, stall
+
+async def run(args):
+    rows = generate_rows(args.calls)
+    ids = [row[0] for row in rows[1:]]
+
+    front_end = new_front_end(rows, args.latency, args.workers)
+    start = time.perf_counter()
+    for appointment_id in ids:
+        await front_end.update_appointment(appointment_id, area="Sequential")
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(front_end.update_appointment(appointment_id, area="Gathered")
+                                     for appointment_id in ids))
+    gathered = time.perf_counter() - start
+    await front_end.close()
+
+    # Close with edits still running: the loop keeps ticking while they finish
+    front_end = new_front_end(rows, args.latency, args.workers)
+    running = [asyncio.ensure_future(front_end.update_appointment(appointment_id, area="Closing"))
+               for appointment_id in ids]
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    _, stall = await longest_stall(front_end.close())
+    closing = time.perf_counter() - start
+    finished = await asyncio.gather(*running)
+
+    print(f"{args.calls} edits at {args.latency * 1000:.0f} ms latency, {args.workers} workers")
+    print(f"  sequential awaits {sequential * 1000:8.1f} ms")
+    print(f"  asyncio.gather    {gathered * 1000:8.1f} ms  ({sequential / gathered:.1f}x)")
+    print(f"  close() waited    {closing * 1000:8.1f} ms for running edits, "
+          f"longest event loop stall {stall * 1000:.1f} ms")
+    return all(results) and all(finished) and stall < args.latency
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20, help="Edits per run")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds each API call takes")
+    parser.add_argument("--workers", type=int, default=8, help="Thread pool size of the front end")
+    args = parser.parse_args()
+
+    ok = asyncio.run(run(args))
+    print("ok" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
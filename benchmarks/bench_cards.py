@@ -0,0 +1,99 @@
+"""
+Benchmark for rendering appointment cards.
+
+Times the HTML of a list of synthetic appointment cards rendered the way the
+app did before cards.py (strptime and an f-string per card, on every rerun)
+against cards.cards_html() on the first rerun (empty cache) and on later reruns
+(every card cached), and checks that cached and fresh HTML are the same.
+
+Usage:
+    python benchmarks/bench_cards.py --cards 100 500 2000 --repeat 20
+"""
+
+import argparse
+from datetime import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import cards
+from dates import format_date, parse_date
+from run_benchmarks import generate_rows
+from snapshot import Appointment
+
+def render_uncached(appointments):
+    """Render the cards like the app did before cards.py, one HTML block per card."""
+    blocks = []
+    for appointment in appointments:
+        try:
+            formatted_date = datetime.strptime(appointment['Presentation Date'], "%Y-%m-%d").date().strftime("%A, %d %B %Y")
+        except ValueError:
+            formatted_date = appointment['Presentation Date']
+        status = appointment['Status']
+        badge_class = cards.BADGE_CLASSES.get(status, cards.DEFAULT_BADGE_CLASS)
+        blocks.append(f"""
+    <div class="card">
+        <div class="card-title">{appointment['Company Name']} - {appointment['Project Name']}</div>
+        <div class="card-subtitle">{appointment['Area']}</div>
+        <div class="card-content">
+            <p><strong>Date:</strong> {formatted_date}</p>
+            <p><strong>Time:</strong> {appointment['Time']}</p>
+            <p><strong>Room:</strong> {appointment['Room']}</p>
+            <p><strong>Duration:</strong> {appointment['Duration']} minutes</p>
+            <p><strong>Representative:</strong> {appointment['Developer Representative']}</p>
+        </div>
+        <div class="card-footer">
+            <span class="{badge_class}">{status}</span>
+        </div>
+    </div>
+    """)
+    return blocks
+
+def clear_caches():
+    """Empty the card cache and the date caches it uses."""
+    cards._render_card.cache_clear()
+    parse_date.cache_clear()
+    format_date.cache_clear()
+
+def time_ms(function, repeat):
+    """Best wall time of repeated calls, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    failed = False
+    for count in args.cards:
+        appointments = [Appointment(*row) for row in generate_rows(count)[1:]]
+
+        def render_cold():
+            clear_caches()
+            cards.cards_html(appointments)
+
+        uncached = time_ms(lambda: render_uncached(appointments), args.repeat)
+        cold = time_ms(render_cold, args.repeat)
+        cached = cards.cards_html(appointments)
+        warm = time_ms(lambda: cards.cards_html(appointments), args.repeat)
+
+        clear_caches()
+        same = cards.cards_html(appointments) == cached
+        failed = failed or not same
+        print(f"{count:>6} cards  before {uncached:8.2f} ms ({count} markdown calls)  "
+              f"cold {cold:8.2f} ms  warm {warm:8.2f} ms (1 markdown call)  "
+              f"warm/before {warm / uncached:.0%}  same html={same}")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Throughput benchmark and collision check for the appointment ID generator.
+
+Generates IDs from many threads and from several forked processes at once, then
+checks that every ID is unique and that each thread's IDs are strictly
+increasing.
+
+Usage:
+    python benchmarks/bench_id_generator.py --threads 16 --processes 4 --count 50000
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from id_generator import generate_id, decode_timestamp
+
+def generate_batch(count):
+    """Generate a batch of IDs and report whether they were strictly increasing."""
+    ids = [generate_id() for _ in range(count)]
+    ordered = all(a < b for a, b in zip(ids, ids[1:]))
+    return ids, ordered
+
+def bench_single_thread(count):
+    start = time.perf_counter()
+    ids, ordered = generate_batch(count)
+    elapsed = time.perf_counter() - start
+    return {
+        'ids': count,
+        'seconds': round(elapsed, 4),
+        'ids_per_second': int(count / elapsed),
+        'unique': len(set(ids)) == count,
+        'ordered': ordered
+    }
+
+def bench_threads(num_threads, count):
+    results = [None] * num_threads
+
+    def worker(n):
+        results[n] = generate_batch(count)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(num_threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    all_ids = [appointment_id for ids, _ in results for appointment_id in ids]
+    return {
+        'ids': len(all_ids),
+        'seconds': round(elapsed, 4),
+        'ids_per_second': int(len(all_ids) / elapsed),
+        'unique': len(set(all_ids)) == len(all_ids),
+        'ordered': all(ordered for _, ordered in results)
+    }
+
+def bench_processes(num_processes, count):
+    context = multiprocessing.get_context("fork" if hasattr(os, "fork") else "spawn")
+    start = time.perf_counter()
+    with context.Pool(num_processes) as pool:
+        results = pool.map(generate_batch, [count] * num_processes)
+    elapsed = time.perf_counter() - start
+
+    all_ids = [appointment_id for ids, _ in results for appointment_id in ids]
+    return {
+        'ids': len(all_ids),
+        'seconds': round(elapsed, 4),
+        'ids_per_second': int(len(all_ids) / elapsed),
+        'unique': len(set(all_ids)) == len(all_ids),
+        'ordered': all(ordered for _, ordered in results)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--count", type=int, default=50000, help="IDs generated per thread/process")
+    args = parser.parse_args()
+
+    sample = generate_id()
+    print(f"sample id: {sample} (created at {time.ctime(decode_timestamp(sample))})")
+    print(f"legacy id 20250420120000 resolves to {time.ctime(decode_timestamp('20250420120000'))}")
+
+    failed = False
+    for name, result in [
+        ('single thread', bench_single_thread(args.count)),
+        (f'{args.threads} threads', bench_threads(args.threads, args.count)),
+        (f'{args.processes} processes', bench_processes(args.processes, args.count)),
+    ]:
+        print(f"{name}: {result['ids']} ids in {result['seconds']}s "
+              f"({result['ids_per_second']}/s), unique={result['unique']}, ordered={result['ordered']}")
+        failed = failed or not (result['unique'] and result['ordered'])
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark and correctness check for the scheduling engine.
+
+Generates the free slots of long horizons for schedules with many rooms and
+times, with holidays and a share of the slots booked by presentations of
+varying length, checks the dates against a naive day-by-day walk of the same
+rules and the free slots against a naive overlap check of every booking, and
+times next_free_slot() from random points of the horizon against scanning the
+free slots.
+
+Usage:
+    python benchmarks/bench_scheduling.py --weeks 52 --rooms 20 --times 9 --holidays 30
+"""
+
+import argparse
+from datetime import date, timedelta
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intervals import IntervalIndex, to_minutes
+from scheduling import HolidayCalendar, RecurrenceRule, Schedule, SlotRule
+
+# Lengths of the booked presentations, in minutes
+DURATIONS = (30, 45, 60, 90)
+
+RULES = [
+    "FREQ=WEEKLY;BYDAY=SA,TU",
+    "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH",
+    "FREQ=DAILY;INTERVAL=3;BYDAY=SU,WE,FR",
+]
+
+def naive_dates(recurrence, holidays, start, end):
+    """Walk the range day by day, the way the dates were generated before."""
+    monday = recurrence.dtstart - timedelta(days=recurrence.dtstart.weekday())
+    dates = []
+    day = start
+    while day < end:
+        if recurrence.freq == "WEEKLY":
+            matches = (day >= recurrence.dtstart and ((day - monday).days // 7) % recurrence.interval == 0
+                       and day.weekday() in recurrence.byday)
+        else:
+            matches = (day >= recurrence.dtstart and (day - recurrence.dtstart).days % recurrence.interval == 0
+                       and (not recurrence.byday or day.weekday() in recurrence.byday))
+        if matches and (recurrence.until is None or day <= recurrence.until) and not holidays.is_holiday(day):
+            dates.append(day)
+        day += timedelta(days=1)
+    return dates
+
+def build_schedule(rng, rooms, times, holidays, start):
+    """A schedule of the RULES in every room and time, with random holiday periods."""
+    periods = []
+    for _ in range(holidays):
+        first = start + timedelta(days=rng.randint(0, 365))
+        periods.append((first, first + timedelta(days=rng.randint(0, 4))))
+    calendar = HolidayCalendar(periods)
+
+    slot_times = tuple(f"{9 + n // 2:02d}:{30 * (n % 2):02d}" for n in range(times))
+    slot_rooms = tuple(f"Room {n + 1}" for n in range(rooms))
+    rules = [SlotRule(RecurrenceRule.parse(rule, start - timedelta(days=rng.randint(0, 30))), slot_times, slot_rooms)
+             for rule in RULES]
+    return Schedule(rules, calendar)
+
+def naive_free(slots, bookings, duration):
+    """The free slots, checking every slot against every booking of its date and room."""
+    by_day_room = {}
+    for day, booking_time, room, length, _ in bookings:
+        booking_start = to_minutes(booking_time)
+        by_day_room.setdefault((day, room), []).append((booking_start, booking_start + length))
+    free = []
+    for slot in slots:
+        start = to_minutes(slot.time)
+        if not any(low < start + duration and start < high
+                   for low, high in by_day_room.get((slot.date.isoformat(), slot.room), ())):
+            free.append(slot._replace(duration=duration))
+    return free
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weeks", type=int, default=52)
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--times", type=int, default=9, help="Slot times per day")
+    parser.add_argument("--holidays", type=int, default=30, help="Random holiday periods")
+    parser.add_argument("--booked", type=float, default=0.3, help="Share of the slots already booked")
+    parser.add_argument("--duration", type=int, default=45, help="Length of the presentation to find slots for")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    start = date.today()
+    end = start + timedelta(weeks=args.weeks)
+    schedule = build_schedule(rng, args.rooms, args.times, args.holidays, start)
+
+    slots = schedule.slots(start, end)
+    bookings = [(slot.date.isoformat(), slot.time, slot.room, rng.choice(DURATIONS), n)
+                for n, slot in enumerate(slots) if rng.random() < args.booked]
+
+    timings = []
+    for _ in range(args.repeat):
+        # A fresh index each time, so building the timelines is included
+        begin = time.perf_counter()
+        free = schedule.free_slots(start, end, IntervalIndex.from_bookings(bookings), args.duration)
+        timings.append(time.perf_counter() - begin)
+
+    # The next free slot from random points of the horizon, against the first free slot after them
+    index = IntervalIndex.from_bookings(bookings)
+    points = [rng.choice(slots) for _ in range(200)]
+    begin = time.perf_counter()
+    found = [schedule.next_free_slot(index, point.date, point.time, args.duration, weeks=args.weeks)
+             for point in points]
+    next_seconds = time.perf_counter() - begin
+    expected_next = [next((slot for slot in free
+                           if (slot.date, to_minutes(slot.time)) >= (point.date, to_minutes(point.time))), None)
+                     for point in points]
+
+    begin = time.perf_counter()
+    dates = schedule.dates(start, end)
+    dates_seconds = time.perf_counter() - begin
+
+    expected = sorted({day for rule in schedule.rules
+                       for day in naive_dates(rule.recurrence, schedule.holidays, start, end)})
+    correct_dates = dates == expected
+    correct_free = free == naive_free(slots, bookings, args.duration)
+    correct_next = found == expected_next
+    correct = correct_dates and correct_free and correct_next
+
+    print(f"{args.weeks} weeks, {len(schedule.rooms)} rooms, {args.times} times, "
+          f"{len(schedule.holidays)} holiday periods")
+    print(f"slots: {len(slots)}, booked: {len(bookings)}, free for {args.duration} minutes: {len(free)}")
+    print(f"free_slots: {min(timings) * 1000:.2f} ms (best of {args.repeat})")
+    print(f"next_free_slot: {next_seconds / len(points) * 1000:.3f} ms per query")
+    print(f"dates: {len(dates)} in {dates_seconds * 1000:.2f} ms")
+    print(f"dates match day-by-day walk: {correct_dates}")
+    print(f"free slots match naive overlap check: {correct_free}")
+    print(f"next free slots match scan: {correct_next}")
+
+    sys.exit(0 if correct else 1)
+
+if __name__ == "__main__":
+    main()
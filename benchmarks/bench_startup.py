@@ -0,0 +1,171 @@
+"""
+Startup benchmark for the app: how long a cold process takes to import the
+storage modules, to construct SheetsIntegration, to get its first data and to
+render the first page.
+
+Every measurement runs in a fresh Python process, so nothing is already
+imported or connected. Connecting to Google Sheets is simulated by a fake
+worksheet behind a fixed connection latency (credentials, spreadsheet and
+worksheet metadata requests). Results are reported as JSON like
+run_benchmarks.py.
+
+Usage:
+    python benchmarks/bench_startup.py --rows 1000 --connect-latency 1.5 --repeat 3
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+
+# Modules timed on their own, each in a fresh process
+MODULES = ["streamlit", "pandas", "gspread", "storage_backends", "snapshot", "sheets_integration", "logo_utils"]
+
+# Heavy dependencies that should not be loaded just by importing the storage layer
+HEAVY_MODULES = ["pandas", "numpy", "gspread", "oauth2client"]
+
+def measure_import(module):
+    """Time importing one module and report which heavy modules it loaded."""
+    start = time.perf_counter()
+    __import__(module)
+    seconds = time.perf_counter() - start
+    return {'seconds': seconds, 'loaded': [name for name in HEAVY_MODULES if name in sys.modules]}
+
+def measure_first_data(rows, connect_latency, latency):
+    """Time constructing SheetsIntegration and its first read against a fake Google Sheets."""
+    start = time.perf_counter()
+    import storage_backends
+    from sheets_integration import SheetsIntegration
+    imported = time.perf_counter()
+
+    from fake_sheets import FakeWorksheet
+    from run_benchmarks import generate_rows
+
+    worksheet = FakeWorksheet(generate_rows(rows), latency=latency)
+
+    def from_credentials(credentials_path, *args, metrics=None, rate_limiter=None, **kwargs):
+        time.sleep(connect_latency)
+        return storage_backends.SheetsBackend(worksheet, metrics, rate_limiter)
+
+    storage_backends.SheetsBackend.from_credentials = from_credentials
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as credentials:
+        credentials.write("{}")
+    try:
+        start_construct = time.perf_counter()
+        sheets = SheetsIntegration(credentials.name, requests_per_minute=None)
+        constructed = time.perf_counter()
+        sheets.count_appointments()
+        first_data = time.perf_counter()
+    finally:
+        os.unlink(credentials.name)
+
+    return {
+        'import_seconds': imported - start,
+        'construct_seconds': constructed - start_construct,
+        'first_data_seconds': first_data - constructed,
+        'total_seconds': first_data - start
+    }
+
+def measure_first_render():
+    """Time the first render of the app with Streamlit's AppTest (dummy data)."""
+    from streamlit.testing.v1 import AppTest
+
+    start = time.perf_counter()
+    app = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+    app.run()
+    seconds = time.perf_counter() - start
+    return {'seconds': seconds, 'exceptions': len(app.exception)}
+
+def run_child(args):
+    """Run one measurement in a fresh process and return its result."""
+    command = [sys.executable, os.path.abspath(__file__), "--child"] + args
+    with tempfile.TemporaryDirectory() as cwd:
+        # A clean working directory: no credentials.json, so the app uses dummy data
+        output = subprocess.run(command, cwd=cwd, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def summarize(samples, key):
+    """Median of one value over repeated samples."""
+    return statistics.median(sample[key] for sample in samples)
+
+def run(args):
+    results = {'imports': {}}
+    for module in MODULES:
+        samples = [run_child(["import", module]) for _ in range(args.repeat)]
+        results['imports'][module] = {
+            'median_ms': round(summarize(samples, 'seconds') * 1000, 1),
+            'loaded': samples[0]['loaded']
+        }
+
+    samples = [run_child(["first-data", str(args.rows), str(args.connect_latency), str(args.latency)])
+               for _ in range(args.repeat)]
+    results['first_data'] = {
+        key: round(summarize(samples, key) * 1000, 1)
+        for key in ('import_seconds', 'construct_seconds', 'first_data_seconds', 'total_seconds')
+    }
+
+    samples = [run_child(["first-render"]) for _ in range(args.repeat)]
+    results['first_render'] = {
+        'median_ms': round(summarize(samples, 'seconds') * 1000, 1),
+        'exceptions': max(sample['exceptions'] for sample in samples)
+    }
+    return results
+
+def child(argv):
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, BENCHMARKS)
+    kind = argv[0]
+    if kind == "import":
+        result = measure_import(argv[1])
+    elif kind == "first-data":
+        result = measure_first_data(int(argv[1]), float(argv[2]), float(argv[3]))
+    else:
+        result = measure_first_render()
+    print(json.dumps(result))
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000, help="Appointments in the fake sheet")
+    parser.add_argument("--connect-latency", type=float, default=1.5,
+                        help="Seconds to authorize and open the spreadsheet")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per simulated API call")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh processes per measurement")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    from run_benchmarks import git_revision
+
+    report = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'config': {
+            'rows': args.rows,
+            'connect_latency': args.connect_latency,
+            'latency': args.latency,
+            'repeat': args.repeat
+        },
+        'results': run(args)
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
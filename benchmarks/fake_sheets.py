@@ -0,0 +1,286 @@
+"""
+In-memory stand-in for a gspread worksheet, used by the benchmark and stress scripts.
+
+Only the worksheet methods SheetsIntegration calls are implemented. Values are
+stored as strings, like get_all_values() returns them. Every call can be slowed
+down by a simulated network latency, counts against a per-minute quota (raising
+the same APIError with code 429 that gspread raises), and is counted per method.
+"""
+
+from collections import Counter, deque
+import re
+import threading
+import time
+
+from gspread.exceptions import APIError
+
+def _column_index(letters):
+    """Convert column letters (A, B, ..., AA) to a one-based column number."""
+    number = 0
+    for letter in letters:
+        number = number * 26 + (ord(letter) - ord('A') + 1)
+    return number
+
+def parse_range(range_name):
+    """
+    Parse an A1 range such as 'B5', 'A5:J5' or the open-ended 'A2:A'.
+
+    Returns:
+        tuple: (first row, first column, last row or None, last column), one-based
+    """
+    match = re.fullmatch(r"([A-Z]+)(\d+)(?::([A-Z]+)(\d*))?", range_name.split('!')[-1])
+    if not match:
+        raise ValueError(f"Unsupported range: {range_name}")
+
+    start_col, start_row, end_col, end_row = match.groups()
+    first_row, first_col = int(start_row), _column_index(start_col)
+    if end_col is None:
+        return first_row, first_col, first_row, first_col
+    return first_row, first_col, int(end_row) if end_row else None, _column_index(end_col)
+
+class FakeResponse:
+    """Minimal requests.Response stand-in for building a gspread APIError."""
+
+    def __init__(self, status_code, message):
+        self.status_code = status_code
+        self.text = message
+        self._error = {"error": {"code": status_code, "message": message, "status": "RESOURCE_EXHAUSTED"}}
+
+    def json(self):
+        return self._error
+
+class FakeSpreadsheet:
+    """
+    The spreadsheet of a FakeWorksheet: the Drive modification time, row deletion
+    and the spreadsheet-level value calls archive worksheets are accessed with.
+    Calls on any of its worksheets count against the first worksheet's stats.
+    """
+
+    def __init__(self, worksheet):
+        self._worksheet = worksheet
+        self._worksheets = [worksheet]
+
+    def _target(self, range_name):
+        """Get the worksheet a quoted A1 range such as "'Archive 2025'!A2:A" is on."""
+        title = range_name.rsplit('!', 1)[0]
+        if title.startswith("'"):
+            title = title[1:-1].replace("''", "'")
+        return next(worksheet for worksheet in self._worksheets if worksheet.title == title)
+
+    def get_lastUpdateTime(self):
+        self._worksheet._api_call('drive.get_lastUpdateTime')
+        return str(self._worksheet.version)
+
+    def worksheets(self):
+        self._worksheet._api_call('spreadsheet.worksheets')
+        return list(self._worksheets)
+
+    def add_worksheet(self, title, rows=1000, cols=26, **kwargs):
+        self._worksheet._api_call('spreadsheet.add_worksheet')
+        worksheet = FakeWorksheet(title=title, sheet_id=len(self._worksheets))
+        worksheet.spreadsheet = self
+        self._worksheets.append(worksheet)
+        return worksheet
+
+    def values_get(self, range_name, **kwargs):
+        target = self._target(range_name)
+        with target._lock:
+            values = target._read_range(range_name)
+        self._worksheet._api_call('spreadsheet.values_get', len(values))
+        return {'range': range_name, 'values': values} if values else {'range': range_name}
+
+    def values_batch_get(self, ranges, **kwargs):
+        value_ranges = []
+        for range_name in ranges:
+            target = self._target(range_name)
+            with target._lock:
+                values = target._read_range(range_name)
+            value_ranges.append({'range': range_name, 'values': values} if values else {'range': range_name})
+        self._worksheet._api_call('spreadsheet.values_batch_get',
+                                  sum(len(value_range.get('values', [])) for value_range in value_ranges))
+        return {'valueRanges': value_ranges}
+
+    def values_update(self, range_name, params=None, body=None):
+        self._worksheet._api_call('spreadsheet.values_update', len(body['values']))
+        target = self._target(range_name)
+        with target._lock:
+            target._write_range(range_name, body['values'])
+
+    def values_append(self, range_name, params=None, body=None):
+        self._worksheet._api_call('spreadsheet.values_append', len(body['values']))
+        return self._target(range_name)._add_rows(body['values'])
+
+    def batch_update(self, body):
+        self._worksheet._api_call('spreadsheet.batch_update')
+        for request in body['requests']:
+            dimension = request['deleteDimension']['range']
+            target = next(worksheet for worksheet in self._worksheets if worksheet.id == dimension['sheetId'])
+            with target._lock:
+                del target.rows[dimension['startIndex']:dimension['endIndex']]
+                target.version += 1
+
+class FakeWorksheet:
+    def __init__(self, rows=None, latency=0.0, row_latency=0.0, quota_per_minute=None, title="Appointments",
+                 sheet_id=0):
+        """
+        Initialize the fake worksheet.
+
+        Args:
+            rows: Initial rows (header included)
+            latency: Seconds each API call takes
+            row_latency: Extra seconds per 1000 rows read or written
+            quota_per_minute: Maximum API calls in any 60 second window, or None
+            title: Title of the worksheet
+            sheet_id: ID of the worksheet within its spreadsheet
+        """
+        self.rows = [list(row) for row in rows or []]
+        self.title = title
+        self.id = sheet_id
+        self.latency = latency
+        self.row_latency = row_latency
+        self.quota_per_minute = quota_per_minute
+        self.spreadsheet = FakeSpreadsheet(self)
+
+        # Bumped on every write, reported as the Drive modification time
+        self.version = 0
+
+        self.calls = Counter()
+        self.rows_transferred = 0
+        self.quota_errors = 0
+        self._recent_calls = deque()
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+    def _api_call(self, name, rows=0):
+        """Count a call, enforce the quota and sleep for the simulated latency."""
+        with self._stats_lock:
+            now = time.monotonic()
+            while self._recent_calls and now - self._recent_calls[0] >= 60:
+                self._recent_calls.popleft()
+            if self.quota_per_minute is not None and len(self._recent_calls) >= self.quota_per_minute:
+                self.quota_errors += 1
+                raise APIError(FakeResponse(429, "Quota exceeded for quota metric 'Read requests'"))
+            self._recent_calls.append(now)
+            self.calls[name] += 1
+            self.rows_transferred += rows
+
+        delay = self.latency + self.row_latency * rows / 1000
+        if delay:
+            time.sleep(delay)
+
+    def reset_stats(self):
+        """Clear the call counters (the quota window is kept)."""
+        with self._stats_lock:
+            self.calls = Counter()
+            self.rows_transferred = 0
+            self.quota_errors = 0
+
+    def get_all_values(self):
+        with self._lock:
+            values = [list(row) for row in self.rows]
+        self._api_call('get_all_values', len(values))
+        return values
+
+    def _append_response(self, first_row, count, width):
+        """Build the part of the API append response SheetsIntegration reads."""
+        last_col = chr(ord('A') + max(width, 1) - 1)
+        return {'updates': {'updatedRange': f"Sheet1!A{first_row}:{last_col}{first_row + count - 1}",
+                            'updatedRows': count}}
+
+    def append_row(self, values, **kwargs):
+        return self._append([values], 'append_row')
+
+    def append_rows(self, values, **kwargs):
+        return self._append(values, 'append_rows')
+
+    def _append(self, values, name):
+        self._api_call(name, len(values))
+        return self._add_rows(values)
+
+    def _add_rows(self, values):
+        """Append rows after the last one and build the API response."""
+        with self._lock:
+            first_row = len(self.rows) + 1
+            for row in values:
+                self.rows.append([str(value) for value in row])
+            self.version += 1
+            return self._append_response(first_row, len(values), max((len(row) for row in values), default=1))
+
+    def _read_range(self, range_name):
+        first_row, first_col, last_row, last_col = parse_range(range_name)
+        if last_row is None:
+            last_row = len(self.rows)
+
+        values = []
+        for row in self.rows[first_row - 1:last_row]:
+            values.append(row[first_col - 1:last_col])
+
+        # Like the API, drop trailing empty rows
+        while values and not any(values[-1]):
+            values.pop()
+        return values
+
+    def get(self, range_name=None, **kwargs):
+        with self._lock:
+            values = self._read_range(range_name)
+        self._api_call('get', len(values))
+        return values
+
+    def batch_get(self, ranges, **kwargs):
+        with self._lock:
+            values = [self._read_range(range_name) for range_name in ranges]
+        self._api_call('batch_get', sum(len(v) for v in values))
+        return values
+
+    def row_values(self, row, **kwargs):
+        self._api_call('row_values', 1)
+        with self._lock:
+            return list(self.rows[row - 1]) if row <= len(self.rows) else []
+
+    def find(self, query, in_column=None, **kwargs):
+        with self._lock:
+            rows = list(enumerate(self.rows, start=1))
+        self._api_call('find', len(rows))
+        for row_num, row in rows:
+            cells = [row[in_column - 1]] if in_column and len(row) >= in_column else row
+            if query in cells:
+                return FakeCell(row_num, (in_column or row.index(query) + 1))
+        return None
+
+    def _write_range(self, range_name, values):
+        first_row, first_col, _, _ = parse_range(range_name)
+        for r, value_row in enumerate(values):
+            row_num = first_row + r
+            while len(self.rows) < row_num:
+                self.rows.append([])
+            row = self.rows[row_num - 1]
+            for c, value in enumerate(value_row):
+                col = first_col - 1 + c
+                while len(row) <= col:
+                    row.append("")
+                row[col] = str(value)
+        self.version += 1
+
+    def update(self, values=None, range_name=None, **kwargs):
+        self._api_call('update', len(values))
+        with self._lock:
+            self._write_range(range_name, values)
+
+    def batch_update(self, data, **kwargs):
+        self._api_call('batch_update', sum(len(item['values']) for item in data))
+        with self._lock:
+            for item in data:
+                self._write_range(item['range'], item['values'])
+
+    def clear(self):
+        self._api_call('clear')
+        with self._lock:
+            self.rows = []
+            self.version += 1
+
+class FakeCell:
+    """Result of FakeWorksheet.find()."""
+
+    def __init__(self, row, col):
+        self.row = row
+        self.col = col
@@ -0,0 +1,250 @@
+"""
+Benchmark suite for SheetsIntegration and the app's render path.
+
+Runs every operation against a fake Google Sheets worksheet with simulated
+per-call latency and quota, over synthetic appointment sets of different
+sizes, and reports wall time, API calls and peak memory per operation as JSON
+so results can be compared between versions.
+
+Usage:
+    python benchmarks/run_benchmarks.py --sizes 100 1000 10000 100000 --latency 0.05 --output results.json
+    python benchmarks/run_benchmarks.py --backend sqlite
+"""
+
+import argparse
+from datetime import date, timedelta
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from scheduling import bookable_window, default_schedule
+from sheets_integration import SheetsIntegration
+from storage_backends import HEADERS, InMemoryBackend, SQLiteBackend
+from fake_sheets import FakeWorksheet
+
+AREAS = ["New Cairo", "6th of October", "Sheikh Zayed", "New Capital", "North Coast"]
+STATUSES = ["Confirmed"] * 3 + ["Rescheduled"] + ["Cancelled"] * 6
+
+def generate_rows(count, seed=42):
+    """
+    Generate synthetic appointments on Saturdays and Tuesdays around today.
+
+    Args:
+        count: Number of appointments
+        seed: Random seed, so every run benchmarks the same data
+
+    Returns:
+        list: Rows with header, in sheet format
+    """
+    rng = random.Random(seed)
+    today = date.today()
+
+    # Presentation days from two years back to eight weeks ahead
+    days = [today + timedelta(days=offset) for offset in range(-730, 57)]
+    days = [day for day in days if day.weekday() in (1, 5)]
+
+    rows = [list(HEADERS)]
+    for n in range(count):
+        day = rng.choice(days)
+        created = f"{day - timedelta(days=rng.randint(1, 30))} 10:00:00"
+        rows.append([
+            f"BENCH{n:08d}",
+            f"Developer {rng.randint(1, 500)}",
+            f"Project {rng.randint(1, 2000)}",
+            rng.choice(AREAS),
+            day.strftime("%Y-%m-%d"),
+            "12:00",
+            f"Representative {rng.randint(1, 300)}",
+            rng.choice(STATUSES),
+            created,
+            created
+        ])
+    return rows
+
+SCHEDULE = default_schedule()
+
+def simulate_booking_tab(sheets):
+    """Make the storage calls of a booking tab rerun: the calendar with its free slots."""
+    return sheets.get_free_slots(SCHEDULE, *bookable_window(4))
+
+def simulate_appointments_tab(sheets):
+    """Make the storage calls of an appointments tab rerun: the status counts and first page."""
+    counts = sheets.count_appointments()
+    return counts, sheets.get_appointments("Confirmed", offset=0, limit=10)
+
+def simulate_page_render(sheets):
+    """Make the storage calls of a full rerun of the app: both tabs."""
+    return simulate_booking_tab(sheets), simulate_appointments_tab(sheets)
+
+def simulate_edit_render(sheets, appointment_id):
+    """Make the storage calls of a rerun showing the edit form."""
+    sheets.get_appointment_by_id(appointment_id)
+    sheets.get_free_slots(SCHEDULE, *bookable_window(8))
+
+class Harness:
+    def __init__(self, rows, backend, latency, row_latency, quota, cache_ttl, sync_mode):
+        self.rows = rows
+        self.backend = backend
+        self.latency = latency
+        self.row_latency = row_latency
+        self.quota = quota
+        self.cache_ttl = cache_ttl
+        self.sync_mode = sync_mode
+        self.worksheet = None
+
+    def new_integration(self):
+        """Create a SheetsIntegration on a fresh copy of the data."""
+        if self.backend == "sheets":
+            self.worksheet = FakeWorksheet(self.rows, latency=self.latency, row_latency=self.row_latency,
+                                           quota_per_minute=self.quota)
+            # The rate limiter is sized to the simulated quota, or off without one
+            return SheetsIntegration(None, worksheet=self.worksheet, cache_ttl=self.cache_ttl,
+                                     sync_mode=self.sync_mode, requests_per_minute=self.quota)
+
+        self.worksheet = None
+        if self.backend == "sqlite":
+            backend = SQLiteBackend(os.path.join(tempfile.mkdtemp(), "bench.db"))
+            backend.replace_all(self.rows)
+        else:
+            backend = InMemoryBackend(self.rows)
+        return SheetsIntegration(None, backend=backend, cache_ttl=self.cache_ttl)
+
+    def measure(self, operation, setup=None):
+        """
+        Run an operation on a fresh integration, once for timing and once for memory.
+
+        Args:
+            operation: Function taking the integration
+            setup: Optional function run on the integration before the measurement
+
+        Returns:
+            dict: Wall time, API calls, rows transferred, quota errors and peak memory
+        """
+        sheets = self.new_integration()
+        if setup:
+            setup(sheets)
+        if self.worksheet:
+            self.worksheet.reset_stats()
+
+        start = time.perf_counter()
+        operation(sheets)
+        wall = time.perf_counter() - start
+
+        result = {'wall_ms': round(wall * 1000, 3)}
+        if self.worksheet:
+            result['api_calls'] = sum(self.worksheet.calls.values())
+            result['api_calls_by_method'] = dict(self.worksheet.calls)
+            result['rows_transferred'] = self.worksheet.rows_transferred
+            result['quota_errors'] = self.worksheet.quota_errors
+
+        # Separate pass for memory, since tracing slows everything down
+        sheets = self.new_integration()
+        if setup:
+            setup(sheets)
+        tracemalloc.start()
+        operation(sheets)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result['peak_memory_kb'] = round(peak / 1024, 1)
+        return result
+
+def run(args):
+    results = []
+    for size in args.sizes:
+        rows = generate_rows(size)
+        harness = Harness(rows, args.backend, args.latency, args.row_latency, args.quota,
+                          args.cache_ttl, args.sync_mode)
+        sample_id = rows[len(rows) // 2][0]
+        sample_date = rows[len(rows) // 2][4]
+        warm = lambda sheets: sheets.get_all_appointments()
+
+        operations = {
+            'get_all_appointments (cold)': (lambda sheets: sheets.get_all_appointments(), None),
+            'get_all_appointments (warm)': (lambda sheets: sheets.get_all_appointments(), warm),
+            'get_appointment_by_id': (lambda sheets: sheets.get_appointment_by_id(sample_id), warm),
+            'is_slot_available': (lambda sheets: sheets.is_slot_available(sample_date, "12:00"), warm),
+            'next_free_slot': (lambda sheets: sheets.next_free_slot(SCHEDULE, date.today()), warm),
+            'get_free_slots (8 weeks)':
+                (lambda sheets: sheets.get_free_slots(SCHEDULE, *bookable_window(8)), warm),
+            'update_appointment': (lambda sheets: sheets.update_appointment(sample_id, area="Benchmark"), warm),
+            'page render (cold)': (simulate_page_render, None),
+            'page render (warm)': (simulate_page_render, warm),
+            'booking tab rerun (warm)': (simulate_booking_tab, warm),
+            'appointments tab rerun (warm)': (simulate_appointments_tab, warm),
+            'edit form render (warm)': (lambda sheets: simulate_edit_render(sheets, sample_id), warm),
+        }
+        if args.backend == "sheets":
+            # Past appointments moved to archive worksheets, leaving the upcoming ones
+            today = date.today().isoformat()
+            archived_id = next((row[0] for row in rows[1:] if row[4] < today), sample_id)
+            archived_warm = lambda sheets: (sheets.archive_appointments(), sheets.get_all_appointments())
+            operations.update({
+                'archive_appointments': (lambda sheets: sheets.archive_appointments(), warm),
+                'get_appointment_by_id (archived)':
+                    (lambda sheets: sheets.get_appointment_by_id(archived_id), archived_warm),
+                'page render (cold, archived)': (simulate_page_render, lambda sheets: sheets.archive_appointments()),
+            })
+
+        for name, (operation, setup) in operations.items():
+            result = harness.measure(operation, setup)
+            result.update({'operation': name, 'rows': size})
+            results.append(result)
+            calls = f", {result['api_calls']} API calls" if 'api_calls' in result else ""
+            print(f"{size:>7} rows  {name:<30} {result['wall_ms']:>10.2f} ms{calls}, "
+                  f"peak {result['peak_memory_kb']} KB", file=sys.stderr)
+    return results
+
+def git_revision():
+    """Get the current commit, so results can be matched to versions."""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--backend", choices=["sheets", "sqlite", "memory"], default="sheets")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per simulated API call")
+    parser.add_argument("--row-latency", type=float, default=0.002,
+                        help="Extra seconds per 1000 rows transferred")
+    parser.add_argument("--quota", type=int, default=None, help="Simulated API calls allowed per minute")
+    parser.add_argument("--cache-ttl", type=float, default=30)
+    parser.add_argument("--sync-mode", choices=["full", "delta"], default="full")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'config': {
+            'backend': args.backend,
+            'latency': args.latency,
+            'row_latency': args.row_latency,
+            'quota_per_minute': args.quota,
+            'cache_ttl': args.cache_ttl,
+            'sync_mode': args.sync_mode
+        },
+        'results': run(args)
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Stress check for SheetsIntegration.reserve_slot().
+
+Many threads try to book the same slot at once, spread over several
+SheetsIntegration instances that share one fake worksheet (or one SQLite
+database with --storage sqlite). With --no-process-lock the process-wide lock
+is disabled, so each instance behaves like a separate app process and only the
+optimistic check against the storage prevents double booking. The in-memory
+dummy storage can't be shared between processes and relies on the lock. With
+--overlapping the threads book 45-minute presentations starting 10 minutes
+apart instead of the same time, which all overlap each other.
+
+Usage:
+    python benchmarks/stress_reserve_slot.py --threads 64 --instances 4 --rounds 20
+    python benchmarks/stress_reserve_slot.py --storage sqlite --no-process-lock
+    python benchmarks/stress_reserve_slot.py --overlapping --no-process-lock
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import sheets_integration
+from sheets_integration import SheetsIntegration, ReservationStatus, ACTIVE_STATUSES
+from storage_backends import HEADERS, SQLiteBackend
+from fake_sheets import FakeWorksheet
+
+# Start times of the --overlapping presentations; every pair overlaps at 45 minutes
+OVERLAPPING_TIMES = ("12:00", "12:10", "12:20", "12:30")
+OVERLAPPING_DURATION = 45
+
+def run_round(num_threads, num_instances, date, storage, db_path, overlapping=False):
+    """
+    Let every thread try to reserve the same slot, or overlapping ones.
+
+    Returns:
+        tuple: (number of successful reservations, number of active rows in the slot)
+    """
+    if storage == "dummy":
+        instances = [SheetsIntegration(None)]
+    elif storage == "sqlite":
+        instances = [SheetsIntegration(None, backend=SQLiteBackend(db_path)) for _ in range(num_instances)]
+    else:
+        worksheet = FakeWorksheet([HEADERS])
+        instances = [SheetsIntegration(None, worksheet=worksheet, requests_per_minute=None)
+                     for _ in range(num_instances)]
+
+    barrier = threading.Barrier(num_threads)
+    results = []
+    results_lock = threading.Lock()
+
+    def worker(n):
+        sheets = instances[n % len(instances)]
+        barrier.wait()
+        if overlapping:
+            result = sheets.reserve_slot(date, OVERLAPPING_TIMES[n % len(OVERLAPPING_TIMES)], f"Company {n}",
+                                         "Project", "Area", "Rep", duration=OVERLAPPING_DURATION)
+        else:
+            result = sheets.reserve_slot(date, "12:00", f"Company {n}", "Project", "Area", "Rep")
+        with results_lock:
+            results.append(result)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    errors = [r for r in results if r.status is ReservationStatus.ERROR]
+    if errors:
+        raise RuntimeError(f"{len(errors)} reservations failed with an error")
+
+    rows = instances[0].backend.get_all()
+    active = [row for row in rows[1:] if row[4] == date and row[7] in ACTIVE_STATUSES]
+    return sum(1 for r in results if r.reserved), len(active)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--instances", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--storage", choices=["sheets", "sqlite", "dummy"], default="sheets",
+                        help="Fake worksheet, a temporary SQLite database, or in-memory dummy data")
+    parser.add_argument("--no-process-lock", action="store_true",
+                        help="Disable the process-wide lock to simulate separate processes")
+    parser.add_argument("--overlapping", action="store_true",
+                        help="Book overlapping presentations at different times instead of one slot")
+    args = parser.parse_args()
+
+    if args.no_process_lock:
+        sheets_integration._RESERVATION_LOCK = contextlib.nullcontext()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "stress.db")
+
+    failures = 0
+    for n in range(args.rounds):
+        date = f"2030-{n // 28 + 1:02d}-{n % 28 + 1:02d}"
+        reserved, active = run_round(args.threads, args.instances, date, args.storage, db_path, args.overlapping)
+        status = "ok" if reserved == 1 and active == 1 else "DOUBLE BOOKED"
+        if status != "ok":
+            failures += 1
+        print(f"round {n + 1}: {reserved} reserved, {active} active rows in slot - {status}")
+
+    print(f"{args.rounds - failures}/{args.rounds} rounds without double booking")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Fault-injection check for the write-behind queue.
+
+Books appointments and edits existing ones in write-behind mode against a fake
+worksheet whose batch_update (the request writing cell updates) fails for the
+first few calls. Each flush then writes its new rows and fails on the updates
+of the same batch. After the queue recovers, every appointment ID must be on
+the sheet exactly once, with every edit applied.
+
+Usage:
+    python benchmarks/stress_write_behind.py --bookings 50 --failures 3
+"""
+
+import argparse
+from collections import Counter
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sheets_integration import SheetsIntegration
+from storage_backends import HEADERS
+from fake_sheets import FakeWorksheet
+
+class FlakyWorksheet(FakeWorksheet):
+    """Fake worksheet whose first batch_update calls fail, after any appends of the batch landed."""
+
+    def __init__(self, rows, failures):
+        super().__init__(rows)
+        self.failures = failures
+
+    def batch_update(self, data, **kwargs):
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("simulated batch_update failure")
+        return super().batch_update(data, **kwargs)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--existing", type=int, default=20, help="Appointments on the sheet before the run")
+    parser.add_argument("--bookings", type=int, default=50, help="Appointments booked in write-behind mode")
+    parser.add_argument("--failures", type=int, default=3, help="batch_update calls that fail before one succeeds")
+    args = parser.parse_args()
+
+    existing = [[f"EXISTING-{n}", f"Company {n}", "Project", "Area", "2030-01-05", "12:00", "Rep",
+                 "Confirmed", "", "", "Main Hall", "30"] for n in range(args.existing)]
+    worksheet = FlakyWorksheet([HEADERS] + existing, args.failures)
+    journal_path = os.path.join(tempfile.mkdtemp(), "pending_writes.jsonl")
+    sheets = SheetsIntegration(None, worksheet=worksheet, write_behind=True, journal_path=journal_path,
+                               requests_per_minute=None)
+    # Flushed by hand below, so the failures are seen in order
+    sheets._write_queue.stop(flush=False)
+
+    # Batches of new rows and edits of rows already on the sheet
+    booked = [sheets._insert_appointment(f"New {n}", "Project", "Area", "2030-02-03", "12:00", "Rep")
+              for n in range(args.bookings)]
+    for row in existing:
+        sheets.update_appointment(row[0], area="Edited")
+
+    attempts = 0
+    while not sheets.flush_pending_writes():
+        attempts += 1
+        if attempts > args.failures:
+            sys.exit(f"the queue didn't recover after {attempts} failed flushes")
+    stats = sheets.get_write_stats()
+
+    counts = Counter(row[0] for row in worksheet.rows[1:])
+    duplicates = {appointment_id: count for appointment_id, count in counts.items() if count > 1}
+    missing = [appointment_id for appointment_id in booked if appointment_id not in counts]
+    unedited = [row[0] for row in worksheet.rows[1:] if row[0].startswith("EXISTING-") and row[3] != "Edited"]
+
+    print(f"{attempts} failed flushes, then {stats['pending']} writes pending")
+    print(f"{len(counts)} appointments on the sheet: {len(duplicates)} written more than once, "
+          f"{len(missing)} missing, {len(unedited)} edits lost")
+    ok = not duplicates and not missing and not unedited and stats['pending'] == 0
+    print("ok" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
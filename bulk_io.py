@@ -0,0 +1,378 @@
+"""
+Bulk import and export for the Al-Hayah Appointment Booking App
+
+Imports read a CSV or XLSX file row by row, validate every row (required
+fields, date, time, room, duration, and optionally that the slot is in the
+presentation schedule), then book all valid rows at once with
+SheetsIntegration.import_appointments(): one conflict check against the
+current bookings and one append for everything accepted. Every rejected row is
+reported with its reason, and the report can be written as CSV next to the
+original values for correction.
+
+Exports write the full appointment history to CSV or Parquet chunk by chunk,
+so the whole sheet is never held in memory.
+
+XLSX files need openpyxl and Parquet files pyarrow; neither is needed for CSV.
+
+Usage:
+    python bulk_io.py import campaign.xlsx --rejections rejected.csv
+    python bulk_io.py import campaign.csv --dry-run
+    python bulk_io.py export history.parquet
+"""
+
+import argparse
+import csv
+from dataclasses import dataclass, field
+from datetime import date, datetime, time as dt_time, timedelta
+import os
+import sys
+
+from intervals import format_minutes, to_minutes
+from storage_backends import DEFAULT_ROOM, FIELD_COLUMNS, HEADERS
+
+# Appointment fields an import file can set, by header; the header may also be
+# the field name (e.g. company_name), in any case
+IMPORT_FIELDS = {
+    HEADERS[col]: name for name, col in FIELD_COLUMNS.items() if name != 'status'
+}
+
+# Fields every imported row must have
+REQUIRED_FIELDS = ['company_name', 'project_name', 'area', 'presentation_date', 'time',
+                   'developer_representative']
+
+# Rows per chunk read from the storage by exports
+EXPORT_CHUNK_SIZE = 5000
+
+@dataclass(frozen=True)
+class Rejection:
+    """
+    A row of an import file that was not booked.
+
+    Attributes:
+        row: Row number in the file (the header is row 1)
+        reason: Why the row was rejected
+        values: The row as read, by header
+    """
+    row: int
+    reason: str
+    values: dict
+
+@dataclass
+class ImportReport:
+    """
+    Outcome of an import.
+
+    Attributes:
+        accepted: (row number, appointment ID) of every booked row
+        rejected: Rejection of every other row, in file order
+        dry_run: True if nothing was written
+    """
+    accepted: list = field(default_factory=list)
+    rejected: list = field(default_factory=list)
+    dry_run: bool = False
+
+    def summary(self):
+        """Describe the outcome in one line."""
+        verb = "would be booked" if self.dry_run else "booked"
+        return f"{len(self.accepted)} {verb}, {len(self.rejected)} rejected"
+
+    def write_rejections(self, path):
+        """
+        Write the rejected rows as CSV: row number, reason, then the original columns.
+
+        Args:
+            path: Path of the CSV file
+        """
+        # Cells beyond a CSV row's header are read under None; they are left out
+        headers = list(dict.fromkeys(header for rejection in self.rejected for header in rejection.values
+                                     if header is not None))
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Row", "Reason"] + headers)
+            for rejection in self.rejected:
+                writer.writerow([rejection.row, rejection.reason]
+                                + [_text(rejection.values.get(header)) for header in headers])
+
+def _text(value):
+    """Convert a cell value read from a file to a stripped string."""
+    return "" if value is None else str(value).strip()
+
+def _field_of(header):
+    """Get the appointment field an import file header sets, or None."""
+    header = _text(header)
+    for name, field_name in IMPORT_FIELDS.items():
+        if header.lower() in (name.lower(), field_name):
+            return field_name
+    return None
+
+def read_records(path):
+    """
+    Read an import file row by row.
+
+    Args:
+        path: Path of a .csv or .xlsx file with a header row
+
+    Yields:
+        tuple: (row number, dictionary of the row's values by header)
+
+    Raises:
+        ValueError: If the file type isn't supported
+        ImportError: If an .xlsx file is read without openpyxl installed
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        # utf-8-sig drops the byte order mark Excel writes
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for row_num, record in enumerate(csv.DictReader(f), start=2):
+                yield row_num, record
+    elif extension == ".xlsx":
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ImportError("Reading .xlsx files needs openpyxl (pip install openpyxl)") from None
+
+        # Read-only mode streams the rows instead of loading the whole workbook
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            headers = [_text(value) for value in next(rows, ())]
+            for row_num, values in enumerate(rows, start=2):
+                if any(value not in (None, "") for value in values):
+                    yield row_num, dict(zip(headers, values))
+        finally:
+            workbook.close()
+    else:
+        raise ValueError(f"Unsupported import file type: {extension or path} (use .csv or .xlsx)")
+
+def _parse_date(value):
+    """Parse a presentation date cell (text or a spreadsheet date) to YYYY-MM-DD, or None."""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    try:
+        return datetime.strptime(_text(value), "%Y-%m-%d").date().isoformat()
+    except ValueError:
+        return None
+
+def _parse_time(value):
+    """Parse a time cell (text or a spreadsheet time) to HH:MM, or None."""
+    if isinstance(value, (datetime, dt_time)):
+        return f"{value.hour:02d}:{value.minute:02d}"
+    minutes = to_minutes(_text(value))
+    return format_minutes(minutes) if minutes is not None else None
+
+class RecordValidator:
+    """Turns import file rows into add_appointment() arguments."""
+
+    def __init__(self, schedule=None):
+        """
+        Initialize the validator.
+
+        Args:
+            schedule: Schedule the slots must belong to, or None to accept any
+                      date, time and room
+        """
+        self.schedule = schedule
+        self._slots = {}  # Date -> {(time, room): default duration} of the schedule
+
+    def _schedule_slots(self, day):
+        """Get the slots of a date in the schedule, generated once per date."""
+        slots = self._slots.get(day)
+        if slots is None:
+            first = date.fromisoformat(day)
+            slots = {(_parse_time(slot.time), slot.room): slot.duration
+                     for slot in self.schedule.slots(first, first + timedelta(days=1))}
+            self._slots[day] = slots
+        return slots
+
+    def validate(self, record):
+        """
+        Validate one row.
+
+        Args:
+            record: Dictionary of the row's values by header
+
+        Returns:
+            tuple: (appointment dictionary, None) if the row is valid, else (None, reason)
+        """
+        values = {}
+        for header, value in record.items():
+            field_name = _field_of(header)
+            if field_name is not None:
+                values[field_name] = value
+
+        missing = [HEADERS[FIELD_COLUMNS[name]] for name in REQUIRED_FIELDS if not _text(values.get(name))]
+        if missing:
+            return None, f"Missing {', '.join(missing)}"
+
+        presentation_date = _parse_date(values['presentation_date'])
+        if presentation_date is None:
+            return None, f"Invalid Presentation Date (expected YYYY-MM-DD): {_text(values['presentation_date'])}"
+
+        time = _parse_time(values['time'])
+        if time is None:
+            return None, f"Invalid Time (expected HH:MM): {_text(values['time'])}"
+
+        room = _text(values.get('room')) or DEFAULT_ROOM
+
+        duration = None
+        if _text(values.get('duration')):
+            try:
+                duration = int(float(_text(values['duration'])))
+            except (ValueError, OverflowError):
+                # Not a number, or inf
+                duration = 0
+            if duration <= 0:
+                return None, f"Invalid Duration (expected minutes): {_text(values['duration'])}"
+
+        if self.schedule is not None:
+            slot_duration = self._schedule_slots(presentation_date).get((time, room))
+            if slot_duration is None:
+                return None, f"Not a presentation slot: {presentation_date} at {time} in {room}"
+            duration = duration or slot_duration
+
+        appointment = {name: _text(values[name]) for name in REQUIRED_FIELDS}
+        appointment.update(presentation_date=presentation_date, time=time, room=room)
+        if duration:
+            appointment['duration'] = duration
+        return appointment, None
+
+def import_file(sheets, path, schedule=None, dry_run=False):
+    """
+    Import the appointments of a CSV or XLSX file.
+
+    Args:
+        sheets: SheetsIntegration to book the appointments in
+        path: Path of the file
+        schedule: Schedule the slots must belong to, or None to accept any slot
+        dry_run: If True, validate and check conflicts without writing
+
+    Returns:
+        ImportReport: The booked and the rejected rows
+    """
+    validator = RecordValidator(schedule)
+    report = ImportReport(dry_run=dry_run)
+
+    # Only the valid rows are kept; the file itself is streamed
+    candidates = []
+    for row_num, record in read_records(path):
+        appointment, reason = validator.validate(record)
+        if appointment is None:
+            report.rejected.append(Rejection(row_num, reason, record))
+        else:
+            candidates.append((row_num, record, appointment))
+
+    results = sheets.import_appointments([appointment for _, _, appointment in candidates], dry_run=dry_run)
+    for (row_num, record, _), result in zip(candidates, results):
+        if result.reserved:
+            report.accepted.append((row_num, result.appointment_id))
+        elif result.conflicting_ids:
+            reason = f"Overlaps appointment {', '.join(result.conflicting_ids)}"
+            report.rejected.append(Rejection(row_num, reason, record))
+        else:
+            report.rejected.append(Rejection(row_num, "Could not be written", record))
+
+    report.rejected.sort(key=lambda rejection: rejection.row)
+    return report
+
+def export_file(sheets, path, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Export every appointment, cancelled ones included, to a CSV or Parquet file.
+
+    Args:
+        sheets: SheetsIntegration to read the appointments from
+        path: Path of a .csv or .parquet file
+        chunk_size: Rows read from the storage and written at a time
+
+    Returns:
+        int: Number of appointments written
+
+    Raises:
+        ValueError: If the file type isn't supported
+        ImportError: If a .parquet file is written without pyarrow installed
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in (".csv", ".parquet"):
+        raise ValueError(f"Unsupported export file type: {extension or path} (use .csv or .parquet)")
+
+    count = 0
+    if extension == ".csv":
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            for chunk in sheets.iter_rows(chunk_size):
+                writer.writerows(chunk)
+                count += len(chunk)
+        return max(count - 1, 0)  # Without the header
+
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Writing .parquet files needs pyarrow (pip install pyarrow)") from None
+
+    schema = pa.schema([(header, pa.string()) for header in HEADERS])
+    with pq.ParquetWriter(path, schema) as writer:
+        for i, chunk in enumerate(sheets.iter_rows(chunk_size)):
+            rows = chunk[1:] if i == 0 else chunk
+            if rows:
+                columns = list(zip(*rows))
+                writer.write_table(pa.table({header: list(values) for header, values in zip(HEADERS, columns)},
+                                            schema=schema))
+                count += len(rows)
+    return count
+
+def _connect():
+    """Create a SheetsIntegration the way the app does, from credentials.json and the environment."""
+    from sheets_integration import SheetsIntegration
+    from storage_backends import SQLiteBackend
+
+    backend = SQLiteBackend(os.environ['APPOINTMENTS_DB']) if os.environ.get('APPOINTMENTS_DB') else None
+    credentials_path = 'credentials.json' if os.path.exists('credentials.json') else None
+    return SheetsIntegration(credentials_path, backend=backend,
+                             spreadsheet_key=os.environ.get('SPREADSHEET_KEY') or None)
+
+def run_import(sheets, args):
+    """Run the import command; exits with 1 if any row was rejected."""
+    schedule = None
+    if not args.any_slot:
+        from scheduling import default_schedule, load_schedule
+        schedule = load_schedule(os.environ['SCHEDULE_FILE']) if os.environ.get('SCHEDULE_FILE') else default_schedule()
+
+    report = import_file(sheets, args.path, schedule, dry_run=args.dry_run)
+    for rejection in report.rejected:
+        print(f"Row {rejection.row}: {rejection.reason}")
+    if args.rejections:
+        report.write_rejections(args.rejections)
+    print(report.summary())
+    sys.exit(1 if report.rejected else 0)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="Book the appointments of a CSV or XLSX file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--rejections", help="Write the rejected rows and reasons to this CSV file")
+    import_parser.add_argument("--dry-run", action="store_true", help="Check the file without booking")
+    import_parser.add_argument("--any-slot", action="store_true",
+                               help="Accept dates, times and rooms outside the presentation schedule")
+
+    export_parser = commands.add_parser("export", help="Write every appointment to a CSV or Parquet file")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    sheets = _connect()
+    try:
+        if args.command == "import":
+            run_import(sheets, args)
+        else:
+            count = export_file(sheets, args.path, args.chunk_size)
+            print(f"Exported {count} appointments to {args.path}")
+    except (ImportError, ValueError) as e:
+        # Unsupported file type or missing optional dependency
+        sys.exit(f"Error: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Appointment card HTML for the Al-Hayah Appointment Booking App
+
+Cards are rendered from CARD_TEMPLATE and memoized by content: the cache is
+keyed on the fields a card shows plus TEMPLATE_VERSION, so an appointment that
+hasn't changed reuses its HTML across reruns and sessions, while an edit (or a
+new template version) renders it again. A page of cards is joined into one HTML
+block, which the app emits with a single st.markdown call.
+"""
+
+import html
+from functools import lru_cache
+from operator import attrgetter
+
+from dates import format_date, parse_date
+
+# Bump when CARD_TEMPLATE or BADGE_CLASSES change, so cached cards are rendered again
+TEMPLATE_VERSION = 2
+
+# Cards kept by the memoized renderer: several pages of every status group
+CACHE_SIZE = 4096
+
+# Status badge classes; other statuses (Rescheduled) use DEFAULT_BADGE_CLASS
+BADGE_CLASSES = {
+    "Confirmed": "badge badge-confirmed",
+    "Cancelled": "badge badge-cancelled"
+}
+DEFAULT_BADGE_CLASS = "badge badge-rescheduled"
+
+# The fields a card shows, in the order of CARD_FIELDS; each is HTML-escaped
+CARD_TEMPLATE = """<div class="card">
+    <div class="card-title">{company_name} - {project_name}</div>
+    <div class="card-subtitle">{area}</div>
+    <div class="card-content">
+        <p><strong>Date:</strong> {date}</p>
+        <p><strong>Time:</strong> {time}</p>
+        <p><strong>Room:</strong> {room}</p>
+        <p><strong>Duration:</strong> {duration} minutes</p>
+        <p><strong>Representative:</strong> {developer_representative}</p>
+    </div>
+    <div class="card-footer">
+        <span class="{badge_class}">{status}</span>
+    </div>
+</div>"""
+
+CARD_FIELDS = ('company_name', 'project_name', 'area', 'presentation_date', 'time', 'room', 'duration',
+               'developer_representative', 'status')
+
+# Tuple of an appointment's CARD_FIELDS values: the card's cache key with TEMPLATE_VERSION
+_card_fields = attrgetter(*CARD_FIELDS)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _render_card(template_version, fields):
+    """Render a card from its CARD_FIELDS values (the version is only part of the cache key)."""
+    values = dict(zip(CARD_FIELDS, fields))
+    date_obj = parse_date(values['presentation_date'])
+    return CARD_TEMPLATE.format(
+        date=html.escape(format_date(date_obj) if date_obj else values['presentation_date']),
+        badge_class=BADGE_CLASSES.get(values['status'], DEFAULT_BADGE_CLASS),
+        **{field: html.escape(str(value)) for field, value in values.items()}
+    )
+
+def card_html(appointment):
+    """
+    Get the HTML of an appointment card, rendering it only if its content changed.
+
+    Args:
+        appointment: Appointment record (see snapshot.py)
+
+    Returns:
+        str: The card's HTML
+    """
+    return _render_card(TEMPLATE_VERSION, _card_fields(appointment))
+
+def cards_html(appointments):
+    """
+    Get the HTML of a list of appointment cards, as one block.
+
+    Args:
+        appointments: Appointment records
+
+    Returns:
+        str: The cards' HTML, in order
+    """
+    return "\n".join(card_html(appointment) for appointment in appointments)
@@ -0,0 +1,92 @@
+"""
+Typed presentation dates and times for the Al-Hayah Appointment Booking App
+
+Dates and times are stored as strings (YYYY-MM-DD and HH:MM). Appointment
+records parse them once, when a snapshot's records are built, into date objects
+and minutes after midnight. Parsing and display formatting are memoized per
+distinct value: a history holds a few hundred presentation dates however many
+appointments it has, so after the first rerun every card and option label is a
+cache lookup. The calendar view reads a precomputed table of the bookable dates
+of the horizon, grouped by week, with their button labels.
+"""
+
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+
+from intervals import format_minutes, to_minutes
+
+# Distinct values kept by each memoized parser and formatter: years of
+# presentation dates, or the slot options of a long horizon
+CACHE_SIZE = 4096
+
+# One bookable date of the calendar view: the date object, its YYYY-MM-DD key
+# and the label of its button
+CalendarDay = namedtuple("CalendarDay", ["date", "key", "label"])
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_date(value):
+    """
+    Parse a presentation date.
+
+    Args:
+        value: Date string (YYYY-MM-DD)
+
+    Returns:
+        date: The date, or None if the value isn't a valid date
+    """
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+
+@lru_cache(maxsize=CACHE_SIZE)
+def format_date(date_obj, include_day=True):
+    """
+    Format a date object for display, e.g. "Saturday, 17 October 2026".
+
+    Args:
+        date_obj: Date object to format
+        include_day: Whether to include the day name
+
+    Returns:
+        str: Formatted date string
+    """
+    if include_day:
+        return date_obj.strftime("%A, %d %B %Y")
+    return date_obj.strftime("%d %B %Y")
+
+@lru_cache(maxsize=CACHE_SIZE)
+def format_slot(slot, include_date=False):
+    """
+    Format a slot for display, e.g. "12:00–12:30 · Main Hall".
+
+    Args:
+        slot: Slot tuple
+        include_date: Whether to start with the date
+
+    Returns:
+        str: Formatted slot
+    """
+    start = to_minutes(slot.time)
+    times = slot.time if start is None else f"{slot.time}–{format_minutes(start + slot.duration)}"
+    text = f"{times} · {slot.room}"
+    if include_date:
+        text = f"{format_date(slot.date)} at {text}"
+    return text
+
+def calendar_table(dates):
+    """
+    Build the calendar table of bookable dates.
+
+    Args:
+        dates: Sorted date objects
+
+    Returns:
+        tuple: One tuple of CalendarDay per ISO week, in order
+    """
+    weeks = {}
+    for day in dates:
+        weeks.setdefault(day.isocalendar()[:2], []).append(
+            CalendarDay(day, day.isoformat(), day.strftime("%A\n%d %b")))
+    return tuple(tuple(days) for days in weeks.values())
@@ -0,0 +1,119 @@
+"""
+Appointment ID generator for the Al-Hayah Appointment Booking App
+
+IDs are 26-character, ULID-style strings in Crockford base32. They sort by
+creation time and are unique across threads and processes:
+
+    48 bits  milliseconds since the Unix epoch
+    16 bits  node component, random per process (re-drawn after fork)
+    64 bits  sequence counter, randomly seeded each millisecond and incremented
+             for every further ID in the same millisecond
+
+Older appointments use 14-digit timestamp IDs (YYYYMMDDHHMMSS). Both kinds
+are plain strings in the sheet, so lookups by ID work for either.
+"""
+
+import os
+import threading
+import time
+
+# Crockford base32 alphabet (no I, L, O, U), so IDs sort lexicographically by value
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+ID_LENGTH = 26
+
+_SEQUENCE_BITS = 64
+_SEQUENCE_MASK = (1 << _SEQUENCE_BITS) - 1
+
+def encode_base32(value, length=ID_LENGTH):
+    """
+    Encode a non-negative integer as a fixed-length Crockford base32 string.
+
+    Args:
+        value: Integer to encode
+        length: Number of characters in the result
+
+    Returns:
+        str: Encoded value, left-padded with zeros
+    """
+    chars = []
+    for _ in range(length):
+        chars.append(ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+def decode_timestamp(appointment_id):
+    """
+    Get the creation time encoded in an appointment ID.
+
+    Args:
+        appointment_id: A generated ID or a legacy YYYYMMDDHHMMSS ID
+
+    Returns:
+        float: Unix timestamp in seconds, or None if the ID is not recognized
+    """
+    if len(appointment_id) == 14 and appointment_id.isdigit():
+        return time.mktime(time.strptime(appointment_id, "%Y%m%d%H%M%S"))
+
+    if len(appointment_id) != ID_LENGTH:
+        return None
+
+    value = 0
+    for char in appointment_id.upper():
+        digit = ALPHABET.find(char)
+        if digit < 0:
+            return None
+        value = (value << 5) | digit
+    return (value >> (_SEQUENCE_BITS + 16)) / 1000.0
+
+class IdGenerator:
+    def __init__(self):
+        """Initialize the generator with a random node component."""
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        """Draw a new node component and forget the last timestamp (also used after fork)."""
+        self._node = int.from_bytes(os.urandom(2), "big")
+        self._last_ms = -1
+        self._sequence = 0
+
+    def new_id(self):
+        """
+        Generate a new appointment ID.
+
+        IDs from one generator are strictly increasing, even if the system clock
+        steps backwards.
+
+        Returns:
+            str: 26-character ID
+        """
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                # Random seed in the lower half leaves room for 2**63 IDs per millisecond
+                self._sequence = int.from_bytes(os.urandom(8), "big") >> 1
+            else:
+                # Same millisecond (or clock went back): keep the timestamp, bump the counter
+                self._sequence = (self._sequence + 1) & _SEQUENCE_MASK
+                if self._sequence == 0:
+                    self._last_ms += 1
+
+            value = (self._last_ms << (_SEQUENCE_BITS + 16)) | (self._node << _SEQUENCE_BITS) | self._sequence
+
+        return encode_base32(value)
+
+_default_generator = IdGenerator()
+
+# A forked child must not continue the parent's node and sequence
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_default_generator._reset)
+
+def generate_id():
+    """
+    Generate a new appointment ID with the process-wide generator.
+
+    Returns:
+        str: 26-character ID
+    """
+    return _default_generator.new_id()
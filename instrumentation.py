@@ -0,0 +1,290 @@
+"""
+Google Sheets API call instrumentation for the Al-Hayah Appointment Booking App
+
+Every call made through an InstrumentedWorksheet is recorded in an ApiMetrics
+instance: call counts, a latency histogram, payload sizes and errors, grouped by
+API method, by the app function that caused the call (e.g. display_calendar_view)
+and by Streamlit script run. The metrics can be exported as JSON or in the
+Prometheus text format.
+"""
+
+from collections import Counter, OrderedDict
+import os
+import sys
+import threading
+import time
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Files of the storage layer itself; the caller is the first frame outside them
+_INTERNAL_FILES = {
+    "archive.py",
+    "instrumentation.py",
+    "rate_limiting.py",
+    "storage_backends.py",
+    "sheets_integration.py",
+    "write_behind.py",
+    "threading.py",
+}
+
+# Number of script runs kept for the per-run report
+MAX_RUNS = 50
+
+def _payload_size(value):
+    """
+    Estimate the size in bytes of a request or response payload.
+
+    Cheaper than serializing: sums the length of every string and number.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(_payload_size(item) for item in value)
+    if isinstance(value, dict):
+        return sum(len(str(key)) + _payload_size(item) for key, item in value.items())
+    if isinstance(value, (int, float, bool)):
+        return len(str(value))
+    return 0
+
+def find_caller():
+    """
+    Get the name of the function outside the storage layer that caused an API call.
+
+    Returns:
+        str: Function name (e.g. 'display_calendar_view'), or 'background' for calls
+             made by background threads such as the write-behind flusher
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        if os.path.basename(frame.f_code.co_filename) not in _INTERNAL_FILES:
+            return frame.f_code.co_name
+        frame = frame.f_back
+    return "background"
+
+class _Histogram:
+    """Cumulative latency histogram in the Prometheus layout."""
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+
+    def to_dict(self):
+        buckets = {str(bound): count for bound, count in zip(LATENCY_BUCKETS, self.buckets)}
+        buckets["+Inf"] = self.count
+        return {'count': self.count, 'sum': round(self.sum, 6), 'buckets': buckets}
+
+class ApiMetrics:
+    def __init__(self):
+        """Initialize empty metrics."""
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._run_counter = 0
+
+        self.calls = Counter()            # (method, caller) -> calls
+        self.errors = Counter()           # (method, error code) -> errors
+        self.payload_bytes = Counter()    # method -> bytes sent and received
+        self.latency = {}                 # method -> _Histogram
+        self.runs = OrderedDict()         # run id -> per-run summary
+
+    def start_run(self, label=None):
+        """
+        Start grouping the calls made by this thread under a new script run.
+
+        Streamlit runs each session's script in its own thread, so calling this
+        at the top of the script groups the calls of every rerun.
+
+        Args:
+            label: Optional description of the run (e.g. the session ID)
+
+        Returns:
+            int: ID of the new run
+        """
+        with self._lock:
+            self._run_counter += 1
+            run_id = self._run_counter
+            self.runs[run_id] = {
+                'label': label,
+                'started_at': time.strftime("%Y-%m-%d %H:%M:%S"),
+                'calls': 0,
+                'errors': 0,
+                'seconds': 0.0,
+                'payload_bytes': 0,
+                'by_method': Counter(),
+                'by_caller': Counter()
+            }
+            while len(self.runs) > MAX_RUNS:
+                self.runs.popitem(last=False)
+
+        self._local.run_id = run_id
+        return run_id
+
+    def current_run(self):
+        """
+        Get the summary of the run this thread is in.
+
+        Returns:
+            dict: Run summary, or None if no run was started in this thread
+        """
+        run_id = getattr(self._local, "run_id", None)
+        with self._lock:
+            run = self.runs.get(run_id)
+            return _copy_run(run) if run is not None else None
+
+    def record(self, method, caller, seconds, payload_bytes, error_code=None):
+        """
+        Record one API call.
+
+        Args:
+            method: Name of the API method (e.g. 'get_all_values')
+            caller: Function that caused the call
+            seconds: Duration of the call
+            payload_bytes: Estimated size of the request and response payloads
+            error_code: HTTP status (or exception name) if the call failed
+        """
+        run_id = getattr(self._local, "run_id", None)
+        with self._lock:
+            self.calls[(method, caller)] += 1
+            self.payload_bytes[method] += payload_bytes
+            self.latency.setdefault(method, _Histogram()).observe(seconds)
+            if error_code is not None:
+                self.errors[(method, str(error_code))] += 1
+
+            run = self.runs.get(run_id)
+            if run is not None:
+                run['calls'] += 1
+                run['seconds'] += seconds
+                run['payload_bytes'] += payload_bytes
+                run['by_method'][method] += 1
+                run['by_caller'][caller] += 1
+                if error_code is not None:
+                    run['errors'] += 1
+
+    def to_json(self):
+        """
+        Export the metrics as a JSON-serializable dictionary.
+
+        Returns:
+            dict: Totals per method and caller, errors, latency histograms and recent runs
+        """
+        with self._lock:
+            return {
+                'calls': [
+                    {'method': method, 'caller': caller, 'count': count}
+                    for (method, caller), count in sorted(self.calls.items())
+                ],
+                'errors': [
+                    {'method': method, 'code': code, 'count': count}
+                    for (method, code), count in sorted(self.errors.items())
+                ],
+                'payload_bytes': dict(self.payload_bytes),
+                'latency_seconds': {method: histogram.to_dict() for method, histogram in self.latency.items()},
+                'runs': [dict(_copy_run(run), id=run_id) for run_id, run in self.runs.items()]
+            }
+
+    def to_prometheus(self):
+        """
+        Export the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Metrics text
+        """
+        lines = []
+        with self._lock:
+            lines.append("# HELP sheets_api_calls_total Google Sheets API calls.")
+            lines.append("# TYPE sheets_api_calls_total counter")
+            for (method, caller), count in sorted(self.calls.items()):
+                lines.append(f'sheets_api_calls_total{{method="{method}",caller="{caller}"}} {count}')
+
+            lines.append("# HELP sheets_api_errors_total Failed Google Sheets API calls.")
+            lines.append("# TYPE sheets_api_errors_total counter")
+            for (method, code), count in sorted(self.errors.items()):
+                lines.append(f'sheets_api_errors_total{{method="{method}",code="{code}"}} {count}')
+
+            lines.append("# HELP sheets_api_payload_bytes_total Estimated request and response payload size.")
+            lines.append("# TYPE sheets_api_payload_bytes_total counter")
+            for method, size in sorted(self.payload_bytes.items()):
+                lines.append(f'sheets_api_payload_bytes_total{{method="{method}"}} {size}')
+
+            lines.append("# HELP sheets_api_latency_seconds Google Sheets API call latency.")
+            lines.append("# TYPE sheets_api_latency_seconds histogram")
+            for method, histogram in sorted(self.latency.items()):
+                for bound, count in zip(LATENCY_BUCKETS, histogram.buckets):
+                    lines.append(f'sheets_api_latency_seconds_bucket{{method="{method}",le="{bound}"}} {count}')
+                lines.append(f'sheets_api_latency_seconds_bucket{{method="{method}",le="+Inf"}} {histogram.count}')
+                lines.append(f'sheets_api_latency_seconds_sum{{method="{method}"}} {histogram.sum:.6f}')
+                lines.append(f'sheets_api_latency_seconds_count{{method="{method}"}} {histogram.count}')
+
+        return "\n".join(lines) + "\n"
+
+def _copy_run(run):
+    """Copy a run summary with its counters turned into plain dictionaries."""
+    copy = dict(run)
+    copy['by_method'] = dict(run['by_method'])
+    copy['by_caller'] = dict(run['by_caller'])
+    copy['seconds'] = round(run['seconds'], 6)
+    return copy
+
+def _error_code(error):
+    """Get the HTTP status of a failed call, or the exception name."""
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) or type(error).__name__
+
+class _InstrumentedObject:
+    """Proxy recording every method call of the wrapped object in an ApiMetrics."""
+
+    def __init__(self, wrapped, metrics, prefix=""):
+        self._wrapped = wrapped
+        self._metrics = metrics
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        attribute = getattr(self._wrapped, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        method = self._prefix + name
+        metrics = self._metrics
+
+        def instrumented(*args, **kwargs):
+            caller = find_caller()
+            start = time.perf_counter()
+            try:
+                result = attribute(*args, **kwargs)
+            except Exception as e:
+                metrics.record(method, caller, time.perf_counter() - start,
+                               _payload_size(args) + _payload_size(kwargs), _error_code(e))
+                raise
+            metrics.record(method, caller, time.perf_counter() - start,
+                           _payload_size(args) + _payload_size(kwargs) + _payload_size(result))
+            return result
+
+        return instrumented
+
+class InstrumentedWorksheet(_InstrumentedObject):
+    """
+    Worksheet proxy recording every API call.
+
+    Its spreadsheet attribute is instrumented too (e.g. the Drive metadata
+    request of get_lastUpdateTime()).
+    """
+
+    def __init__(self, worksheet, metrics):
+        super().__init__(worksheet, metrics)
+
+    @property
+    def spreadsheet(self):
+        spreadsheet = getattr(self._wrapped, "spreadsheet", None)
+        if spreadsheet is None:
+            return None
+        return _InstrumentedObject(spreadsheet, self._metrics, prefix="spreadsheet.")
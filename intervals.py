@@ -0,0 +1,236 @@
+"""
+Interval index of booked presentations for the Al-Hayah Appointment Booking App
+
+Bookings are intervals of minutes after midnight, grouped in one timeline per
+(date, room). A timeline keeps its intervals sorted by start with the running
+maximum of their ends, so whether an interval overlaps any booking is answered
+with one binary search, the bookings it overlaps are found without scanning
+the ones it can't reach, and the next free gap of a given length is found by
+jumping from booking to booking. Timelines are built on first use.
+"""
+
+from bisect import bisect_left, bisect_right
+
+def to_minutes(time):
+    """
+    Convert an HH:MM time to minutes after midnight.
+
+    Args:
+        time: Time string (HH:MM)
+
+    Returns:
+        int: Minutes after midnight, or None if the time is invalid
+    """
+    hours, _, minutes = str(time).partition(":")
+    try:
+        hours, minutes = int(hours), int(minutes)
+    except ValueError:
+        return None
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        return None
+    return hours * 60 + minutes
+
+def format_minutes(minutes):
+    """Convert minutes after midnight to an HH:MM time."""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+class Timeline:
+    """Bookings of one date and room, sorted by start."""
+
+    __slots__ = ('starts', 'ends', 'ids', 'max_ends')
+
+    def __init__(self, intervals):
+        """
+        Initialize the timeline.
+
+        Args:
+            intervals: Iterable of (start, end, appointment ID), in minutes, end excluded
+        """
+        intervals = sorted(intervals)
+        self.starts = [start for start, _, _ in intervals]
+        self.ends = [end for _, end, _ in intervals]
+        self.ids = [appointment_id for _, _, appointment_id in intervals]
+
+        # max_ends[i] is the latest end among the first i + 1 bookings
+        self.max_ends = []
+        latest = None
+        for end in self.ends:
+            latest = end if latest is None or end > latest else latest
+            self.max_ends.append(latest)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def overlapping(self, start, end):
+        """
+        Get the bookings overlapping an interval.
+
+        Args:
+            start: Start of the interval in minutes
+            end: End of the interval in minutes (excluded)
+
+        Returns:
+            list: IDs of the overlapping bookings
+        """
+        found = []
+        # Bookings starting before the end, walked back until none can reach the start
+        i = bisect_left(self.starts, end) - 1
+        while i >= 0 and self.max_ends[i] > start:
+            if self.ends[i] > start:
+                found.append(self.ids[i])
+            i -= 1
+        return found
+
+    def is_free(self, start, end):
+        """Check that no booking overlaps an interval, with one binary search."""
+        i = bisect_left(self.starts, end) - 1
+        return i < 0 or self.max_ends[i] <= start
+
+    def next_free(self, after, duration):
+        """
+        Get the earliest start at or after a time of a free interval of a length.
+
+        Args:
+            after: Earliest start in minutes
+            duration: Length of the interval in minutes
+
+        Returns:
+            int: Start of the free interval in minutes
+        """
+        candidate = after
+        while True:
+            # Bookings started by the candidate that are still running
+            i = bisect_right(self.starts, candidate)
+            if i and self.max_ends[i - 1] > candidate:
+                candidate = self.max_ends[i - 1]
+                continue
+            # The next booking starts before the interval would end
+            if i < len(self.starts) and self.starts[i] < candidate + duration:
+                candidate = self.max_ends[i]
+                continue
+            return candidate
+
+    def without(self, ignore):
+        """Get a copy of the timeline without some bookings."""
+        return Timeline((start, end, appointment_id)
+                        for start, end, appointment_id in zip(self.starts, self.ends, self.ids)
+                        if appointment_id not in ignore)
+
+_EMPTY = Timeline(())
+
+class IntervalIndex:
+    def __init__(self, load):
+        """
+        Initialize the index.
+
+        Args:
+            load: Function taking a (date, room) key and returning its bookings as
+                  (start, end, appointment ID) tuples; called once per key
+        """
+        self._load = load
+        self._timelines = {}
+
+    @classmethod
+    def from_bookings(cls, bookings):
+        """
+        Build an index from a list of bookings.
+
+        Args:
+            bookings: Iterable of (date, time, room, duration, appointment ID); date
+                      as YYYY-MM-DD, time as HH:MM and duration in minutes
+
+        Returns:
+            IntervalIndex: The index
+        """
+        groups = {}
+        for date, time, room, duration, appointment_id in bookings:
+            start = to_minutes(time)
+            if start is not None:
+                groups.setdefault((date, room), []).append((start, start + duration, appointment_id))
+        return cls(lambda key: groups.get(key, ()))
+
+    def timeline(self, date, room, ignore=()):
+        """
+        Get the timeline of a date and room.
+
+        Args:
+            date: Date (YYYY-MM-DD)
+            room: Room
+            ignore: IDs of bookings to leave out (e.g. the appointment being rescheduled)
+
+        Returns:
+            Timeline: The bookings of that date and room
+        """
+        key = (date, room)
+        timeline = self._timelines.get(key)
+        if timeline is None:
+            intervals = self._load(key)
+            timeline = Timeline(intervals) if intervals else _EMPTY
+            self._timelines[key] = timeline
+        if ignore and any(appointment_id in ignore for appointment_id in timeline.ids):
+            timeline = timeline.without(ignore)
+        return timeline
+
+    def overlapping(self, date, room, start, duration):
+        """
+        Get the bookings overlapping an interval.
+
+        Args:
+            date: Date (YYYY-MM-DD)
+            room: Room
+            start: Start time (HH:MM)
+            duration: Length in minutes
+
+        Returns:
+            list: IDs of the overlapping bookings
+        """
+        minutes = to_minutes(start)
+        if minutes is None:
+            return []
+        return self.timeline(date, room).overlapping(minutes, minutes + duration)
+
+    def is_free(self, date, room, start, duration, ignore=()):
+        """
+        Check that no booking overlaps an interval.
+
+        Args:
+            date: Date (YYYY-MM-DD)
+            room: Room
+            start: Start in minutes after midnight
+            duration: Length in minutes
+            ignore: IDs of bookings to leave out
+
+        Returns:
+            bool: True if the interval is free
+        """
+        return self.timeline(date, room, ignore).is_free(start, start + duration)
+
+    def next_free(self, date, room, after, duration, starts=None, ignore=()):
+        """
+        Get the next free start of an interval of a length.
+
+        Args:
+            date: Date (YYYY-MM-DD)
+            room: Room
+            after: Earliest start in minutes after midnight
+            duration: Length in minutes
+            starts: Sorted list of the allowed starts in minutes (e.g. the times of
+                    a schedule), or None to allow any minute
+            ignore: IDs of bookings to leave out
+
+        Returns:
+            int: Start in minutes, or None if no allowed start is free
+        """
+        timeline = self.timeline(date, room, ignore)
+        candidate = after
+        while True:
+            candidate = timeline.next_free(candidate, duration)
+            if starts is None:
+                return candidate
+            i = bisect_left(starts, candidate)
+            if i == len(starts):
+                return None
+            if timeline.is_free(starts[i], starts[i] + duration):
+                return starts[i]
+            # Blocked by a later booking; the next gap search jumps past it
+            candidate = starts[i]
@@ -1,10 +1,40 @@
 """
-This module provides a function to get the Al-Hayah logo as a base64 encoded string.
+This module provides the Al-Hayah logo: loaded (or drawn) once per process, with
+resized PNG and WebP variants cached by the content hash of the source image.
+
+The variants can be published as files in Streamlit's static folder and shown
+with a <picture> element, so browsers pick the format and resolution they
+support and cache them across reruns instead of getting the image again inline.
 """
 
 import base64
+import hashlib
 import io
-from PIL import Image, ImageDraw, ImageFont
+import os
+import threading
+
+# Source image of the logo; drawn by create_logo() if the file is missing
+LOGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logo.png")
+
+# Folder served by Streamlit at app/static/ when server.enableStaticServing is set
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+# Subfolder of the static folder the logo variants are written to
+STATIC_SUBDIR = "logo"
+
+# Pixel densities a variant is published for (1x and 2x for high-DPI screens)
+SCALES = (1, 2)
+
+# Output formats, preferred first; browsers without WebP support get the PNG
+FORMATS = ("WEBP", "PNG")
+
+_EXTENSIONS = {"WEBP": "webp", "PNG": "png"}
+_MIME_TYPES = {"WEBP": "image/webp", "PNG": "image/png"}
+
+_source = None             # (content hash, PNG or source file bytes)
+_variants = {}             # (content hash, width, format) -> encoded bytes
+_published = {}            # (content hash, width, static dir) -> <picture> HTML
+_lock = threading.Lock()
 
 def create_logo():
     """
@@ -13,6 +43,8 @@ def create_logo():
     Returns:
         PIL.Image: Logo image object
     """
+    from PIL import Image, ImageDraw, ImageFont
+    
     # Create a new image with white background
     width, height = 500, 200
     background_color = (255, 255, 255)
@@ -70,11 +102,119 @@ def get_logo_as_base64():
     Returns:
         str: Base64 encoded logo image
     """
-    logo = create_logo()
-    
-    # Convert PIL Image to base64
-    buffered = io.BytesIO()
-    logo.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
+    # Encode the cached 500 px variant instead of drawing and saving the logo again
+    img_str = base64.b64encode(get_logo_variant(500)).decode()
     
     return f"data:image/png;base64,{img_str}"
+
+def get_logo_source():
+    """
+    Get the bytes of the logo image and their content hash, read once per process.
+
+    Returns:
+        tuple: (content hash, image bytes)
+    """
+    global _source
+    if _source is None:
+        with _lock:
+            if _source is None:
+                if os.path.exists(LOGO_PATH):
+                    with open(LOGO_PATH, "rb") as f:
+                        data = f.read()
+                else:
+                    buffered = io.BytesIO()
+                    create_logo().save(buffered, format="PNG")
+                    data = buffered.getvalue()
+                _source = (hashlib.sha256(data).hexdigest()[:16], data)
+    return _source
+
+def get_logo_variant(width, image_format="PNG"):
+    """
+    Get the logo resized to a width and encoded in a format, encoded once per process.
+
+    Args:
+        width: Width in pixels (the height keeps the aspect ratio)
+        image_format: "PNG" or "WEBP"
+
+    Returns:
+        bytes: Encoded image
+    """
+    content_hash, data = get_logo_source()
+    key = (content_hash, width, image_format)
+    variant = _variants.get(key)
+    if variant is None:
+        # PIL is only imported when a variant has to be encoded
+        from PIL import Image
+        
+        image = Image.open(io.BytesIO(data))
+        image.load()
+        if image.width > width:
+            # A cheap integer box reduction first keeps LANCZOS off the full-size source
+            factor = image.width // (width * 2)
+            if factor > 1:
+                image = image.reduce(factor)
+            height = round(image.height * width / image.width)
+            image = image.resize((width, height), resample=Image.LANCZOS)
+
+        buffered = io.BytesIO()
+        if image_format == "WEBP":
+            image.save(buffered, format="WEBP", quality=90)
+        else:
+            image.save(buffered, format="PNG", optimize=True)
+        variant = buffered.getvalue()
+
+        with _lock:
+            variant = _variants.setdefault(key, variant)
+    return variant
+
+def _variant_filename(content_hash, width, image_format):
+    """File name of a variant; the content hash changes it whenever the logo changes."""
+    return f"logo-{content_hash}-{width}w.{_EXTENSIONS[image_format]}"
+
+def publish_logo(width, static_dir=STATIC_DIR):
+    """
+    Write the logo variants for a display width to the static folder, once per
+    process, and build the HTML showing them.
+
+    Args:
+        width: Display width in CSS pixels
+        static_dir: Folder Streamlit serves at app/static/
+
+    Returns:
+        str: <picture> element with a WebP and a PNG source at every scale
+    """
+    content_hash, _ = get_logo_source()
+    key = (content_hash, width, static_dir)
+    html = _published.get(key)
+    if html is not None:
+        return html
+
+    folder = os.path.join(static_dir, STATIC_SUBDIR)
+    os.makedirs(folder, exist_ok=True)
+
+    sources = []
+    for image_format in FORMATS:
+        candidates = []
+        for scale in SCALES:
+            filename = _variant_filename(content_hash, width * scale, image_format)
+            path = os.path.join(folder, filename)
+            if not os.path.exists(path):
+                # Write to a temporary file first so a half-written file is never served
+                temp_path = f"{path}.{os.getpid()}.tmp"
+                with open(temp_path, "wb") as f:
+                    f.write(get_logo_variant(width * scale, image_format))
+                os.replace(temp_path, path)
+            candidates.append(f"app/static/{STATIC_SUBDIR}/{filename} {scale}x")
+        sources.append((image_format, ", ".join(candidates)))
+
+    fallback = f"app/static/{STATIC_SUBDIR}/{_variant_filename(content_hash, width, 'PNG')}"
+    html = (
+        "<picture>"
+        + "".join(f'<source type="{_MIME_TYPES[image_format]}" srcset="{srcset}">'
+                  for image_format, srcset in sources)
+        + f'<img src="{fallback}" width="{width}" alt="Al-Hayah Real Estate Development">'
+        + "</picture>"
+    )
+    with _lock:
+        _published[key] = html
+    return html
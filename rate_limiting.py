@@ -0,0 +1,228 @@
+"""
+Google Sheets API rate limiting for the Al-Hayah Appointment Booking App
+
+A RateLimitedWorksheet proxy sends every call through a token bucket sized to the
+Sheets per-minute quota and shared by every session of the process, retries
+calls rejected with 429 (and reads failing with 5xx) with jittered exponential
+backoff, and coalesces identical reads that are in flight at the same time into
+one request whose result every caller gets.
+"""
+
+import copy
+import random
+import threading
+import time
+
+# Sheets API quota per user (the service account) and project
+DEFAULT_REQUESTS_PER_MINUTE = 60
+
+# Worksheet and spreadsheet methods that only read, so they can be coalesced and retried on 5xx
+READ_METHODS = {
+    'get_all_values', 'get_all_records', 'get', 'batch_get', 'row_values',
+    'col_values', 'find', 'findall', 'get_lastUpdateTime', 'worksheets', 'values_get', 'values_batch_get'
+}
+
+class TokenBucket:
+    def __init__(self, requests_per_minute, burst=None):
+        """
+        Initialize a token bucket.
+
+        Args:
+            requests_per_minute: Sustained number of calls allowed per minute
+            burst: Maximum number of calls allowed at once (defaults to a quarter
+                   of the per-minute rate)
+        """
+        self.rate = requests_per_minute / 60.0
+        self.capacity = burst or max(1, requests_per_minute // 4)
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def acquire(self):
+        """
+        Take one token, waiting until one is available.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+_shared_buckets = {}
+_shared_buckets_lock = threading.Lock()
+
+def get_shared_bucket(requests_per_minute):
+    """
+    Get the process-wide token bucket for a quota, shared by every session.
+
+    Args:
+        requests_per_minute: Per-minute quota
+
+    Returns:
+        TokenBucket: The same bucket for every caller with the same quota
+    """
+    with _shared_buckets_lock:
+        if requests_per_minute not in _shared_buckets:
+            _shared_buckets[requests_per_minute] = TokenBucket(requests_per_minute)
+        return _shared_buckets[requests_per_minute]
+
+def _status_code(error):
+    """Get the HTTP status of a failed call (e.g. a gspread APIError), or None."""
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+def _retry_after(error):
+    """Get the Retry-After delay (seconds) sent with an error, or None."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+def _copy_result(result):
+    """Copy a read result; rows of values are copied without the cost of deepcopy."""
+    if isinstance(result, list) and all(isinstance(row, list) for row in result):
+        return [[list(cell) if isinstance(cell, list) else cell for cell in row] for row in result]
+    return copy.deepcopy(result)
+
+class _Flight:
+    """A read in progress, waited on by every caller making the same read."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class _FlightTable:
+    """
+    Identical reads in flight, shared by a worksheet proxy and its spreadsheet.
+
+    A write bumps the generation, so reads started after it never join a
+    flight started before it.
+    """
+
+    def __init__(self):
+        self.flights = {}
+        self.lock = threading.Lock()
+        self.generation = 0
+
+class RateLimitedWorksheet:
+    def __init__(self, worksheet, bucket, max_retries=5, base_delay=0.5, max_delay=32.0,
+                 prefix="", flight_table=None):
+        """
+        Initialize the rate-limited worksheet proxy.
+
+        Args:
+            worksheet: Worksheet (or spreadsheet) to wrap
+            bucket: TokenBucket every call takes a token from
+            max_retries: Retries of a call rejected with 429 or 5xx
+            base_delay: Backoff before the first retry in seconds, doubled on every retry
+            max_delay: Maximum backoff in seconds
+            prefix: Prefix of the method names in the coalescing keys
+            flight_table: Reads in flight, when shared with another proxy
+        """
+        self._wrapped = worksheet
+        self._bucket = bucket
+        self._max_retries = max_retries
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._prefix = prefix
+        self._table = flight_table or _FlightTable()
+        self._spreadsheet = None
+
+    @property
+    def spreadsheet(self):
+        if self._spreadsheet is None:
+            spreadsheet = getattr(self._wrapped, "spreadsheet", None)
+            if spreadsheet is None:
+                return None
+            self._spreadsheet = RateLimitedWorksheet(spreadsheet, self._bucket, self._max_retries,
+                                                     self._base_delay, self._max_delay,
+                                                     prefix="spreadsheet.", flight_table=self._table)
+        return self._spreadsheet
+
+    def __getattr__(self, name):
+        attribute = getattr(self._wrapped, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        if name in READ_METHODS:
+            return lambda *args, **kwargs: self._coalesced_read(name, attribute, args, kwargs)
+
+        def write(*args, **kwargs):
+            with self._table.lock:
+                self._table.generation += 1
+            return self._call(attribute, args, kwargs, retry_server_errors=False)
+
+        return write
+
+    def _coalesced_read(self, name, method, args, kwargs):
+        """Make a read, or wait for the identical read already in flight."""
+        try:
+            key = (self._prefix + name, repr(args), repr(sorted(kwargs.items())))
+        except Exception:
+            return self._call(method, args, kwargs, retry_server_errors=True)
+
+        table = self._table
+        with table.lock:
+            key += (table.generation,)
+            flight = table.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = table.flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            # Callers may modify what they get (e.g. the snapshot rows)
+            return _copy_result(flight.result)
+
+        try:
+            flight.result = self._call(method, args, kwargs, retry_server_errors=True)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with table.lock:
+                del table.flights[key]
+            flight.done.set()
+
+    def _call(self, method, args, kwargs, retry_server_errors):
+        """
+        Make a call within the quota, retrying it with jittered exponential backoff.
+
+        Calls rejected with 429 never reached the sheet and are always retried;
+        5xx errors are only retried for reads, since a failed write may have
+        been applied.
+        """
+        attempt = 0
+        while True:
+            self._bucket.acquire()
+            try:
+                return method(*args, **kwargs)
+            except Exception as e:
+                status = _status_code(e)
+                retryable = status == 429 or (retry_server_errors and status is not None and status >= 500)
+                if not retryable or attempt >= self._max_retries:
+                    raise
+
+                delay = _retry_after(e)
+                if delay is None:
+                    # Full jitter: a random delay up to the exponential backoff
+                    delay = random.uniform(0, min(self._max_delay, self._base_delay * (2 ** attempt)))
+                attempt += 1
+                time.sleep(delay)
@@ -0,0 +1,445 @@
+"""
+Presentation scheduling for the Al-Hayah Appointment Booking App
+
+A Schedule generates the bookable slots (date, time, room) from recurrence
+rules written in a subset of the iCalendar RRULE syntax, minus the dates of a
+holiday calendar. Dates are handled as day ordinals: every rule is a set of
+arithmetic progressions of days and the holidays a sorted list of merged day
+intervals, so the slots of any horizon are computed by stepping through the
+progressions within the open intervals, never by walking day by day. Whether
+a slot is free is answered by an IntervalIndex of the bookings (intervals.py),
+so presentations of any length block every slot they overlap.
+
+The default schedule is the original one: Saturdays and Tuesdays at 12:00 in
+one room. Set SCHEDULE_FILE to a JSON file to configure another, e.g.:
+
+    {
+        "rules": [
+            {"rrule": "FREQ=WEEKLY;BYDAY=SA,TU", "times": ["10:00", "12:00"],
+             "rooms": ["Main Hall", "Board Room"], "duration": 30}
+        ],
+        "holidays": [
+            "2026-10-06",
+            {"start": "2026-12-24", "end": "2026-12-26", "name": "Year-end break"}
+        ]
+    }
+"""
+
+from bisect import bisect_right
+from collections import namedtuple
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+import json
+from math import gcd
+
+from intervals import to_minutes
+from storage_backends import DEFAULT_DURATION, DEFAULT_ROOM
+
+# iCalendar weekday codes, in date.weekday() order
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+# Days of schedule generated at a time when looking for the next free slot
+_SEARCH_CHUNK_DAYS = 28
+
+# One bookable slot; date is a date object, time is HH:MM
+Slot = namedtuple("Slot", ["date", "time", "room", "duration"])
+
+def _parse_date(value):
+    """Parse a YYYY-MM-DD (or RRULE-style YYYYMMDD) date."""
+    if isinstance(value, date):
+        return value
+    value = value.strip()
+    fmt = "%Y%m%d" if len(value) == 8 and value.isdigit() else "%Y-%m-%d"
+    return datetime.strptime(value, fmt).date()
+
+@dataclass(frozen=True)
+class RecurrenceRule:
+    """
+    Days on which slots recur, in a subset of the iCalendar RRULE syntax.
+
+    Attributes:
+        freq: "DAILY" or "WEEKLY"
+        interval: Repeat every interval days or weeks
+        byday: Weekdays (0 = Monday) the rule is restricted to; empty for every
+               day (DAILY) or the weekday of dtstart (WEEKLY)
+        dtstart: First day the rule can occur on
+        until: Last day the rule can occur on (inclusive), or None
+    """
+    freq: str = "WEEKLY"
+    interval: int = 1
+    byday: tuple = ()
+    dtstart: date = date(2000, 1, 1)
+    until: date = None
+
+    @classmethod
+    def parse(cls, text, dtstart=None):
+        """
+        Parse an RRULE string such as "FREQ=WEEKLY;INTERVAL=2;BYDAY=SA,TU;UNTIL=20271231".
+
+        Args:
+            text: The rule, with or without the "RRULE:" prefix
+            dtstart: First day the rule can occur on (DTSTART), defaults to 2000-01-01
+
+        Returns:
+            RecurrenceRule: The parsed rule
+
+        Raises:
+            ValueError: If the rule uses a part or value this subset doesn't support
+        """
+        text = text.strip()
+        if text.upper().startswith("RRULE:"):
+            text = text[6:]
+
+        parts = {}
+        for part in filter(None, text.split(";")):
+            name, _, value = part.partition("=")
+            parts[name.strip().upper()] = value.strip().upper()
+
+        unsupported = set(parts) - {"FREQ", "INTERVAL", "BYDAY", "UNTIL"}
+        if unsupported:
+            raise ValueError(f"Unsupported RRULE parts: {', '.join(sorted(unsupported))}")
+
+        freq = parts.get("FREQ", "WEEKLY")
+        if freq not in ("DAILY", "WEEKLY"):
+            raise ValueError(f"Unsupported RRULE frequency: {freq}")
+
+        interval = int(parts.get("INTERVAL", 1))
+        if interval < 1:
+            raise ValueError("RRULE INTERVAL must be at least 1")
+
+        byday = ()
+        if parts.get("BYDAY"):
+            try:
+                byday = tuple(sorted({WEEKDAYS.index(day) for day in parts["BYDAY"].split(",")}))
+            except ValueError:
+                raise ValueError(f"Unsupported RRULE BYDAY: {parts['BYDAY']}") from None
+
+        until = _parse_date(parts["UNTIL"][:8]) if parts.get("UNTIL") else None
+        return cls(freq, interval, byday, _parse_date(dtstart) if dtstart else date(2000, 1, 1), until)
+
+    def progressions(self):
+        """
+        Describe the rule as arithmetic progressions of day ordinals.
+
+        Returns:
+            tuple: (first ordinal of each progression, common step in days)
+        """
+        start = self.dtstart.toordinal()
+        if self.freq == "WEEKLY":
+            step = 7 * self.interval
+            weekdays = self.byday or (self.dtstart.weekday(),)
+            # Weeks start on Monday; days of the first week before dtstart are skipped
+            monday = start - self.dtstart.weekday()
+            firsts = [monday + weekday if monday + weekday >= start else monday + weekday + step
+                      for weekday in weekdays]
+        else:
+            # Every interval days; with BYDAY the weekday pattern repeats every lcm(interval, 7) days
+            step = self.interval * 7 // gcd(self.interval, 7) if self.byday else self.interval
+            firsts = [start + offset for offset in range(0, step, self.interval)
+                      if not self.byday or date.fromordinal(start + offset).weekday() in self.byday]
+        return tuple(sorted(firsts)), step
+
+class HolidayCalendar:
+    """Days without presentations, stored as sorted, merged day-ordinal intervals."""
+
+    def __init__(self, periods=()):
+        """
+        Initialize the calendar.
+
+        Args:
+            periods: Iterable of dates, or (first, last) date pairs (inclusive);
+                     dates may be date objects or YYYY-MM-DD strings
+        """
+        intervals = []
+        for period in periods:
+            if isinstance(period, (tuple, list)):
+                first, last = _parse_date(period[0]), _parse_date(period[1])
+            else:
+                first = last = _parse_date(period)
+            intervals.append((first.toordinal(), last.toordinal() + 1))
+
+        # Merge overlapping and adjacent intervals (half-open [start, end))
+        merged = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self._starts = [start for start, _ in merged]
+        self._ends = [end for _, end in merged]
+
+    def __len__(self):
+        return len(self._starts)
+
+    def is_holiday(self, day):
+        """Check if a date falls on a holiday."""
+        ordinal = _parse_date(day).toordinal()
+        i = bisect_right(self._starts, ordinal) - 1
+        return i >= 0 and ordinal < self._ends[i]
+
+    def open_intervals(self, start, end):
+        """
+        Get the parts of a range of day ordinals that aren't holidays.
+
+        Args:
+            start: First ordinal
+            end: Last ordinal, excluded
+
+        Returns:
+            list: Half-open (start, end) ordinal intervals
+        """
+        intervals = []
+        # First holiday that ends after start
+        i = bisect_right(self._ends, start)
+        cursor = start
+        while cursor < end and i < len(self._starts) and self._starts[i] < end:
+            if self._starts[i] > cursor:
+                intervals.append((cursor, self._starts[i]))
+            cursor = max(cursor, self._ends[i])
+            i += 1
+        if cursor < end:
+            intervals.append((cursor, end))
+        return intervals
+
+@dataclass(frozen=True)
+class SlotRule:
+    """
+    Slots recurring on the days of a rule.
+
+    Attributes:
+        recurrence: Days the slots occur on
+        times: Start times (HH:MM) of the slots of a day
+        rooms: Rooms every time is offered in
+        duration: Length of a presentation in minutes
+    """
+    recurrence: RecurrenceRule
+    times: tuple = ("12:00",)
+    rooms: tuple = (DEFAULT_ROOM,)
+    duration: int = DEFAULT_DURATION
+
+class Schedule:
+    def __init__(self, rules, holidays=None):
+        """
+        Initialize the schedule.
+
+        Args:
+            rules: List of SlotRule
+            holidays: HolidayCalendar of days without slots
+        """
+        self.rules = list(rules)
+        self.holidays = holidays or HolidayCalendar()
+
+    @property
+    def rooms(self):
+        """Every room the schedule offers, in rule order."""
+        return list(dict.fromkeys(room for rule in self.rules for room in rule.rooms))
+
+    def _rule_days(self, rule, start, end):
+        """Get the ordinals in [start, end) a rule occurs on, outside holidays, in no particular order."""
+        recurrence = rule.recurrence
+        if recurrence.until is not None:
+            end = min(end, recurrence.until.toordinal() + 1)
+
+        firsts, step = recurrence.progressions()
+        days = []
+        for low, high in self.holidays.open_intervals(start, end):
+            for first in firsts:
+                # First term of the progression at or after low
+                day = first if first >= low else first + -(-(low - first) // step) * step
+                days.extend(range(day, high, step))
+        return days
+
+    def dates(self, start, end):
+        """
+        Get the days with at least one slot.
+
+        Args:
+            start: First date
+            end: Last date, excluded
+
+        Returns:
+            list: Sorted date objects
+        """
+        ordinals = set()
+        for rule in self.rules:
+            ordinals.update(self._rule_days(rule, start.toordinal(), end.toordinal()))
+        return [date.fromordinal(ordinal) for ordinal in sorted(ordinals)]
+
+    def slots(self, start, end):
+        """
+        Get every slot between two dates.
+
+        Args:
+            start: First date
+            end: Last date, excluded
+
+        Returns:
+            list: Slot tuples sorted by date, time and room
+        """
+        return self.free_slots(start, end)
+
+    def free_slots(self, start, end, bookings=None, duration=None, ignore=()):
+        """
+        Get the slots between two dates that no booking overlaps.
+
+        Args:
+            start: First date
+            end: Last date, excluded
+            bookings: IntervalIndex of the active appointments, or None for every slot
+            duration: Length of the presentation in minutes, or None for each rule's
+            ignore: IDs of bookings that don't block slots
+
+        Returns:
+            list: Free Slot tuples sorted by date, time and room
+        """
+        slots = []
+        for rule in self.rules:
+            length = duration or rule.duration
+            starts = [(to_minutes(time), time) for time in rule.times]
+            for ordinal in self._rule_days(rule, start.toordinal(), end.toordinal()):
+                day = date.fromordinal(ordinal)
+                if bookings is None:
+                    slots.extend(Slot(day, time, room, length) for time in rule.times for room in rule.rooms)
+                    continue
+                key = day.isoformat()
+                for room in rule.rooms:
+                    timeline = bookings.timeline(key, room, ignore)
+                    slots.extend(Slot(day, time, room, length) for minutes, time in starts
+                                 if timeline.is_free(minutes, minutes + length))
+        slots.sort()
+        return slots
+
+    def next_free_slot(self, bookings, after, after_time="00:00", duration=None, ignore=(), weeks=52):
+        """
+        Get the first slot at or after a date and time that no booking overlaps.
+
+        Days are generated a few weeks at a time; within a day, each room's
+        timeline jumps from booking to booking to the first free gap long enough,
+        instead of trying every slot time.
+
+        Args:
+            bookings: IntervalIndex of the active appointments
+            after: Earliest date
+            after_time: Earliest start time on that date (HH:MM)
+            duration: Length of the presentation in minutes, or None for each rule's
+            ignore: IDs of bookings that don't block slots
+            weeks: How many weeks to look ahead
+
+        Returns:
+            Slot: The earliest free slot (by time, then room), or None if there is
+                  none within the horizon
+
+        Raises:
+            ValueError: If after_time isn't a valid HH:MM time
+        """
+        earliest = to_minutes(after_time)
+        if earliest is None:
+            raise ValueError(f"Invalid start time: {after_time}")
+        first = after.toordinal()
+        limit = first + 7 * weeks
+        for chunk in range(first, limit, _SEARCH_CHUNK_DAYS):
+            rules_by_day = {}
+            for rule in self.rules:
+                for ordinal in self._rule_days(rule, chunk, min(chunk + _SEARCH_CHUNK_DAYS, limit)):
+                    rules_by_day.setdefault(ordinal, []).append(rule)
+
+            for ordinal in sorted(rules_by_day):
+                key = date.fromordinal(ordinal).isoformat()
+                best = None
+                for rule in rules_by_day[ordinal]:
+                    length = duration or rule.duration
+                    times = dict(sorted((to_minutes(time), time) for time in rule.times))
+                    starts = list(times)
+                    for room in rule.rooms:
+                        minutes = bookings.next_free(key, room, earliest if ordinal == first else 0, length,
+                                                     starts, ignore)
+                        if minutes is not None and (best is None or (minutes, room) < best[:2]):
+                            best = (minutes, room, times[minutes], length)
+                if best is not None:
+                    _, room, time, length = best
+                    return Slot(date.fromordinal(ordinal), time, room, length)
+        return None
+
+    def describe(self):
+        """
+        Describe the schedule for people, e.g. "Saturdays and Tuesdays at 12:00 (30 minutes)".
+
+        Returns:
+            str: One sentence per rule, joined with "; "
+        """
+        names = ("Mondays", "Tuesdays", "Wednesdays", "Thursdays", "Fridays", "Saturdays", "Sundays")
+        sentences = []
+        for rule in self.rules:
+            recurrence = rule.recurrence
+            if recurrence.byday:
+                # Weekend days first, like the office week (Saturday to Friday)
+                ordered = sorted(recurrence.byday, key=lambda weekday: (weekday - 5) % 7)
+                days = [names[weekday] for weekday in ordered]
+                days = days[0] if len(days) == 1 else ", ".join(days[:-1]) + " and " + days[-1]
+            elif recurrence.freq == "WEEKLY":
+                days = names[recurrence.dtstart.weekday()]
+            else:
+                days = "Every day"
+            if recurrence.interval > 1:
+                unit = "weeks" if recurrence.freq == "WEEKLY" else "days"
+                days += f" (every {recurrence.interval} {unit})"
+            times = ", ".join(rule.times)
+            sentences.append(f"{days} at {times} ({rule.duration} minutes)")
+        return "; ".join(sentences)
+
+def bookable_window(weeks, today=None):
+    """
+    Get the (start, end) dates of the next weeks, today included.
+
+    Args:
+        weeks: Number of weeks
+        today: First date, defaults to today
+
+    Returns:
+        tuple: (start, end) with end excluded
+    """
+    today = today or date.today()
+    return today, today + timedelta(weeks=weeks)
+
+def default_schedule():
+    """The original schedule: Saturdays and Tuesdays at 12:00 in one room."""
+    return Schedule([SlotRule(RecurrenceRule.parse("FREQ=WEEKLY;BYDAY=SA,TU"))])
+
+def load_schedule(path):
+    """
+    Load a schedule from a JSON file (see the module docstring for the format).
+
+    Args:
+        path: Path of the JSON file
+
+    Returns:
+        Schedule: The schedule
+
+    Raises:
+        ValueError: If the file describes an invalid schedule
+    """
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+
+    rules = []
+    for rule in config.get("rules", []):
+        invalid = [time for time in rule.get("times", ()) if to_minutes(time) is None]
+        if invalid:
+            raise ValueError(f"Invalid slot times in {path}: {', '.join(map(str, invalid))}")
+        rules.append(SlotRule(
+            recurrence=RecurrenceRule.parse(rule["rrule"], rule.get("dtstart")),
+            times=tuple(rule.get("times", ("12:00",))),
+            rooms=tuple(rule.get("rooms", (DEFAULT_ROOM,))),
+            duration=int(rule.get("duration", DEFAULT_DURATION))
+        ))
+    if not rules:
+        raise ValueError(f"No scheduling rules in {path}")
+
+    periods = []
+    for holiday in config.get("holidays", []):
+        if isinstance(holiday, dict):
+            periods.append((holiday["start"], holiday.get("end", holiday["start"])))
+        else:
+            periods.append(holiday)
+
+    return Schedule(rules, HolidayCalendar(periods))
@@ -1,127 +1,641 @@
 """
 Google Sheets Integration for Al-Hayah Real Estate Development Company Appointment Booking App
 
-This module handles all interactions with Google Sheets, which serves as the database
-for the appointment booking application.
+This module handles all interactions with the appointment storage. Google Sheets serves
+as the database by default; the storage itself is a pluggable backend (see
+storage_backends.py), so the app can also run on in-memory dummy data or SQLite.
 """
 
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-import pandas as pd
-from datetime import datetime
-import json
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from enum import Enum
 import os
+import threading
+import time
+
+from archive import SheetsArchive
+from id_generator import generate_id
+from instrumentation import ApiMetrics
+from intervals import IntervalIndex, to_minutes
+from rate_limiting import DEFAULT_REQUESTS_PER_MINUTE, get_shared_bucket
+from snapshot import Appointment, Snapshot, rows_to_frame
+from storage_backends import (
+    ACTIVE_STATUSES,
+    DEFAULT_DURATION,
+    DEFAULT_ROOM,
+    FIELD_COLUMNS,
+    HEADERS,
+    UPDATED_AT_COLUMN,
+    InMemoryBackend,
+    SheetsBackend,
+    _cell,
+    _parse_duration,
+)
+from write_behind import WriteBehindQueue
+
+# Default location of the write-behind journal
+DEFAULT_JOURNAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pending_writes.jsonl")
+
+# Serializes slot reservations across every SheetsIntegration in this process
+_RESERVATION_LOCK = threading.Lock()
+
+class ReservationStatus(Enum):
+    """Outcome of a slot reservation."""
+    RESERVED = "reserved"
+    CONFLICT = "conflict"
+    ERROR = "error"
+
+@dataclass(frozen=True)
+class ReservationResult:
+    """
+    Result of SheetsIntegration.reserve_slot() (and of reschedule_appointment()).
+    
+    Attributes:
+        status: Outcome of the reservation
+        appointment_id: ID of the new appointment if the slot was reserved
+        conflicting_ids: IDs of the active appointments holding the slot on conflict
+    """
+    status: ReservationStatus
+    appointment_id: str = None
+    conflicting_ids: tuple = ()
+    
+    @property
+    def reserved(self):
+        """True if the slot was reserved."""
+        return self.status is ReservationStatus.RESERVED
+
+def _row_fingerprint(row):
+    """Get the (Presentation Date, Time, Status, Updated At, Room, Duration) of a row, as compared by delta sync."""
+    return (_cell(row, FIELD_COLUMNS['presentation_date']), _cell(row, FIELD_COLUMNS['time']),
+            _cell(row, FIELD_COLUMNS['status']), _cell(row, UPDATED_AT_COLUMN), _cell(row, FIELD_COLUMNS['room']),
+            _cell(row, FIELD_COLUMNS['duration']))
+
+def _is_archivable(row, cutoff):
+    """Check if a row's presentation, or its cancellation, is before a cutoff date (YYYY-MM-DD)."""
+    date = _cell(row, FIELD_COLUMNS['presentation_date'])
+    if date and date < cutoff:
+        return True
+    updated_at = _cell(row, UPDATED_AT_COLUMN)
+    return _cell(row, FIELD_COLUMNS['status']) == "Cancelled" and bool(updated_at) and updated_at[:10] < cutoff
 
 class SheetsIntegration:
-    def __init__(self, credentials_path="C:\\Users\\DELL\\Documents\\Python\\Project\\al-hayah-booking-app\\credentials.json"):
+    def __init__(self, credentials_path="C:\\Users\\DELL\\Documents\\Python\\Project\\al-hayah-booking-app\\credentials.json",
+                 cache_ttl=30, write_behind=False, journal_path=DEFAULT_JOURNAL_PATH, worksheet=None,
+                 backend=None, sync_mode="full", full_sync_interval=300,
+                 requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, background_refresh=False,
+                 spreadsheet_key=None, archive=None):
         """
         Initialize the Google Sheets integration.
         
         Args:
             credentials_path: Path to the Google Sheets API credentials JSON file.
                              If None, will look for credentials in environment or create dummy data.
-        """
-        self.scope = ['https://spreadsheets.google.com/feeds',
-                     'https://www.googleapis.com/auth/drive']
+            cache_ttl: Number of seconds a snapshot of the sheet is reused before it is
+                       read again. Set to 0 to read the sheet on every call. Local
+                       backends are queried directly and don't use the snapshot.
+            write_behind: If True, writes are journaled locally and acknowledged right
+                          away, and a background thread flushes them to the sheet.
+            journal_path: Path of the write-behind journal file
+            worksheet: An already opened worksheet (or an object with the same
+                       interface) to use instead of connecting with the credentials
+            backend: A StorageBackend to use instead of Google Sheets (e.g. SQLiteBackend)
+            sync_mode: "full" re-reads the whole sheet when the snapshot expires; "delta"
+                       only reads appended rows and rows whose Updated At changed
+            full_sync_interval: In delta mode, seconds between full reloads, which catch
+                                edits made directly in the sheet without touching Updated At
+            requests_per_minute: Google Sheets API calls allowed per minute, shared by every
+                                 instance in the process with the same quota. Calls beyond
+                                 it wait, and calls rejected with 429 are retried. None
+                                 disables rate limiting.
+            background_refresh: If True, a background thread refreshes the snapshot every
+                                cache_ttl seconds and readers never wait for the sheet
+                                (see start_background_refresh())
+            spreadsheet_key: ID of the spreadsheet to open (from its URL); faster to open
+                             than the default spreadsheet title
+            archive: ArchiveStore (see archive.py) that archive_appointments() moves old
+                     appointments to and get_appointment_by_id() falls back to. Defaults
+                     to archive worksheets in the spreadsheet on Google Sheets, and to
+                     none on other storage.
         
+        Without a backend or worksheet, Google Sheets is only connected to on first
+        use (see the backend property), so constructing the integration is cheap.
+        """
         self.credentials_path = credentials_path
-        self.client = None
-        self.sheet = None
-        self.worksheet = None
+        self.spreadsheet_key = spreadsheet_key
+        self._backend = backend
+        self._archive = archive
+        self._connect_lock = threading.Lock()
+        self._write_behind = write_behind
+        
+        # Google Sheets API call metrics (see instrumentation.py); a backend passed
+        # in keeps its own metrics if it has any
+        self.metrics = getattr(backend, "metrics", None) or ApiMetrics()
+        self.rate_limiter = get_shared_bucket(requests_per_minute) if requests_per_minute else None
+        if self._backend is None and worksheet is not None:
+            self._backend = SheetsBackend(worksheet, self.metrics, self.rate_limiter)
+        
+        # Immutable snapshot of the sheet values (see snapshot.py), shared by all
+        # readers of this instance and refreshed once per TTL window. Readers take
+        # the current snapshot without locking; refreshes and our own writes
+        # publish a new one under the lock and bump the version
+        self.cache_ttl = cache_ttl
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.snapshot_version = 0
+        self._cache_lock = threading.RLock()
+        self._snapshot = None
+        self._snapshot_loaded_at = 0.0
         
-        # For development without actual credentials
-        self.use_dummy_data = credentials_path is None
-        self.dummy_data = []
+        # Background refresher thread, if started
+        self._refresher = None
+        self._refresher_stop = threading.Event()
         
-        # Initialize the connection
-        self.initialize_connection()
+        # Incremental sync state
+        self.sync_mode = sync_mode
+        self.full_sync_interval = full_sync_interval
+        self.full_syncs = 0
+        self.delta_syncs = 0
+        self._last_full_sync = 0.0
+        self._modified_time = None
+        
+        # Optional write-behind queue; journaled writes from a previous run are
+        # flushed right away, connecting from the flusher thread if needed
+        self._write_queue = None
+        if write_behind:
+            self._write_queue = WriteBehindQueue(journal_path, self._flush_writes)
+        
+        if background_refresh:
+            self.start_background_refresh()
+    
+    @property
+    def backend(self):
+        """The storage backend, connecting to Google Sheets on first access."""
+        backend = self._backend
+        if backend is None:
+            with self._connect_lock:
+                if self._backend is None:
+                    self.initialize_connection()
+                backend = self._backend
+        return backend
+    
+    @property
+    def archive(self):
+        """The ArchiveStore of archived appointments, or None if there is none."""
+        if self._archive is None:
+            backend = self.backend
+            spreadsheet = backend.worksheet.spreadsheet if isinstance(backend, SheetsBackend) else None
+            if spreadsheet is not None:
+                self._archive = SheetsArchive(spreadsheet)
+        return self._archive
+    
+    @archive.setter
+    def archive(self, archive):
+        self._archive = archive
+    
+    @property
+    def connected(self):
+        """True once the storage backend has been set up."""
+        return self._backend is not None
+    
+    @property
+    def _use_snapshot(self):
+        # Remote storage is read through the snapshot cache; so is any storage in
+        # write-behind mode, because the snapshot is where pending writes are merged
+        return self.backend.is_remote or self._write_behind
+    
+    @property
+    def use_dummy_data(self):
+        """True if appointments are only kept in memory (development mode)."""
+        return isinstance(self.backend, InMemoryBackend)
         
     def initialize_connection(self):
         """Initialize connection to Google Sheets or set up dummy data."""
-        if not self.use_dummy_data and os.path.exists(self.credentials_path):
+        if self.credentials_path is not None and os.path.exists(self.credentials_path):
             try:
                 # Connect to Google Sheets
-                credentials = ServiceAccountCredentials.from_json_keyfile_name(
-                    self.credentials_path, self.scope)
-                self.client = gspread.authorize(credentials)
-                
-                # Open the spreadsheet - you'll need to replace with your actual spreadsheet name
-                self.sheet = self.client.open("Al-Hayah Appointment Bookings")
-                
-                # Select the first worksheet
-                self.worksheet = self.sheet.get_worksheet(0)
-                
-                # If worksheet doesn't exist or is empty, initialize it with headers
-                if not self.worksheet or len(self.worksheet.get_all_values()) == 0:
-                    self.initialize_worksheet()
-                    
+                self._backend = SheetsBackend.from_credentials(self.credentials_path, metrics=self.metrics,
+                                                               rate_limiter=self.rate_limiter,
+                                                               spreadsheet_key=self.spreadsheet_key)
                 print("Successfully connected to Google Sheets")
                 return True
             except Exception as e:
                 print(f"Error connecting to Google Sheets: {e}")
-                self.use_dummy_data = True
         else:
             print("Using dummy data for development")
-            self.use_dummy_data = True
-            
-            # Initialize dummy data with headers
-            self.dummy_data = [
-                ["ID", "Company Name", "Project Name", "Area", "Presentation Date", 
-                 "Time", "Developer Representative", "Status", "Created At", "Updated At"]
-            ]
         
+        # Fall back to in-memory dummy data (initialized with headers)
+        self._backend = InMemoryBackend()
         return False
     
-    def initialize_worksheet(self):
-        """Initialize the worksheet with headers if it doesn't exist."""
-        headers = ["ID", "Company Name", "Project Name", "Area", "Presentation Date", 
-                  "Time", "Developer Representative", "Status", "Created At", "Updated At"]
+    def _fetch_all_values(self):
+        """
+        Read every row (header included) from the underlying storage.
         
-        if not self.use_dummy_data:
-            # Create a new worksheet if it doesn't exist
-            if not self.worksheet:
-                self.worksheet = self.sheet.add_worksheet(title="Appointments", rows=1000, cols=10)
-            
-            # Add headers
-            self.worksheet.update('A1:J1', [headers])
+        Returns:
+            list: List of rows, each row being a list of cell values
+        """
+        return self.backend.get_all()
+    
+    def _get_snapshot(self):
+        """
+        Get the current snapshot of the sheet, reloading it once the TTL has expired.
+        
+        While the background refresher runs, the current snapshot is returned
+        without locking and only a missing snapshot is loaded here.
+        
+        Returns:
+            Snapshot: The current snapshot (header row included)
+        """
+        # Fast path without the lock (hit counts may miss concurrent increments)
+        snapshot = self._snapshot
+        if snapshot is not None and (self.background_refresh_running or
+                                     time.monotonic() - self._snapshot_loaded_at < self.cache_ttl):
+            self.cache_hits += 1
+            return snapshot
+        
+        with self._cache_lock:
+            # Another reader may have reloaded it while we waited for the lock
+            age = time.monotonic() - self._snapshot_loaded_at
+            if self._snapshot is not None and (self.background_refresh_running or age < self.cache_ttl):
+                self.cache_hits += 1
+                return self._snapshot
             
-            # Format headers (make bold, freeze row)
-            self.worksheet.format('A1:J1', {'textFormat': {'bold': True}})
-            self.worksheet.freeze(rows=1)
+            self.cache_misses += 1
+            self._refresh_snapshot()
+            return self._snapshot
+    
+    def _refresh_snapshot(self):
+        """Bring the snapshot up to date with the storage (called with the lock held)."""
+        if self._can_sync_delta():
+            self._sync_delta()
+        else:
+            self._sync_full()
+        self._snapshot_loaded_at = time.monotonic()
+    
+    def _publish(self, snapshot):
+        """
+        Replace the current snapshot (called with the lock held).
         
-    def get_all_appointments(self):
+        Args:
+            snapshot: The new Snapshot, or None to drop the current one
         """
-        Get all appointments from the Google Sheet.
+        self._snapshot = snapshot
+        self.snapshot_version += 1
+    
+    def _sync_full(self):
+        """Replace the snapshot with a full read of the storage."""
+        if self.sync_mode == "delta" and self.backend.supports_delta:
+            # Read the modification time first, so changes made during the read show up next time
+            self._modified_time = self.backend.get_modified_time()
+        
+        snapshot = Snapshot.build(self._merge_pending_writes(self._fetch_all_values()))
+        if self._snapshot is None or snapshot.rows != self._snapshot.rows:
+            self._publish(snapshot)
+        self._last_full_sync = time.monotonic()
+        self.full_syncs += 1
+    
+    def _can_sync_delta(self):
+        """Check if the expired snapshot can be brought up to date incrementally."""
+        return (
+            self.sync_mode == "delta"
+            and self.backend.supports_delta
+            and self._snapshot is not None
+            # Pending write-behind rows sit at provisional row numbers; reload fully
+            and (self._write_queue is None or self._write_queue.pending_count() == 0)
+            and time.monotonic() - self._last_full_sync < self.full_sync_interval
+        )
+    
+    def _sync_delta(self):
+        """
+        Bring the snapshot up to date with ranged reads instead of a full reload.
+        
+        Costs one Drive metadata request when nothing changed. Otherwise one request
+        reads the date, time, status and Updated At columns plus any appended rows,
+        and one more fetches the rows whose values there differ from the snapshot.
+        """
+        modified_time = self.backend.get_modified_time()
+        if modified_time is not None and modified_time == self._modified_time:
+            self.delta_syncs += 1
+            return
+        
+        snapshot = self._snapshot
+        fingerprints, appended = self.backend.get_delta(len(snapshot))
+        if len(fingerprints) + 1 < len(snapshot):
+            # Rows were deleted, so row numbers shifted
+            self._sync_full()
+            return
+        
+        # Rows whose Updated At (a per-row high-water mark) or slot columns changed
+        changed = [
+            i + 2
+            for i, fingerprint in enumerate(fingerprints[:len(snapshot) - 1])
+            if fingerprint != _row_fingerprint(snapshot.rows[i + 1])
+        ]
+        
+        replaced = {}
+        for row_num, row in zip(changed, self.backend.get_rows(changed)):
+            if row[0] != snapshot.rows[row_num - 1][0]:
+                # A row was replaced by a different appointment; row numbers can't be trusted
+                self._sync_full()
+                return
+            replaced[row_num] = row
+        
+        if replaced or appended:
+            self._publish(snapshot.with_rows(replaced, appended))
+        
+        self._modified_time = modified_time
+        self.delta_syncs += 1
+    
+    def start_background_refresh(self, interval=None):
+        """
+        Start a background thread that keeps the shared snapshot current.
+        
+        Every session then reads the snapshot the thread last published instead of
+        reloading it on its own, so the sheet is read once per interval no matter
+        how many sessions are open. Sessions can watch snapshot_version to notice
+        a new snapshot. Local storage without write-behind isn't snapshotted, so
+        there is nothing to refresh. If Google Sheets isn't connected yet, the
+        thread connects before its first refresh, so this never blocks.
         
+        Args:
+            interval: Seconds between refreshes (defaults to the cache TTL)
+            
         Returns:
-            pandas.DataFrame: DataFrame containing all appointments
+            bool: True if the refresher is running
         """
-        if not self.use_dummy_data:
+        if self.connected and not self._use_snapshot:
+            return False
+        if self.background_refresh_running:
+            return True
+        
+        interval = interval or self.cache_ttl or 30
+        self._refresher_stop.clear()
+        self._refresher = threading.Thread(target=self._refresh_loop, args=(interval,),
+                                           name="snapshot-refresher", daemon=True)
+        self._refresher.start()
+        return True
+    
+    def stop_background_refresh(self):
+        """Stop the background refresher thread."""
+        if self._refresher is not None:
+            self._refresher_stop.set()
+            self._refresher.join()
+            self._refresher = None
+    
+    @property
+    def background_refresh_running(self):
+        """True if the background refresher thread is running."""
+        return self._refresher is not None and self._refresher.is_alive()
+    
+    def _refresh_loop(self, interval):
+        """Refresh the snapshot every interval until stopped."""
+        try:
+            if not self._use_snapshot:
+                return
+        except Exception as e:
+            print(f"Error connecting to the storage: {e}")
+            return
+        
+        while True:
             try:
-                # Get all data from the worksheet
-                data = self.worksheet.get_all_values()
-                
-                # Convert to DataFrame
-                if len(data) > 1:  # If there's data beyond headers
-                    df = pd.DataFrame(data[1:], columns=data[0])
-                    return df
-                else:
-                    # Return empty DataFrame with correct columns
-                    return pd.DataFrame(columns=data[0])
+                with self._cache_lock:
+                    self._refresh_snapshot()
             except Exception as e:
-                print(f"Error getting appointments: {e}")
-                return pd.DataFrame()
-        else:
-            # Return dummy data
-            if len(self.dummy_data) > 1:  # If there's data beyond headers
-                df = pd.DataFrame(self.dummy_data[1:], columns=self.dummy_data[0])
-                return df
+                # Keep serving the last snapshot; try again next interval
+                print(f"Error refreshing appointments: {e}")
+            
+            if self._refresher_stop.wait(interval):
+                return
+    
+    def _merge_pending_writes(self, rows):
+        """
+        Apply writes still waiting in the write-behind queue to freshly read rows.
+        
+        Args:
+            rows: List of rows read from the storage (header included)
+            
+        Returns:
+            list: The rows with pending appends and updates applied
+        """
+        if self._write_queue is None:
+            return rows
+        
+        positions = {row[0]: i for i, row in enumerate(rows) if i > 0 and row}
+        for entry in self._write_queue.pending():
+            if entry['op'] == 'append':
+                # Skip rows that were written but not yet dropped from the journal
+                if entry['row'][0] not in positions:
+                    positions[entry['row'][0]] = len(rows)
+                    rows.append(entry['row'])
+            elif entry['id'] in positions:
+                row = rows[positions[entry['id']]]
+                for col, value in entry['changes']:
+                    while len(row) <= col:
+                        row.append("")
+                    row[col] = value
+        
+        return rows
+    
+    def _flush_writes(self, appends, updates):
+        """
+        Write a batch from the write-behind queue to the storage.
+        
+        Raises an exception if the batch could not be written, so the queue retries it.
+        
+        Args:
+            appends: List of new rows
+            updates: List of (appointment_id, {column index: value}) tuples
+        """
+        # New rows first, so updates to them find their rows
+        if appends:
+            self.backend.add_many(appends)
+        
+        if updates:
+            self.backend.update_many([
+                (appointment_id, changes, self._get_row_number(appointment_id) if self._use_snapshot else None)
+                for appointment_id, changes in updates
+            ])
+        
+        if appends:
+            # Row numbers of the snapshot are only provisional until the
+            # rows are written, so read them back on next access
+            self.invalidate_cache()
+    
+    def get_write_stats(self):
+        """
+        Get the state of the write-behind queue.
+        
+        Returns:
+            dict: Pending writes, consecutive failed flushes and the last flush
+                  error (see WriteBehindQueue.stats()), or None without write-behind
+        """
+        if self._write_queue is None:
+            return None
+        return self._write_queue.stats()
+    
+    def flush_pending_writes(self):
+        """
+        Write everything in the write-behind queue to the storage now.
+        
+        Returns:
+            bool: True if nothing is left pending
+        """
+        if self._write_queue is None:
+            return True
+        return self._write_queue.flush_all()
+    
+    def invalidate_cache(self):
+        """Drop the cached snapshot so the next read goes to the sheet."""
+        with self._cache_lock:
+            self._publish(None)
+            self._snapshot_loaded_at = 0.0
+    
+    def _get_row_number(self, appointment_id):
+        """
+        Look up the sheet row number of an appointment in the ID index.
+        
+        Args:
+            appointment_id: Unique ID of the appointment
+            
+        Returns:
+            int: One-based sheet row number, or None if not found
+        """
+        return self._get_snapshot().row_number(appointment_id)
+    
+    def get_cache_stats(self):
+        """
+        Get the snapshot cache counters.
+        
+        Returns:
+            dict: Hits, misses, the age of the current snapshot in seconds, the
+                  number of full and incremental syncs and the snapshot version
+        """
+        with self._cache_lock:
+            age = None
+            if self._snapshot is not None:
+                age = time.monotonic() - self._snapshot_loaded_at
+            return {
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'ttl': self.cache_ttl,
+                'snapshot_age': age,
+                'full_syncs': self.full_syncs,
+                'delta_syncs': self.delta_syncs,
+                'version': self.snapshot_version,
+                'background_refresh': self.background_refresh_running
+            }
+    
+    def _patch_snapshot_append(self, rows, row_num=None):
+        """
+        Add rows we just wrote to the cached snapshot.
+        
+        Args:
+            rows: The appended rows, in order
+            row_num: Sheet row the storage reported the first row was written to, if known
+        """
+        with self._cache_lock:
+            if self._snapshot is None:
+                return
+            
+            if row_num is not None and row_num != len(self._snapshot) + 1:
+                # Someone else appended rows too, so snapshot row numbers would be off
+                self.invalidate_cache()
             else:
-                # Return empty DataFrame with correct columns
-                return pd.DataFrame(columns=self.dummy_data[0])
+                self._publish(self._snapshot.with_rows(appended=rows))
+    
+    def _patch_snapshot_update(self, appointment_id, changes):
+        """
+        Apply an update we just wrote to the cached snapshot.
+        
+        Args:
+            appointment_id: Unique ID of the updated appointment
+            changes: Dictionary mapping column index to the new value
+        """
+        with self._cache_lock:
+            if self._snapshot is None:
+                return
+            
+            row_num = self._snapshot.row_number(appointment_id)
+            if row_num is None:
+                # The row is not in the snapshot, so it can no longer be trusted
+                self.invalidate_cache()
+                return
+            
+            row = list(self._snapshot.rows[row_num - 1])
+            for col, value in changes.items():
+                # Pad short rows (trailing empty cells are not returned by the API)
+                while len(row) <= col:
+                    row.append("")
+                row[col] = value
+            self._publish(self._snapshot.with_rows({row_num: row}))
+    
+    def get_all_appointments(self):
+        """
+        Get all appointments from the Google Sheet.
+        
+        A remote sheet is read at most once per cache TTL window; other calls
+        are served from the cached snapshot.
+        
+        Returns:
+            pandas.DataFrame: DataFrame containing all appointments. From the snapshot
+                              it is read-only (copy it to modify values) and Area,
+                              Presentation Date, Time and Status are categoricals.
+        """
+        try:
+            if self._use_snapshot:
+                # The DataFrame is built once per snapshot and its arrays are shared,
+                # not copied; the shallow copy only keeps added columns private
+                return self._get_snapshot().frame().copy(deep=False)
+            return rows_to_frame(self.backend.get_all())
+        except Exception as e:
+            print(f"Error getting appointments: {e}")
+            return rows_to_frame([])
+    
+    def get_appointments(self, status=None, offset=0, limit=None, newest_first=False):
+        """
+        Get one page of appointments sorted by presentation date and time.
+        
+        From the snapshot, the sorted list is built once and shared, and only the
+        page is copied; local storage runs the query in the backend (e.g. LIMIT
+        and OFFSET in SQLite), so a page never loads the whole history.
+        
+        Args:
+            status: Only return appointments with this status (e.g. 'Confirmed')
+            offset: Number of appointments to skip
+            limit: Maximum number of appointments to return, or None for all
+            newest_first: Sort the latest dates first
+            
+        Returns:
+            tuple: Read-only Appointment records (see snapshot.py)
+        """
+        try:
+            if self._use_snapshot:
+                records = self._get_snapshot().sorted_records(status, newest_first)
+                return records[offset:offset + limit if limit is not None else None]
+            return tuple(Appointment(*row) for row in self.backend.get_appointments(status, offset, limit,
+                                                                                    newest_first))
+        except Exception as e:
+            print(f"Error getting appointments: {e}")
+            return ()
+    
+    def count_appointments(self):
+        """
+        Count the appointments of each status.
+        
+        Returns:
+            dict: Mapping of status to number of appointments
+        """
+        try:
+            if self._use_snapshot:
+                return self._get_snapshot().count_by_status()
+            return self.backend.count_by_status()
+        except Exception as e:
+            print(f"Error counting appointments: {e}")
+            return {}
     
     def add_appointment(self, company_name, project_name, area, presentation_date, 
-                       time, developer_representative):
+                       time, developer_representative, room=DEFAULT_ROOM, duration=DEFAULT_DURATION):
         """
         Add a new appointment to the Google Sheet.
         
@@ -132,14 +646,27 @@ class SheetsIntegration:
             presentation_date: Date of the presentation (YYYY-MM-DD)
             time: Time of the presentation (HH:MM)
             developer_representative: Name of the developer representative
+            room: Room of the presentation
+            duration: Length of the presentation in minutes
             
         Returns:
             bool: True if successful, False otherwise
         """
+        return self._insert_appointment(company_name, project_name, area, presentation_date,
+                                        time, developer_representative, room, duration) is not None
+    
+    def _insert_appointment(self, company_name, project_name, area, presentation_date,
+                            time, developer_representative, room=DEFAULT_ROOM, duration=DEFAULT_DURATION):
+        """
+        Write a new appointment row.
+        
+        Returns:
+            str: ID of the new appointment, or None if the write failed
+        """
         try:
-            # Generate a unique ID
+            # Generate a unique, time-ordered ID
             now = datetime.now()
-            appointment_id = now.strftime("%Y%m%d%H%M%S")
+            appointment_id = generate_id()
             
             # Create new row
             new_row = [
@@ -152,20 +679,147 @@ class SheetsIntegration:
                 developer_representative,
                 "Confirmed",  # Initial status
                 now.strftime("%Y-%m-%d %H:%M:%S"),  # Created at
-                now.strftime("%Y-%m-%d %H:%M:%S")   # Updated at
+                now.strftime("%Y-%m-%d %H:%M:%S"),  # Updated at
+                room,
+                str(duration)
             ]
             
-            if not self.use_dummy_data:
-                # Append to worksheet
-                self.worksheet.append_row(new_row)
+            if self._write_queue is not None:
+                # Journal the row; the background flusher writes it to the sheet
+                self._write_queue.enqueue_append(new_row)
+                self._patch_snapshot_append([new_row])
             else:
-                # Append to dummy data
-                self.dummy_data.append(new_row)
+                # Append to the storage
+                row_num = self.backend.add(new_row)
+                self._patch_snapshot_append([new_row], row_num)
                 
-            return True
+            return appointment_id
         except Exception as e:
             print(f"Error adding appointment: {e}")
-            return False
+            return None
+    
+    def _read_slot_rows(self, date, time, room=DEFAULT_ROOM, duration=DEFAULT_DURATION):
+        """
+        Read the current state of a slot straight from the storage, bypassing the snapshot.
+        
+        Args:
+            date: Date of the slot (YYYY-MM-DD)
+            time: Start time of the slot (HH:MM)
+            room: Room of the slot
+            duration: Length of the slot in minutes
+            
+        Returns:
+            list: (row number, ID, status, updated at) for every row overlapping the slot
+        """
+        return self.backend.get_slot_rows(date, time, room, duration)
+    
+    def _snapshot_slot_version(self, date, time, room=DEFAULT_ROOM, duration=DEFAULT_DURATION):
+        """Get the (ID, status, updated at) set of the active appointments overlapping a slot, per the snapshot."""
+        snapshot = self._get_snapshot()
+        version = set()
+        for appointment_id in snapshot.slot_holders(date, time, room, duration):
+            row = snapshot.get_row(appointment_id)
+            version.add((appointment_id, row[FIELD_COLUMNS['status']], _cell(row, UPDATED_AT_COLUMN)))
+        return version
+    
+    def _check_slot(self, date, time, room=DEFAULT_ROOM, duration=DEFAULT_DURATION, ignore_id=None):
+        """
+        Get the active appointments overlapping a slot, re-read from the storage
+        (called with the reservation lock held).
+        
+        The live slot is compared with the snapshot version (ID, status and Updated
+        At of its active rows), so bookings made by other processes or directly in
+        the sheet are seen; a stale snapshot is dropped.
+        
+        Args:
+            date: Date of the slot (YYYY-MM-DD)
+            time: Start time of the slot (HH:MM)
+            room: Room of the slot
+            duration: Length of the slot in minutes
+            ignore_id: ID of an appointment that doesn't count (the one being rescheduled)
+            
+        Returns:
+            set: IDs of the appointments holding the slot
+        """
+        # Optimistic check: compare the live slot with the snapshot version
+        remote = {
+            (appointment_id, status, updated_at)
+            for _, appointment_id, status, updated_at in self._read_slot_rows(date, time, room, duration)
+            if status in ACTIVE_STATUSES
+        }
+        holders = {appointment_id for appointment_id, _, _ in remote}
+        if self._use_snapshot:
+            if remote != self._snapshot_slot_version(date, time, room, duration):
+                # Someone else changed the slot; the snapshot is stale
+                self.invalidate_cache()
+            
+            # Add our own writes still in the write-behind queue
+            holders |= self._get_snapshot().slot_holders(date, time, room, duration)
+        holders.discard(ignore_id)
+        return holders
+    
+    def reserve_slot(self, date, time, company_name, project_name, area, developer_representative,
+                     room=DEFAULT_ROOM, duration=DEFAULT_DURATION):
+        """
+        Atomically check that a slot is free and book it.
+        
+        A slot is free if no active appointment in the room overlaps it, whatever
+        time that appointment starts at.
+        
+        Reservations in this process are serialized by a process-wide lock. Before
+        writing, the slot is re-read from the storage and compared with the snapshot
+        version (ID, status and Updated At of its active rows), so bookings made by
+        other processes or directly in the sheet are seen. After writing, the slot is
+        read again; if another process booked it concurrently, the earliest row wins
+        and the losing booking is cancelled. In write-behind mode the post-write
+        check is skipped because the row is not on the sheet yet.
+        
+        Args:
+            date: Date of the presentation (YYYY-MM-DD)
+            time: Time of the presentation (HH:MM)
+            company_name: Name of the real estate development company
+            project_name: Name of the project
+            area: Area/location of the project
+            developer_representative: Name of the developer representative
+            room: Room of the presentation
+            duration: Length of the presentation in minutes
+            
+        Returns:
+            ReservationResult: The new appointment ID, or the IDs of the appointments
+                               overlapping the slot
+        """
+        with _RESERVATION_LOCK:
+            try:
+                holders = self._check_slot(date, time, room, duration)
+                if holders:
+                    return ReservationResult(ReservationStatus.CONFLICT, conflicting_ids=tuple(sorted(holders)))
+                
+                appointment_id = self._insert_appointment(company_name, project_name, area, date,
+                                                          time, developer_representative, room, duration)
+                if appointment_id is None:
+                    return ReservationResult(ReservationStatus.ERROR)
+                
+                if self.use_dummy_data or self._write_queue is not None:
+                    # Nothing outside this process can write in between (dummy data),
+                    # or the row is not in the storage yet (write-behind)
+                    return ReservationResult(ReservationStatus.RESERVED, appointment_id=appointment_id)
+                
+                # Verify: another process may have booked an overlapping slot meanwhile
+                active = [
+                    (row_num, row_id)
+                    for row_num, row_id, status, _ in self._read_slot_rows(date, time, room, duration)
+                    if status in ACTIVE_STATUSES
+                ]
+                winner = min(active)[1] if active else appointment_id
+                if winner != appointment_id:
+                    self.cancel_appointment(appointment_id)
+                    others = tuple(sorted(row_id for _, row_id in active if row_id != appointment_id))
+                    return ReservationResult(ReservationStatus.CONFLICT, conflicting_ids=others)
+                
+                return ReservationResult(ReservationStatus.RESERVED, appointment_id=appointment_id)
+            except Exception as e:
+                print(f"Error reserving slot: {e}")
+                return ReservationResult(ReservationStatus.ERROR)
     
     def update_appointment(self, appointment_id, **kwargs):
         """
@@ -174,64 +828,37 @@ class SheetsIntegration:
         Args:
             appointment_id: Unique ID of the appointment to update
             **kwargs: Fields to update (company_name, project_name, area, 
-                     presentation_date, time, developer_representative, status)
+                     presentation_date, time, developer_representative, status, room,
+                     duration)
                      
         Returns:
             bool: True if successful, False otherwise
         """
         try:
-            if not self.use_dummy_data:
-                # Find the row with the matching ID
-                cell = self.worksheet.find(appointment_id)
-                if not cell:
+            # Collect the changed cells as column index -> new value
+            changes = {}
+            for field, col in FIELD_COLUMNS.items():
+                if field in kwargs:
+                    changes[col] = str(kwargs[field])
+            
+            # Update the 'updated_at' timestamp
+            changes[UPDATED_AT_COLUMN] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            
+            row_num = None
+            if self._use_snapshot:
+                # Find the row with the matching ID in the index
+                row_num = self._get_row_number(appointment_id)
+                if row_num is None:
                     return False
-                
-                row_num = cell.row
-                
-                # Get the current row data
-                row_data = self.worksheet.row_values(row_num)
-                
-                # Update fields
-                if 'company_name' in kwargs:
-                    self.worksheet.update_cell(row_num, 2, kwargs['company_name'])
-                if 'project_name' in kwargs:
-                    self.worksheet.update_cell(row_num, 3, kwargs['project_name'])
-                if 'area' in kwargs:
-                    self.worksheet.update_cell(row_num, 4, kwargs['area'])
-                if 'presentation_date' in kwargs:
-                    self.worksheet.update_cell(row_num, 5, kwargs['presentation_date'])
-                if 'time' in kwargs:
-                    self.worksheet.update_cell(row_num, 6, kwargs['time'])
-                if 'developer_representative' in kwargs:
-                    self.worksheet.update_cell(row_num, 7, kwargs['developer_representative'])
-                if 'status' in kwargs:
-                    self.worksheet.update_cell(row_num, 8, kwargs['status'])
-                
-                # Update the 'updated_at' timestamp
-                now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                self.worksheet.update_cell(row_num, 10, now)
-            else:
-                # Update dummy data
-                for i, row in enumerate(self.dummy_data):
-                    if i > 0 and row[0] == appointment_id:  # Skip header row
-                        if 'company_name' in kwargs:
-                            row[1] = kwargs['company_name']
-                        if 'project_name' in kwargs:
-                            row[2] = kwargs['project_name']
-                        if 'area' in kwargs:
-                            row[3] = kwargs['area']
-                        if 'presentation_date' in kwargs:
-                            row[4] = kwargs['presentation_date']
-                        if 'time' in kwargs:
-                            row[5] = kwargs['time']
-                        if 'developer_representative' in kwargs:
-                            row[6] = kwargs['developer_representative']
-                        if 'status' in kwargs:
-                            row[7] = kwargs['status']
-                        
-                        # Update the 'updated_at' timestamp
-                        row[9] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        break
+            
+            if self._write_queue is not None:
+                # Journal the change; the background flusher writes it to the storage
+                self._write_queue.enqueue_update(appointment_id, changes)
+            elif not self.backend.update(appointment_id, changes, row_num):
+                return False
+            
+            # Keep the cached snapshot in step with our own write
+            self._patch_snapshot_update(appointment_id, changes)
             
             return True
         except Exception as e:
@@ -250,64 +877,103 @@ class SheetsIntegration:
         """
         return self.update_appointment(appointment_id, status="Cancelled")
     
-    def reschedule_appointment(self, appointment_id, new_date, new_time):
+    def reschedule_appointment(self, appointment_id, new_date, new_time, new_room=None, new_duration=None):
         """
-        Reschedule an appointment to a new date and time.
+        Atomically check that a slot is free and move an appointment to it.
+        
+        The slot is checked like in reserve_slot(), under the same lock and with the
+        whole length of the presentation, leaving out the appointment itself (so it
+        can move to a slot overlapping its current one). After writing, the slot is
+        read again; if another process booked an overlapping slot meanwhile, the
+        appointment is moved back and the result is a conflict. In write-behind
+        mode the post-write check is skipped because the change is not on the
+        sheet yet.
         
         Args:
             appointment_id: Unique ID of the appointment to reschedule
             new_date: New presentation date (YYYY-MM-DD)
             new_time: New presentation time (HH:MM)
+            new_room: New room, or None to keep the current one
+            new_duration: New length in minutes, or None to keep the current one
             
         Returns:
-            bool: True if successful, False otherwise
+            ReservationResult: The appointment's ID, or the IDs of the appointments
+                               overlapping the new slot
         """
-        return self.update_appointment(
-            appointment_id, 
-            presentation_date=new_date,
-            time=new_time,
-            status="Rescheduled"
-        )
+        with _RESERVATION_LOCK:
+            try:
+                if self._use_snapshot:
+                    row = self._get_snapshot().get_row(appointment_id)
+                else:
+                    row = self.backend.get_by_id(str(appointment_id))
+                if row is None:
+                    return ReservationResult(ReservationStatus.ERROR)
+                
+                current = {field: _cell(row, col) for field, col in FIELD_COLUMNS.items()}
+                room = new_room if new_room is not None else (current['room'] or DEFAULT_ROOM)
+                duration = new_duration if new_duration is not None else _parse_duration(current['duration'])
+                
+                holders = self._check_slot(new_date, new_time, room, duration, ignore_id=appointment_id)
+                if holders:
+                    return ReservationResult(ReservationStatus.CONFLICT, conflicting_ids=tuple(sorted(holders)))
+                
+                if not self.update_appointment(appointment_id, presentation_date=new_date, time=new_time,
+                                               status="Rescheduled", room=room, duration=duration):
+                    return ReservationResult(ReservationStatus.ERROR)
+                
+                if self.use_dummy_data or self._write_queue is not None:
+                    # Nothing outside this process can write in between (dummy data),
+                    # or the change is not in the storage yet (write-behind)
+                    return ReservationResult(ReservationStatus.RESERVED, appointment_id=appointment_id)
+                
+                # Verify: another process may have booked an overlapping slot meanwhile.
+                # The appointment keeps its row, so row order says nothing about who
+                # came first; it gives way to any other booking
+                others = tuple(sorted(
+                    row_id
+                    for _, row_id, status, _ in self._read_slot_rows(new_date, new_time, room, duration)
+                    if status in ACTIVE_STATUSES and row_id != appointment_id
+                ))
+                if others:
+                    self.update_appointment(appointment_id, presentation_date=current['presentation_date'],
+                                            time=current['time'], status=current['status'],
+                                            room=current['room'], duration=current['duration'])
+                    return ReservationResult(ReservationStatus.CONFLICT, conflicting_ids=others)
+                
+                return ReservationResult(ReservationStatus.RESERVED, appointment_id=appointment_id)
+            except Exception as e:
+                print(f"Error rescheduling appointment: {e}")
+                return ReservationResult(ReservationStatus.ERROR)
     
     def get_appointment_by_id(self, appointment_id):
         """
         Get a specific appointment by ID.
         
+        Appointments not in the storage are looked up in the archive's ID index,
+        so archived appointments are still found.
+        
         Args:
             appointment_id: Unique ID of the appointment
             
         Returns:
             dict: Appointment data or None if not found
         """
-        if not self.use_dummy_data:
-            try:
-                # Find the row with the matching ID
-                cell = self.worksheet.find(appointment_id)
-                if not cell:
-                    return None
-                
-                row_num = cell.row
-                
-                # Get the row data
-                row_data = self.worksheet.row_values(row_num)
-                
-                # Get headers
-                headers = self.worksheet.row_values(1)
-                
-                # Create dictionary
-                appointment = dict(zip(headers, row_data))
-                return appointment
-            except Exception as e:
-                print(f"Error getting appointment: {e}")
+        try:
+            if not self._use_snapshot:
+                row = self.backend.get_by_id(str(appointment_id))
+            else:
+                # Find the row with the matching ID in the index
+                row = self._get_snapshot().get_row(appointment_id)
+            
+            if row is None and self.archive is not None:
+                row = self.archive.get_by_id(str(appointment_id))
+            if row is None:
                 return None
-        else:
-            # Search dummy data
-            for i, row in enumerate(self.dummy_data):
-                if i > 0 and row[0] == appointment_id:  # Skip header row
-                    # Create dictionary
-                    appointment = dict(zip(self.dummy_data[0], row))
-                    return appointment
             
+            # Create dictionary from the headers and the row data
+            return dict(zip(HEADERS, row))
+        except Exception as e:
+            print(f"Error getting appointment: {e}")
             return None
     
     def get_appointments_by_date(self, date):
@@ -315,45 +981,319 @@ class SheetsIntegration:
         Get all appointments for a specific date.
         
         Args:
-            date: Date to filter by (YYYY-MM-DD)
+            date: Date to filter by (YYYY-MM-DD, or a date object with the snapshot)
             
         Returns:
             pandas.DataFrame: DataFrame containing filtered appointments
         """
-        # Get all appointments
-        df = self.get_all_appointments()
+        if not self._use_snapshot:
+            return rows_to_frame([HEADERS] + self.backend.get_by_date(date))
+        
+        try:
+            snapshot = self._get_snapshot()
+        except Exception as e:
+            print(f"Error getting appointments: {e}")
+            return rows_to_frame([])
         
-        # Filter by date
-        if not df.empty:
-            return df[df['Presentation Date'] == date]
+        import numpy as np
         
-        return df
+        df = snapshot.frame()
+        try:
+            day = np.datetime64(date, 'D')
+        except ValueError:
+            day = None
+        if df.empty or day is None:
+            return df.iloc[0:0]
+        
+        # Filter on the typed date column
+        return df[snapshot.columns().dates == day]
     
-    def is_slot_available(self, date, time):
+    def is_slot_available(self, date, time, room=DEFAULT_ROOM, duration=DEFAULT_DURATION):
         """
-        Check if a specific date and time slot is available.
+        Check if a presentation at a date, time and room would overlap no active appointment.
         
         Args:
             date: Date to check (YYYY-MM-DD)
-            time: Time to check (HH:MM)
+            time: Start time to check (HH:MM)
+            room: Room to check
+            duration: Length of the presentation in minutes
             
         Returns:
             bool: True if slot is available, False otherwise
         """
-        # Get appointments for the date
-        df = self.get_appointments_by_date(date)
+        try:
+            if not self._use_snapshot:
+                return self.backend.is_slot_available(date, time, room, duration)
+            
+            # One binary search in the date and room's timeline
+            return not self._get_snapshot().slot_holders(date, time, room, duration)
+        except Exception as e:
+            print(f"Error checking slot availability: {e}")
+            return False
+    
+    def get_interval_index(self, start, end):
+        """
+        Get the presentations of the active appointments as an IntervalIndex.
         
-        # Check if there's an appointment at the specified time
-        if not df.empty:
-            # Filter by time and active statuses
-            active_statuses = ['Confirmed', 'Rescheduled']
-            filtered = df[(df['Time'] == time) & (df['Status'].isin(active_statuses))]
+        Args:
+            start: First date (date object or YYYY-MM-DD)
+            end: Last date, excluded (date object or YYYY-MM-DD)
             
-            # If there are any active appointments at this time, the slot is not available
-            return filtered.empty
+        Returns:
+            IntervalIndex: Index covering at least the dates in the range. With the
+                           snapshot it is the snapshot's own index, covering every date.
+        """
+        if self._use_snapshot:
+            return self._get_snapshot().interval_index()
+        start = start if isinstance(start, str) else start.strftime("%Y-%m-%d")
+        end = end if isinstance(end, str) else end.strftime("%Y-%m-%d")
+        return IntervalIndex.from_bookings(self.backend.get_bookings(start, end))
+    
+    def get_free_slots(self, schedule, start, end, duration=None, ignore_id=None):
+        """
+        Get the bookable slots of a schedule between two dates that no active
+        appointment overlaps.
         
-        # No appointments for this date, so the slot is available
-        return True
+        Args:
+            schedule: Schedule generating the slots (see scheduling.py)
+            start: First date (date object)
+            end: Last date, excluded (date object)
+            duration: Length of the presentation in minutes, or None for the
+                      length each scheduling rule sets
+            ignore_id: ID of an appointment that doesn't block any slot (the one
+                       being rescheduled)
+            
+        Returns:
+            list: Free Slot tuples sorted by date, time and room; empty if the
+                  bookings can't be read
+        """
+        try:
+            bookings = self.get_interval_index(start, end)
+        except Exception as e:
+            print(f"Error checking slot availability: {e}")
+            return []
+        ignore = {ignore_id} if ignore_id else ()
+        return schedule.free_slots(start, end, bookings, duration, ignore)
+    
+    def next_free_slot(self, schedule, after, after_time="00:00", duration=None, ignore_id=None, weeks=52):
+        """
+        Get the first slot of a schedule at or after a date and time that no
+        active appointment overlaps.
+        
+        Args:
+            schedule: Schedule generating the slots (see scheduling.py)
+            after: Earliest date (date object)
+            after_time: Earliest start time on that date (HH:MM)
+            duration: Length of the presentation in minutes, or None for the
+                      length each scheduling rule sets
+            ignore_id: ID of an appointment that doesn't block any slot (the one
+                       being rescheduled)
+            weeks: How many weeks to look ahead
+            
+        Returns:
+            Slot: The next free slot, or None if there is none in the horizon or
+                  the bookings can't be read
+            
+        Raises:
+            ValueError: If after_time isn't a valid HH:MM time
+        """
+        try:
+            bookings = self.get_interval_index(after, after + timedelta(weeks=weeks))
+        except Exception as e:
+            print(f"Error checking slot availability: {e}")
+            return None
+        ignore = {ignore_id} if ignore_id else ()
+        return schedule.next_free_slot(bookings, after, after_time, duration, ignore, weeks)
+    
+    def import_appointments(self, appointments, dry_run=False):
+        """
+        Book many appointments with one write, skipping those that conflict.
+        
+        Under the reservation lock, the bookings are re-read from the storage
+        (so the check doesn't trust a stale snapshot), then every appointment is
+        checked in order against the interval index of the existing bookings and
+        against the appointments of the batch accepted before it. The accepted ones
+        are written with one append (in write-behind mode, journaled and flushed
+        in batches).
+        
+        Args:
+            appointments: List of dictionaries with the add_appointment() arguments
+                          (company_name, project_name, area, presentation_date,
+                          time, developer_representative, and optionally room and
+                          duration); time must be a valid HH:MM time
+            dry_run: If True, check the appointments without writing them
+            
+        Returns:
+            list: One ReservationResult per appointment, in order; IDs of accepted
+                  appointments are assigned even in a dry run
+        """
+        if not appointments:
+            return []
+        
+        with _RESERVATION_LOCK:
+            try:
+                dates = [appointment['presentation_date'] for appointment in appointments]
+                if self._use_snapshot:
+                    self.invalidate_cache()
+                last = datetime.strptime(max(dates), "%Y-%m-%d").date()
+                bookings = self.get_interval_index(min(dates), last + timedelta(days=1))
+            except Exception as e:
+                print(f"Error importing appointments: {e}")
+                return [ReservationResult(ReservationStatus.ERROR)] * len(appointments)
+            
+            results = []
+            rows = []
+            # Accepted appointments of the batch per (date, room): sorted starts, ends
+            # and IDs. They never overlap each other, so the one starting last before
+            # an interval ends is the only one that can overlap it
+            batch = {}
+            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            for appointment in appointments:
+                date = appointment['presentation_date']
+                room = appointment.get('room') or DEFAULT_ROOM
+                duration = int(appointment.get('duration') or DEFAULT_DURATION)
+                start = to_minutes(appointment['time'])
+                end = start + duration
+                
+                conflicting = bookings.overlapping(date, room, appointment['time'], duration)
+                starts, ends, ids = batch.setdefault((date, room), ([], [], []))
+                i = bisect_left(starts, end)
+                if i and ends[i - 1] > start:
+                    conflicting.append(ids[i - 1])
+                if conflicting:
+                    results.append(ReservationResult(ReservationStatus.CONFLICT,
+                                                     conflicting_ids=tuple(sorted(conflicting))))
+                    continue
+                
+                appointment_id = generate_id()
+                starts.insert(i, start)
+                ends.insert(i, end)
+                ids.insert(i, appointment_id)
+                rows.append([
+                    appointment_id,
+                    appointment['company_name'],
+                    appointment['project_name'],
+                    appointment['area'],
+                    date,
+                    appointment['time'],
+                    appointment['developer_representative'],
+                    "Confirmed",
+                    now,
+                    now,
+                    room,
+                    str(duration)
+                ])
+                results.append(ReservationResult(ReservationStatus.RESERVED, appointment_id=appointment_id))
+            
+            if dry_run or not rows:
+                return results
+            
+            try:
+                if self._write_queue is not None:
+                    for row in rows:
+                        self._write_queue.enqueue_append(row)
+                else:
+                    # One append_rows request on Google Sheets
+                    row_num = self.backend.add_many(rows)
+            except Exception as e:
+                print(f"Error importing appointments: {e}")
+                return [ReservationResult(ReservationStatus.ERROR) if result.reserved else result
+                        for result in results]
+            
+            if self._write_queue is not None:
+                # Pending rows sit at provisional row numbers until flushed
+                self._patch_snapshot_append(rows)
+            elif row_num is None:
+                # The storage didn't say where the rows went, so the row index can't be patched
+                self.invalidate_cache()
+            else:
+                self._patch_snapshot_append(rows, row_num)
+            return results
+    
+    def iter_rows(self, chunk_size=5000):
+        """
+        Read every row of the storage in chunks, without holding the whole sheet
+        in memory (unless it already is, in the snapshot).
+        
+        Args:
+            chunk_size: Number of rows per chunk
+            
+        Yields:
+            list: Chunks of rows padded to the width of HEADERS; the first chunk
+                  starts with the header row
+        """
+        self.flush_pending_writes()
+        snapshot = self._snapshot if self._use_snapshot else None
+        if snapshot is None:
+            yield from self.backend.iter_rows(chunk_size)
+            return
+        
+        width = len(HEADERS)
+        for first in range(0, len(snapshot.rows), chunk_size):
+            yield [[_cell(row, col) for col in range(width)] for row in snapshot.rows[first:first + chunk_size]]
+    
+    def archive_appointments(self, cutoff=None, dry_run=False):
+        """
+        Move past appointments, and those cancelled before a cutoff, to the archive.
+        
+        The rows are read straight from the storage, written to the archive and
+        only then deleted from the storage, so a run that stops half way loses
+        nothing and can be repeated. This instance reloads its snapshot afterwards.
+        Deleting rows moves the rows below them up, and other processes only see
+        the new row numbers on their next full read, so run it when nobody is
+        editing appointments (e.g. at night).
+        
+        Args:
+            cutoff: First presentation date kept (date object or YYYY-MM-DD);
+                    defaults to today
+            dry_run: If True, only count the appointments that would be archived
+            
+        Returns:
+            int: Number of appointments archived (or that would be)
+            
+        Raises:
+            RuntimeError: If there is no archive, or pending writes couldn't be flushed
+        """
+        archive = self.archive
+        if archive is None:
+            raise RuntimeError("No archive configured for this storage")
+        cutoff = cutoff or datetime.now().date()
+        cutoff = cutoff if isinstance(cutoff, str) else cutoff.strftime("%Y-%m-%d")
+        
+        # No reservations in this process while rows are being moved
+        with _RESERVATION_LOCK:
+            # Journaled writes refer to rows by their current position
+            if not self.flush_pending_writes():
+                raise RuntimeError("Pending writes could not be flushed; try again later")
+            
+            rows = [row for row in self.backend.get_all()[1:] if row and _is_archivable(row, cutoff)]
+            if dry_run or not rows:
+                return len(rows)
+            
+            archive.add(rows)
+            self.backend.delete([row[0] for row in rows])
+            self.invalidate_cache()
+            return len(rows)
+    
+    def export_to(self, target):
+        """
+        Copy every appointment to another storage backend, replacing its content.
+        
+        With SQLite as the primary storage, this makes Google Sheets an export target.
+        
+        Args:
+            target: StorageBackend to write to (e.g. a SheetsBackend)
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            self.flush_pending_writes()
+            target.replace_all(self.backend.get_all())
+            return True
+        except Exception as e:
+            print(f"Error exporting appointments: {e}")
+            return False
     
     def create_sample_data(self):
         """Create sample data for testing purposes."""
@@ -0,0 +1,380 @@
+"""
+Immutable appointment snapshots for the Al-Hayah Appointment Booking App
+
+A Snapshot holds every row of the storage (header included) with hash indexes
+over them. It is never modified once built: a change produces a new Snapshot
+that shares the unchanged rows, so SheetsIntegration can publish it with a
+single reference assignment and any number of sessions can read it without
+locking.
+
+To keep large histories small, repeated cell values (areas, dates, statuses,
+company names, ...) are stored once and shared by every row holding them, and
+the derived views (Appointment records, typed columns, the read-only DataFrame)
+are built lazily, once per snapshot. numpy and pandas are only imported when
+one of the array-based views is first needed, so rendering records doesn't pay
+for them at startup.
+"""
+
+from collections import namedtuple
+from datetime import date
+
+from dates import parse_date
+from intervals import IntervalIndex, to_minutes
+from storage_backends import (ACTIVE_STATUSES, DEFAULT_DURATION, DEFAULT_ROOM, FIELD_COLUMNS, HEADERS, _cell,
+                              _duration, _room)
+
+# Columns with few distinct values, stored as categoricals in the DataFrame
+CATEGORICAL_COLUMNS = {"Area", "Presentation Date", "Time", "Status", "Room", "Duration"}
+
+# Typed columns of a snapshot, one entry per row after the header (like frame()):
+# dates as datetime64[D] (NaT if invalid), times as minutes after midnight
+# (-1 if invalid), and status and area as categoricals
+AppointmentColumns = namedtuple("AppointmentColumns", ["dates", "minutes", "status", "area"])
+
+class Appointment:
+    """
+    One appointment, read-only by convention.
+    
+    Fields are attributes (appointment.company_name); like the row dictionaries
+    used before, they can also be read by header (appointment['Company Name']).
+    The presentation date and time are also parsed once, when the record is
+    built: date is a date object and start is minutes after midnight (None if
+    the cell isn't a valid date or time).
+    """
+
+    __slots__ = ('id', 'company_name', 'project_name', 'area', 'presentation_date', 'time',
+                 'developer_representative', 'status', 'created_at', 'updated_at', 'room', 'duration',
+                 'date', 'start')
+
+    _FIELDS = dict(zip(HEADERS, __slots__))
+
+    def __init__(self, id, company_name="", project_name="", area="", presentation_date="", time="",
+                 developer_representative="", status="", created_at="", updated_at="", room="", duration="", *extra):
+        self.id = id
+        self.company_name = company_name
+        self.project_name = project_name
+        self.area = area
+        self.presentation_date = presentation_date
+        self.time = time
+        self.developer_representative = developer_representative
+        self.status = status
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.room = room or DEFAULT_ROOM
+        self.duration = duration or str(DEFAULT_DURATION)
+        self.date = parse_date(presentation_date)
+        self.start = to_minutes(time)
+
+    def __getitem__(self, header):
+        try:
+            return getattr(self, self._FIELDS[header])
+        except KeyError:
+            raise KeyError(header) from None
+
+    def get(self, header, default=None):
+        field = self._FIELDS.get(header)
+        return getattr(self, field) if field else default
+
+    def to_dict(self):
+        """Get the appointment as a dictionary keyed by header."""
+        return {header: getattr(self, field) for header, field in self._FIELDS.items()}
+
+    def sort_key(self):
+        """Key ordering appointments by presentation date and time, invalid ones after valid ones."""
+        return (self.date or date.max, 24 * 60 if self.start is None else self.start)
+
+    def __repr__(self):
+        return f"Appointment({self.id!r}, {self.company_name!r}, {self.presentation_date!r}, {self.status!r})"
+
+def rows_to_frame(rows, read_only=False):
+    """
+    Convert rows (header included) to a DataFrame.
+
+    Args:
+        rows: Sequence of rows, the first one being the header
+        read_only: If True, build the columns from read-only arrays (categoricals
+                   for CATEGORICAL_COLUMNS), so the DataFrame can be shared
+
+    Returns:
+        pandas.DataFrame: DataFrame of the rows after the header
+    """
+    import pandas as pd
+
+    # Rows written before the trailing columns were added are shorter than the header
+    header = list(rows[0]) if rows else []
+    width = len(header)
+    body = [tuple(row) + ("",) * (width - len(row)) if len(row) < width else row for row in rows[1:]]
+
+    if body and read_only:
+        columns = list(zip(*body))
+        return pd.DataFrame({
+            name: _read_only_categorical(values) if name in CATEGORICAL_COLUMNS else _read_only(values)
+            for name, values in zip(header, columns)
+        }, copy=False)
+    elif body:  # If there's data beyond headers
+        return pd.DataFrame([list(row) for row in body], columns=header)
+    elif rows:
+        # Return empty DataFrame with correct columns
+        return pd.DataFrame(columns=list(rows[0]))
+
+    return pd.DataFrame()
+
+def _compact_rows(rows):
+    """
+    Convert rows to tuples, sharing one string object per distinct value of every
+    column but ID, Created At and Updated At.
+    
+    Args:
+        rows: Rows to convert
+        
+    Returns:
+        list: Rows as tuples
+    """
+    shared = {}.setdefault
+    return [
+        (row[0], *[shared(value, value) for value in row[1:8]], *row[8:10],
+         *[shared(value, value) for value in row[10:]]) if row else ()
+        for row in rows
+    ]
+
+def _read_only(values, dtype=object):
+    """Build a read-only numpy array."""
+    import numpy as np
+
+    array = np.array(values, dtype=dtype)
+    array.flags.writeable = False
+    return array
+
+def _read_only_categorical(values):
+    """Build a categorical whose codes can't be modified in place."""
+    import pandas as pd
+
+    categorical = pd.Categorical(values)
+    codes = categorical.codes.copy()
+    codes.flags.writeable = False
+    return pd.Categorical.from_codes(codes, categories=categorical.categories)
+
+def _slot_of(row):
+    """Get the (date, room) timeline a row is booked in."""
+    return (_cell(row, FIELD_COLUMNS['presentation_date']), _room(row))
+
+class Snapshot:
+    """
+    Read-only rows with an ID index and a slot index, and an interval index over
+    the slot index for overlap queries.
+
+    Attributes:
+        rows: Tuple of rows (tuples of strings), the first one being the header
+    """
+
+    __slots__ = ('rows', '_id_index', '_slot_index', '_intervals', '_frame', '_records', '_records_by_status',
+                 '_sorted', '_columns')
+
+    def __init__(self, rows, id_index, slot_index):
+        self.rows = rows
+        self._id_index = id_index        # ID -> one-based sheet row number
+        self._slot_index = slot_index    # (date, room) -> frozenset of active IDs
+        
+        # Derived views, built on first use
+        self._intervals = None
+        self._frame = None
+        self._records = None
+        self._records_by_status = None
+        self._sorted = {}
+        self._columns = None
+
+    @classmethod
+    def build(cls, rows):
+        """
+        Build a snapshot and its indexes from rows read from the storage.
+
+        Args:
+            rows: List of rows (header included)
+
+        Returns:
+            Snapshot: The new snapshot
+        """
+        rows = tuple(_compact_rows(rows))
+        id_index = {}
+        slot_index = {}
+        for i, row in enumerate(rows):
+            if i > 0 and row:  # Skip header row
+                _index_row(id_index, slot_index, i + 1, row)
+        return cls(rows, id_index, slot_index)
+
+    def with_rows(self, replaced=None, appended=()):
+        """
+        Build a new snapshot with some rows replaced and others appended.
+
+        Args:
+            replaced: Dictionary mapping one-based row numbers to their new rows
+            appended: Rows added after the last one
+
+        Returns:
+            Snapshot: The new snapshot; this one is left unchanged
+        """
+        rows = list(self.rows)
+        id_index = dict(self._id_index)
+        slot_index = dict(self._slot_index)
+
+        replaced = replaced or {}
+        new_rows = _compact_rows(list(replaced.values()) + list(appended))
+
+        for row_num, row in zip(replaced, new_rows):
+            _unindex_slot(slot_index, rows[row_num - 1])
+            rows[row_num - 1] = row
+            _index_row(id_index, slot_index, row_num, row)
+
+        for row in new_rows[len(replaced):]:
+            rows.append(row)
+            _index_row(id_index, slot_index, len(rows), row)
+
+        return Snapshot(tuple(rows), id_index, slot_index)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def row_number(self, appointment_id):
+        """Get the one-based sheet row number of an appointment, or None."""
+        return self._id_index.get(str(appointment_id))
+
+    def get_row(self, appointment_id):
+        """Get the row of an appointment, or None."""
+        row_num = self._id_index.get(str(appointment_id))
+        return self.rows[row_num - 1] if row_num is not None else None
+
+    def interval_index(self):
+        """
+        Get the presentations of the active appointments as an IntervalIndex.
+
+        Each (date, room) timeline is sorted the first time it is queried, from
+        the slot index, so only the timelines a rerun looks at are built.
+
+        Returns:
+            IntervalIndex: Index shared by every reader of this snapshot
+        """
+        if self._intervals is None:
+            self._intervals = IntervalIndex(self._intervals_of)
+        return self._intervals
+
+    def _intervals_of(self, key):
+        """Get the (start, end, ID) intervals of the active appointments of a (date, room)."""
+        intervals = []
+        for appointment_id in self._slot_index.get(key, ()):
+            row = self.get_row(appointment_id)
+            start = to_minutes(_cell(row, FIELD_COLUMNS['time']))
+            if start is not None:
+                intervals.append((start, start + _duration(row), appointment_id))
+        return intervals
+
+    def slot_holders(self, date, time, room=DEFAULT_ROOM, duration=DEFAULT_DURATION):
+        """Get the IDs of the active appointments overlapping a presentation."""
+        return frozenset(self.interval_index().overlapping(date, room, time, duration))
+
+    def records(self, status=None):
+        """
+        Get the appointments as Appointment records, built once per snapshot.
+
+        Args:
+            status: Only return appointments with this status
+
+        Returns:
+            tuple: Appointment records in row order (shared, not copied)
+        """
+        if self._records is None:
+            records = tuple(Appointment(*row) for row in self.rows[1:] if row)
+            by_status = {}
+            for record in records:
+                by_status.setdefault(record.status, []).append(record)
+            self._records_by_status = {key: tuple(group) for key, group in by_status.items()}
+            self._records = records
+
+        if status is None:
+            return self._records
+        return self._records_by_status.get(status, ())
+
+    def sorted_records(self, status=None, newest_first=False):
+        """
+        Get Appointment records sorted by presentation date and time, sorted once per snapshot.
+
+        Args:
+            status: Only return appointments with this status
+            newest_first: Sort the latest dates first
+
+        Returns:
+            tuple: Sorted Appointment records (shared, so slicing a page copies only the page)
+        """
+        key = (status, newest_first)
+        records = self._sorted.get(key)
+        if records is None:
+            records = tuple(sorted(self.records(status), key=Appointment.sort_key, reverse=newest_first))
+            self._sorted[key] = records
+        return records
+
+    def count_by_status(self):
+        """Get the number of appointments of each status."""
+        self.records()
+        return {status: len(records) for status, records in self._records_by_status.items()}
+
+    def columns(self):
+        """
+        Get typed columns of the appointments, built once per snapshot.
+
+        Returns:
+            AppointmentColumns: Arrays aligned with the rows of frame()
+        """
+        if self._columns is None:
+            import numpy as np
+            import pandas as pd
+
+            rows = self.rows[1:]
+            dates = pd.to_datetime(pd.Series([_cell(row, FIELD_COLUMNS['presentation_date']) for row in rows],
+                                             dtype=object),
+                                   format="%Y-%m-%d", errors="coerce").to_numpy().astype("datetime64[D]")
+
+            times = pd.Series([_cell(row, FIELD_COLUMNS['time']) for row in rows], dtype=object)
+            parts = times.str.extract(r"^(\d{1,2}):(\d{2})$").astype(float)
+            minutes = (parts[0] * 60 + parts[1]).fillna(-1).to_numpy().astype(np.int16)
+
+            dates.flags.writeable = False
+            minutes.flags.writeable = False
+            self._columns = AppointmentColumns(
+                dates=dates,
+                minutes=minutes,
+                status=_read_only_categorical([_cell(row, FIELD_COLUMNS['status']) for row in rows]),
+                area=_read_only_categorical([_cell(row, FIELD_COLUMNS['area']) for row in rows])
+            )
+        return self._columns
+
+    def frame(self):
+        """
+        Get the rows as a read-only DataFrame, built once per snapshot.
+
+        Low-cardinality columns are categoricals. The underlying arrays can't be
+        modified in place, so the DataFrame can be shared by every caller.
+        """
+        if self._frame is None:
+            self._frame = rows_to_frame(self.rows, read_only=True)
+        return self._frame
+
+def _index_row(id_index, slot_index, row_num, row):
+    """Add a row to the ID and slot indexes."""
+    appointment_id = row[0]
+
+    # Keep the first occurrence, like worksheet.find() does
+    id_index.setdefault(appointment_id, row_num)
+
+    if _cell(row, FIELD_COLUMNS['status']) in ACTIVE_STATUSES:
+        slot = _slot_of(row)
+        slot_index[slot] = slot_index.get(slot, frozenset()) | {appointment_id}
+
+def _unindex_slot(slot_index, row):
+    """Remove a row from the slot index."""
+    slot = _slot_of(row)
+    ids = slot_index.get(slot)
+    if ids and row[0] in ids:
+        ids = ids - {row[0]}
+        if ids:
+            slot_index[slot] = ids
+        else:
+            del slot_index[slot]
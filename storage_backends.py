@@ -0,0 +1,896 @@
+"""
+Storage backends for the Al-Hayah Appointment Booking App
+
+Every backend stores appointments as rows of strings in HEADERS order and
+implements the same StorageBackend interface, so SheetsIntegration can run on
+Google Sheets, on an in-memory list (development) or on a local SQLite database.
+
+Row numbers follow the sheet convention: one-based, with the header as row 1.
+They order rows by insertion and let backends that support it skip the ID
+lookup on updates.
+"""
+
+from abc import ABC, abstractmethod
+from collections import Counter
+import re
+import sqlite3
+import threading
+
+from instrumentation import InstrumentedWorksheet
+from intervals import to_minutes
+from rate_limiting import RateLimitedWorksheet
+
+# Column headers, in sheet order. Columns added later go at the end, so rows
+# written before them simply lack the trailing cells
+HEADERS = ["ID", "Company Name", "Project Name", "Area", "Presentation Date",
+           "Time", "Developer Representative", "Status", "Created At", "Updated At", "Room", "Duration"]
+
+# Zero-based column of each updatable appointment field
+FIELD_COLUMNS = {
+    'company_name': 1,
+    'project_name': 2,
+    'area': 3,
+    'presentation_date': 4,
+    'time': 5,
+    'developer_representative': 6,
+    'status': 7,
+    'room': 10,
+    'duration': 11
+}
+UPDATED_AT_COLUMN = 9
+
+# Room of the appointments written before rooms were introduced (empty Room cell)
+DEFAULT_ROOM = "Main Hall"
+
+# Length in minutes of the appointments written before durations were introduced
+# (empty Duration cell), and of new ones unless the schedule says otherwise
+DEFAULT_DURATION = 30
+
+# Keep-alive connections to the Google APIs kept open for reuse. Sessions, the
+# snapshot refresher and the write-behind flusher call the API concurrently;
+# requests' default pool of 10 would close the connections beyond that
+HTTP_POOL_SIZE = 32
+
+# Statuses that keep a slot occupied
+ACTIVE_STATUSES = ['Confirmed', 'Rescheduled']
+
+def _cell(row, col):
+    """Get a cell value from a row, treating missing trailing cells as empty."""
+    return row[col] if col < len(row) else ""
+
+def _column_letters(col):
+    """Convert a one-based column number to letters (e.g. 3 -> 'C', 27 -> 'AA')."""
+    letters = ""
+    while col:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+def _a1(row, col):
+    """Convert one-based row and column numbers to A1 notation (e.g. 2, 3 -> 'C2')."""
+    return f"{_column_letters(col)}{row}"
+
+# Letters of the last sheet column
+LAST_COLUMN = _column_letters(len(HEADERS))
+
+def _room(row):
+    """Get the room a row is booked in, DEFAULT_ROOM for rows without one."""
+    return _cell(row, FIELD_COLUMNS['room']) or DEFAULT_ROOM
+
+def _parse_duration(value):
+    """Parse a Duration cell to minutes, DEFAULT_DURATION if empty or invalid."""
+    try:
+        duration = int(value)
+    except ValueError:
+        return DEFAULT_DURATION
+    return duration if duration > 0 else DEFAULT_DURATION
+
+def _duration(row):
+    """Get the length of a row's presentation in minutes, DEFAULT_DURATION for rows without one."""
+    return _parse_duration(_cell(row, FIELD_COLUMNS['duration']))
+
+def _overlaps(time, duration, start, end):
+    """Check if a presentation at time (HH:MM) lasting duration minutes overlaps [start, end) minutes."""
+    minutes = to_minutes(time)
+    return minutes is not None and minutes < end and start < minutes + duration
+
+def _date_time_key(row):
+    """Sort key ordering rows by presentation date, then time."""
+    return (_cell(row, FIELD_COLUMNS['presentation_date']), _cell(row, FIELD_COLUMNS['time']))
+
+def _appended_row_number(response):
+    """
+    Get the sheet row number an append request wrote to.
+
+    Args:
+        response: JSON response of worksheet.append_row()
+
+    Returns:
+        int: One-based row number, or None if the response doesn't say
+    """
+    try:
+        updated_range = response['updates']['updatedRange']
+    except (KeyError, TypeError):
+        return None
+
+    match = re.search(r"!\$?[A-Z]+\$?(\d+)", updated_range)
+    return int(match.group(1)) if match else None
+
+class StorageBackend(ABC):
+    """Interface every appointment storage implements."""
+
+    # True if reads are network round trips, so SheetsIntegration should serve
+    # them from its snapshot cache instead of calling the backend each time
+    is_remote = False
+
+    # True if the backend implements get_modified_time(), get_delta() and get_rows()
+    # for incremental sync
+    supports_delta = False
+
+    @abstractmethod
+    def get_all(self):
+        """
+        Get every row.
+
+        Returns:
+            list: List of rows, header row first
+        """
+
+    @abstractmethod
+    def get_by_id(self, appointment_id):
+        """
+        Get the row of an appointment.
+
+        Args:
+            appointment_id: Unique ID of the appointment
+
+        Returns:
+            list: The row, or None if not found
+        """
+
+    def get_by_date(self, date):
+        """
+        Get the rows of every appointment on a date.
+
+        Args:
+            date: Date to filter by (YYYY-MM-DD)
+
+        Returns:
+            list: List of rows (without header)
+        """
+        col = FIELD_COLUMNS['presentation_date']
+        return [row for row in self.get_all()[1:] if _cell(row, col) == date]
+
+    def get_appointments(self, status=None, offset=0, limit=None, newest_first=False):
+        """
+        Get one page of appointments sorted by presentation date and time.
+
+        Args:
+            status: Only return appointments with this status
+            offset: Number of appointments to skip
+            limit: Maximum number of appointments to return, or None for all
+            newest_first: Sort the latest dates first
+
+        Returns:
+            list: List of rows (without header)
+        """
+        status_col = FIELD_COLUMNS['status']
+        rows = [row for row in self.get_all()[1:] if row and (status is None or _cell(row, status_col) == status)]
+        rows.sort(key=_date_time_key, reverse=newest_first)
+        return rows[offset:offset + limit if limit is not None else None]
+
+    def count_by_status(self):
+        """
+        Count the appointments of each status.
+
+        Returns:
+            dict: Mapping of status to number of appointments
+        """
+        status_col = FIELD_COLUMNS['status']
+        return dict(Counter(_cell(row, status_col) for row in self.get_all()[1:] if row))
+
+    @abstractmethod
+    def add(self, row):
+        """
+        Append a row.
+
+        Args:
+            row: List of cell values in HEADERS order
+
+        Returns:
+            int: Row number the row was written to, or None if unknown
+        """
+
+    def add_many(self, rows):
+        """
+        Append several rows.
+
+        Args:
+            rows: List of rows in HEADERS order
+
+        Returns:
+            int: Row number the first row was written to, or None if unknown or if
+                 the rows didn't land one after the other
+        """
+        row_nums = [self.add(row) for row in rows]
+        if not row_nums or None in row_nums or row_nums != list(range(row_nums[0], row_nums[0] + len(rows))):
+            return None
+        return row_nums[0]
+
+    @abstractmethod
+    def update(self, appointment_id, changes, row_num=None):
+        """
+        Change cells of an existing row.
+
+        Args:
+            appointment_id: Unique ID of the appointment
+            changes: Dictionary mapping column index to the new value
+            row_num: Row number of the appointment if the caller knows it
+
+        Returns:
+            bool: True if the row was found and updated
+        """
+
+    def update_many(self, updates):
+        """
+        Change cells of several rows.
+
+        Args:
+            updates: List of (appointment_id, changes, row_num or None) tuples
+        """
+        for appointment_id, changes, row_num in updates:
+            self.update(appointment_id, changes, row_num)
+
+    @abstractmethod
+    def delete(self, appointment_ids):
+        """
+        Remove rows, e.g. once they are archived. Rows after them move up.
+
+        Args:
+            appointment_ids: IDs of the appointments to remove
+
+        Returns:
+            int: Number of rows removed
+        """
+
+    def is_slot_available(self, date, time, room=DEFAULT_ROOM, duration=DEFAULT_DURATION):
+        """
+        Check if no active appointment overlaps a presentation.
+
+        Args:
+            date: Date to check (YYYY-MM-DD)
+            time: Start time to check (HH:MM)
+            room: Room to check
+            duration: Length of the presentation in minutes
+
+        Returns:
+            bool: True if the slot is available
+        """
+        return not any(status in ACTIVE_STATUSES for _, _, status, _ in self.get_slot_rows(date, time, room, duration))
+
+    def get_slot_rows(self, date, time, room=DEFAULT_ROOM, duration=DEFAULT_DURATION):
+        """
+        Read the current state of a slot, bypassing any cache.
+
+        Args:
+            date: Date of the slot (YYYY-MM-DD)
+            time: Start time of the slot (HH:MM)
+            room: Room of the slot
+            duration: Length of the slot in minutes
+
+        Returns:
+            list: (row number, ID, status, updated at) for every row in the room
+                  whose presentation overlaps the slot
+        """
+        start = to_minutes(time)
+        if start is None:
+            return []
+        return [
+            (row_num, row[0], _cell(row, FIELD_COLUMNS['status']), _cell(row, UPDATED_AT_COLUMN))
+            for row_num, row in enumerate(self.get_all(), start=1)
+            if row_num > 1 and _cell(row, FIELD_COLUMNS['presentation_date']) == date and _room(row) == room
+            and _overlaps(_cell(row, FIELD_COLUMNS['time']), _duration(row), start, start + duration)
+        ]
+
+    def get_bookings(self, start, end):
+        """
+        Get the presentations of the active appointments between two dates.
+
+        Args:
+            start: First date (YYYY-MM-DD)
+            end: Last date, excluded (YYYY-MM-DD)
+
+        Returns:
+            list: (date, time, room, duration in minutes, ID) of every active
+                  appointment in the range
+        """
+        date_col, time_col, status_col = (FIELD_COLUMNS['presentation_date'], FIELD_COLUMNS['time'],
+                                          FIELD_COLUMNS['status'])
+        return [
+            (_cell(row, date_col), _cell(row, time_col), _room(row), _duration(row), row[0])
+            for row in self.get_all()[1:]
+            if row and start <= _cell(row, date_col) < end and _cell(row, status_col) in ACTIVE_STATUSES
+        ]
+
+    def iter_rows(self, chunk_size=5000):
+        """
+        Read every row in chunks, for exports that shouldn't hold the whole storage in memory.
+
+        Args:
+            chunk_size: Number of rows per chunk
+
+        Yields:
+            list: Chunks of rows padded to the width of HEADERS; the first chunk
+                  starts with the header row
+        """
+        rows = self.get_all()
+        width = len(HEADERS)
+        for first in range(0, len(rows), chunk_size):
+            yield [[_cell(row, col) for col in range(width)] for row in rows[first:first + chunk_size]]
+
+    @abstractmethod
+    def replace_all(self, rows):
+        """
+        Replace the whole content, e.g. to export another backend's rows.
+
+        Args:
+            rows: List of rows, header row first
+        """
+
+class InMemoryBackend(StorageBackend):
+    """Rows kept in a Python list, for development without credentials."""
+
+    def __init__(self, rows=None):
+        """
+        Initialize the in-memory storage.
+
+        Args:
+            rows: Initial rows (header included); defaults to just the header
+        """
+        self.rows = [list(row) for row in rows] if rows else [list(HEADERS)]
+        self._lock = threading.RLock()
+        self._rebuild_positions()
+
+    def _rebuild_positions(self):
+        """Rebuild the ID -> list index map (first occurrence wins)."""
+        self._positions = {}
+        for i, row in enumerate(self.rows):
+            if i > 0 and row:  # Skip header row
+                self._positions.setdefault(row[0], i)
+
+    def get_all(self):
+        with self._lock:
+            # Copy the rows so callers can't alias the live data
+            return [list(row) for row in self.rows]
+
+    def get_by_id(self, appointment_id):
+        with self._lock:
+            i = self._positions.get(appointment_id)
+            return list(self.rows[i]) if i is not None else None
+
+    def add(self, row):
+        with self._lock:
+            self.rows.append(list(row))
+            self._positions.setdefault(row[0], len(self.rows) - 1)
+            return len(self.rows)
+
+    def update(self, appointment_id, changes, row_num=None):
+        with self._lock:
+            i = self._positions.get(appointment_id)
+            if i is None:
+                return False
+
+            row = self.rows[i]
+            for col, value in changes.items():
+                while len(row) <= col:
+                    row.append("")
+                row[col] = value
+            return True
+
+    def delete(self, appointment_ids):
+        removed = set(appointment_ids)
+        with self._lock:
+            count = len(self.rows)
+            self.rows = [self.rows[0]] + [row for row in self.rows[1:] if not row or row[0] not in removed]
+            self._rebuild_positions()
+            return count - len(self.rows)
+
+    def replace_all(self, rows):
+        with self._lock:
+            self.rows = [list(row) for row in rows]
+            self._rebuild_positions()
+
+class SheetsBackend(StorageBackend):
+    """Rows stored in the first worksheet of a Google Sheets spreadsheet."""
+
+    is_remote = True
+    supports_delta = True
+
+    def __init__(self, worksheet, metrics=None, rate_limiter=None):
+        """
+        Initialize the Google Sheets storage.
+
+        Args:
+            worksheet: An opened gspread worksheet (or an object with the same interface)
+            metrics: Optional ApiMetrics recording every API call made on the worksheet
+            rate_limiter: Optional TokenBucket every API call takes a token from; calls
+                          are then also retried on 429 and identical reads coalesced
+        """
+        self.metrics = metrics
+        if metrics is not None:
+            worksheet = InstrumentedWorksheet(worksheet, metrics)
+        if rate_limiter is not None:
+            worksheet = RateLimitedWorksheet(worksheet, rate_limiter)
+        self.worksheet = worksheet
+
+    @classmethod
+    def from_credentials(cls, credentials_path, spreadsheet_name="Al-Hayah Appointment Bookings", metrics=None,
+                         rate_limiter=None, spreadsheet_key=None):
+        """
+        Connect to Google Sheets with a service account.
+
+        Args:
+            credentials_path: Path to the Google Sheets API credentials JSON file
+            spreadsheet_name: Title of the spreadsheet holding the appointments
+            metrics: Optional ApiMetrics recording every API call made on the worksheet
+            rate_limiter: Optional TokenBucket every API call takes a token from
+            spreadsheet_key: ID of the spreadsheet (from its URL). Opening by key skips
+                             the Drive search opening by title needs.
+
+        Returns:
+            SheetsBackend: Backend on the first worksheet of the spreadsheet
+        """
+        # The Google client libraries are slow to import; load them only to connect
+        import gspread
+        from oauth2client.service_account import ServiceAccountCredentials
+        from requests.adapters import HTTPAdapter
+
+        scope = ['https://spreadsheets.google.com/feeds',
+                 'https://www.googleapis.com/auth/drive']
+        credentials = ServiceAccountCredentials.from_json_keyfile_name(credentials_path, scope)
+        client = gspread.authorize(credentials)
+        client.http_client.session.mount("https://", HTTPAdapter(pool_maxsize=HTTP_POOL_SIZE))
+
+        # Open the spreadsheet and select the first worksheet
+        if spreadsheet_key:
+            sheet = client.open_by_key(spreadsheet_key)
+        else:
+            sheet = client.open(spreadsheet_name)
+        worksheet = sheet.get_worksheet(0)
+
+        # Create the worksheet if it doesn't exist
+        if not worksheet:
+            worksheet = sheet.add_worksheet(title="Appointments", rows=1000, cols=len(HEADERS))
+
+        backend = cls(worksheet, metrics, rate_limiter)
+
+        # If the worksheet is empty, initialize it with headers (reading the header row only)
+        header = backend.worksheet.row_values(1)
+        if not header:
+            backend.initialize_worksheet()
+        elif len(header) < len(HEADERS):
+            backend.add_missing_columns(len(header))
+        return backend
+
+    def initialize_worksheet(self):
+        """Write the header row and format it (bold, frozen)."""
+        self._ensure_grid_columns()
+        self.worksheet.update([HEADERS], f'A1:{LAST_COLUMN}1')
+        self.worksheet.format(f'A1:{LAST_COLUMN}1', {'textFormat': {'bold': True}})
+        self.worksheet.freeze(rows=1)
+
+    def add_missing_columns(self, header_length):
+        """
+        Add the headers of columns introduced after the sheet was created.
+
+        Args:
+            header_length: Number of headers the sheet has
+        """
+        self._ensure_grid_columns()
+        first = _a1(1, header_length + 1)
+        self.worksheet.update([HEADERS[header_length:]], f'{first}:{LAST_COLUMN}1')
+        self.worksheet.format(f'{first}:{LAST_COLUMN}1', {'textFormat': {'bold': True}})
+
+    def _ensure_grid_columns(self):
+        """Widen the worksheet grid if it has fewer columns than HEADERS."""
+        col_count = getattr(self.worksheet, 'col_count', None)
+        if isinstance(col_count, int) and col_count < len(HEADERS):
+            self.worksheet.add_cols(len(HEADERS) - col_count)
+
+    def get_all(self):
+        return self.worksheet.get_all_values()
+
+    def _find_rows(self, appointment_ids):
+        """
+        Look up the row numbers of appointments, reading only the ID column.
+
+        worksheet.find() downloads the whole sheet for every lookup; this reads
+        one column once for any number of IDs.
+
+        Args:
+            appointment_ids: IDs to look up
+
+        Returns:
+            dict: Mapping of each ID found to its first row number
+        """
+        wanted = set(appointment_ids)
+        found = {}
+        for i, values in enumerate(self.worksheet.get('A2:A')):
+            appointment_id = _cell(values, 0)
+            if appointment_id in wanted and appointment_id not in found:
+                found[appointment_id] = i + 2
+        return found
+
+    def get_by_id(self, appointment_id):
+        row_num = self._find_rows([appointment_id]).get(appointment_id)
+        if row_num is None:
+            return None
+        return self.worksheet.row_values(row_num)
+
+    def add(self, row):
+        response = self.worksheet.append_row(row)
+        return _appended_row_number(response)
+
+    def add_many(self, rows):
+        # All new rows in one request
+        if not rows:
+            return None
+        response = self.worksheet.append_rows(rows)
+        return _appended_row_number(response)
+
+    def _cell_updates(self, updates):
+        """
+        Build batch_update entries for several rows.
+
+        Rows without a known row number are looked up together in one request.
+
+        Args:
+            updates: List of (appointment_id, changes, row_num or None) tuples
+
+        Returns:
+            list: batch_update entries
+        """
+        unknown = [appointment_id for appointment_id, _, row_num in updates if row_num is None]
+        found = self._find_rows(unknown) if unknown else {}
+
+        data = []
+        for appointment_id, changes, row_num in updates:
+            if row_num is None:
+                row_num = found.get(appointment_id)
+                if row_num is None:
+                    print(f"Skipping update for unknown appointment {appointment_id}")
+                    continue
+
+            # Sheet columns are one-based
+            data.extend({'range': _a1(row_num, col + 1), 'values': [[value]]}
+                        for col, value in changes.items())
+        return data
+
+    def update(self, appointment_id, changes, row_num=None):
+        data = self._cell_updates([(appointment_id, changes, row_num)])
+        if not data:
+            return False
+
+        # Send all changed cells in a single request, with the value handling of update_cell()
+        self.worksheet.batch_update(data, value_input_option='USER_ENTERED')
+        return True
+
+    def update_many(self, updates):
+        data = self._cell_updates(updates)
+
+        # All changed cells of all rows in one request
+        if data:
+            self.worksheet.batch_update(data, value_input_option='USER_ENTERED')
+
+    def delete(self, appointment_ids):
+        row_nums = sorted(self._find_rows(appointment_ids).values(), reverse=True)
+        if not row_nums:
+            return 0
+
+        # Runs of consecutive rows, bottom first so the row numbers of the runs
+        # still to delete don't shift
+        runs = []
+        for row_num in row_nums:
+            if runs and runs[-1][0] == row_num + 1:
+                runs[-1][0] = row_num
+            else:
+                runs.append([row_num, row_num])
+
+        # All runs in one request; dimension indexes are zero-based, end excluded
+        sheet_id = self.worksheet.id
+        self.worksheet.spreadsheet.batch_update({'requests': [
+            {'deleteDimension': {'range': {'sheetId': sheet_id, 'dimension': 'ROWS',
+                                           'startIndex': first - 1, 'endIndex': last}}}
+            for first, last in runs
+        ]})
+        return len(row_nums)
+
+    def get_modified_time(self):
+        """
+        Get the last modification time of the spreadsheet from the Drive API.
+
+        Returns:
+            str: Modification timestamp, or None if it can't be read
+        """
+        spreadsheet = getattr(self.worksheet, 'spreadsheet', None)
+        if spreadsheet is None:
+            return None
+        return spreadsheet.get_lastUpdateTime()
+
+    def get_delta(self, row_count):
+        """
+        Read what is needed to bring a snapshot of row_count rows up to date, in one request.
+
+        Args:
+            row_count: Number of rows (header included) the caller already has
+
+        Returns:
+            tuple: (fingerprint of every data row, rows appended after row_count). A
+                   fingerprint is the row's (Presentation Date, Time, Status, Updated At,
+                   Room, Duration); the slot columns catch changes made within the same
+                   Updated At second.
+        """
+        slots, statuses, updated, appended = self.worksheet.batch_get(
+            ['E2:F', 'H2:H', f'J2:{LAST_COLUMN}', f'A{row_count + 1}:{LAST_COLUMN}'])
+        fingerprints = []
+        for i, updated_row in enumerate(updated):
+            slot = slots[i] if i < len(slots) else []
+            status = statuses[i] if i < len(statuses) else []
+            fingerprints.append((_cell(slot, 0), _cell(slot, 1), _cell(status, 0), _cell(updated_row, 0),
+                                 _cell(updated_row, FIELD_COLUMNS['room'] - UPDATED_AT_COLUMN),
+                                 _cell(updated_row, FIELD_COLUMNS['duration'] - UPDATED_AT_COLUMN)))
+
+        width = len(HEADERS)
+        return fingerprints, [[_cell(row, col) for col in range(width)] for row in appended]
+
+    def get_rows(self, row_nums):
+        """
+        Read specific rows, in one request.
+
+        Args:
+            row_nums: List of one-based row numbers
+
+        Returns:
+            list: The rows, in the order requested
+        """
+        if not row_nums:
+            return []
+
+        width = len(HEADERS)
+        ranges = self.worksheet.batch_get([f'A{row_num}:{LAST_COLUMN}{row_num}' for row_num in row_nums])
+        return [[_cell(values[0] if values else [], col) for col in range(width)] for values in ranges]
+
+    def get_slot_rows(self, date, time, room=DEFAULT_ROOM, duration=DEFAULT_DURATION):
+        start = to_minutes(time)
+        if start is None:
+            return []
+
+        # Only the ID, date, time, status and updated-at to duration columns, in one request
+        ids, slots, statuses, updated = self.worksheet.batch_get(['A2:A', 'E2:F', 'H2:H', f'J2:{LAST_COLUMN}'])
+        room_offset = FIELD_COLUMNS['room'] - UPDATED_AT_COLUMN
+        duration_offset = FIELD_COLUMNS['duration'] - UPDATED_AT_COLUMN
+        rows = []
+        for i, id_row in enumerate(ids):
+            slot = slots[i] if i < len(slots) else []
+            if _cell(slot, 0) != date:
+                continue
+            trailing = updated[i] if i < len(updated) else []
+            if (_cell(trailing, room_offset) or DEFAULT_ROOM) != room:
+                continue
+            if not _overlaps(_cell(slot, 1), _parse_duration(_cell(trailing, duration_offset)), start, start + duration):
+                continue
+            status = _cell(statuses[i], 0) if i < len(statuses) else ""
+            rows.append((i + 2, _cell(id_row, 0), status, _cell(trailing, 0)))
+        return rows
+
+    def iter_rows(self, chunk_size=5000):
+        # One ranged read per chunk; the API leaves out trailing empty rows, so a
+        # short chunk is the last one
+        width = len(HEADERS)
+        first = 1
+        while True:
+            values = self.worksheet.get(f'A{first}:{LAST_COLUMN}{first + chunk_size - 1}')
+            if values:
+                yield [[_cell(row, col) for col in range(width)] for row in values]
+            if len(values) < chunk_size:
+                return
+            first += chunk_size
+
+    def replace_all(self, rows):
+        self.worksheet.clear()
+        self.worksheet.update(rows, 'A1')
+
+class SQLiteBackend(StorageBackend):
+    """Rows stored in a local SQLite database."""
+
+    # Database column of each sheet column, in HEADERS order
+    COLUMNS = ["id", "company_name", "project_name", "area", "presentation_date",
+               "time", "developer_representative", "status", "created_at", "updated_at", "room", "duration"]
+
+    def __init__(self, path):
+        """
+        Open (and create if needed) the SQLite database.
+
+        Args:
+            path: Path of the database file
+        """
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+        conn = self._connection()
+        with conn:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS appointments (
+                    row_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    {', '.join(f"{column} TEXT NOT NULL DEFAULT ''" for column in self.COLUMNS)}
+                )
+            """)
+
+            # Add the columns introduced after the database was created
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(appointments)")}
+            for column in self.COLUMNS:
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE appointments ADD COLUMN {column} TEXT NOT NULL DEFAULT ''")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_appointments_id ON appointments (id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_appointments_slot "
+                         "ON appointments (presentation_date, time, status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_appointments_status "
+                         "ON appointments (status, presentation_date, time)")
+
+    def _connection(self):
+        """Get this thread's connection (sqlite3 connections can't be shared between threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            # WAL lets readers run alongside a writer; NORMAL sync is durable enough with WAL
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _select(self, where="", params=(), order="row_id", limit=None, offset=0):
+        """Run a SELECT over the appointment columns and return lists of strings."""
+        page = ""
+        if limit is not None or offset:
+            # LIMIT -1 means no limit in SQLite
+            page = "LIMIT ? OFFSET ?"
+            params = list(params) + [-1 if limit is None else limit, offset]
+        cursor = self._connection().execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM appointments {where} ORDER BY {order} {page}", params)
+        return [list(row) for row in cursor]
+
+    def get_all(self):
+        return [list(HEADERS)] + self._select()
+
+    def get_by_id(self, appointment_id):
+        rows = self._select("WHERE id = ?", (appointment_id,))
+        return rows[0] if rows else None
+
+    def get_by_date(self, date):
+        return self._select("WHERE presentation_date = ?", (date,))
+
+    def get_appointments(self, status=None, offset=0, limit=None, newest_first=False):
+        where, params = ("WHERE status = ?", (status,)) if status is not None else ("", ())
+        direction = "DESC" if newest_first else "ASC"
+        return self._select(where, params, order=f"presentation_date {direction}, time {direction}, "
+                                                 f"row_id {direction}", limit=limit, offset=offset)
+
+    def count_by_status(self):
+        cursor = self._connection().execute("SELECT status, COUNT(*) FROM appointments GROUP BY status")
+        return dict(cursor.fetchall())
+
+    def add(self, row):
+        padded = [_cell(row, col) for col in range(len(self.COLUMNS))]
+        with self._write_lock:
+            conn = self._connection()
+            with conn:
+                cursor = conn.execute(
+                    f"INSERT INTO appointments ({', '.join(self.COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(self.COLUMNS))})", padded)
+        # row_id starts at 1; the header takes sheet row 1
+        return cursor.lastrowid + 1
+
+    def add_many(self, rows):
+        padded = [[_cell(row, col) for col in range(len(self.COLUMNS))] for row in rows]
+        with self._write_lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    f"INSERT INTO appointments ({', '.join(self.COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(self.COLUMNS))})", padded)
+        # executemany doesn't report the row IDs it inserted
+        return None
+
+    def update(self, appointment_id, changes, row_num=None):
+        if not changes:
+            return False
+
+        assignments = ", ".join(f"{self.COLUMNS[col]} = ?" for col in changes)
+        with self._write_lock:
+            conn = self._connection()
+            with conn:
+                # Only the first row with this ID, like the sheet lookup
+                cursor = conn.execute(
+                    f"UPDATE appointments SET {assignments} WHERE row_id = "
+                    f"(SELECT MIN(row_id) FROM appointments WHERE id = ?)",
+                    list(changes.values()) + [appointment_id])
+        return cursor.rowcount > 0
+
+    def update_many(self, updates):
+        for appointment_id, changes, _ in updates:
+            self.update(appointment_id, changes)
+
+    def delete(self, appointment_ids):
+        appointment_ids = list(appointment_ids)
+        count = 0
+        with self._write_lock:
+            conn = self._connection()
+            with conn:
+                # Chunks stay below SQLite's limit on query parameters
+                for first in range(0, len(appointment_ids), 500):
+                    chunk = appointment_ids[first:first + 500]
+                    cursor = conn.execute(f"DELETE FROM appointments WHERE id IN ({', '.join('?' * len(chunk))})",
+                                          chunk)
+                    count += cursor.rowcount
+        return count
+
+    @staticmethod
+    def _room_values(room):
+        """Room cell values of a room; rows without a room are in DEFAULT_ROOM."""
+        return [room, ""] if room == DEFAULT_ROOM else [room]
+
+    def _day_rows(self, date, room, columns, active_only=False):
+        """Select columns of the rows of a date and room (the slot index narrows the date)."""
+        rooms = self._room_values(room)
+        where = f"WHERE presentation_date = ? AND room IN ({', '.join('?' * len(rooms))})"
+        params = [date] + rooms
+        if active_only:
+            where += f" AND status IN ({', '.join('?' * len(ACTIVE_STATUSES))})"
+            params += ACTIVE_STATUSES
+        return self._connection().execute(
+            f"SELECT {', '.join(columns)} FROM appointments {where} ORDER BY row_id", params).fetchall()
+
+    def is_slot_available(self, date, time, room=DEFAULT_ROOM, duration=DEFAULT_DURATION):
+        start = to_minutes(time)
+        if start is None:
+            return True
+        return not any(_overlaps(row_time, _parse_duration(row_duration), start, start + duration)
+                       for row_time, row_duration in self._day_rows(date, room, ["time", "duration"],
+                                                                     active_only=True))
+
+    def get_slot_rows(self, date, time, room=DEFAULT_ROOM, duration=DEFAULT_DURATION):
+        start = to_minutes(time)
+        if start is None:
+            return []
+        return [(row_id + 1, appointment_id, status, updated_at)
+                for row_id, appointment_id, status, updated_at, row_time, row_duration
+                in self._day_rows(date, room, ["row_id", "id", "status", "updated_at", "time", "duration"])
+                if _overlaps(row_time, _parse_duration(row_duration), start, start + duration)]
+
+    def get_bookings(self, start, end):
+        cursor = self._connection().execute(
+            f"SELECT presentation_date, time, room, duration, id FROM appointments "
+            f"WHERE status IN ({', '.join('?' * len(ACTIVE_STATUSES))}) "
+            f"AND presentation_date >= ? AND presentation_date < ?", ACTIVE_STATUSES + [start, end])
+        return [(date, time, room or DEFAULT_ROOM, _parse_duration(duration), appointment_id)
+                for date, time, room, duration, appointment_id in cursor]
+
+    def iter_rows(self, chunk_size=5000):
+        yield [list(HEADERS)]
+        cursor = self._connection().execute(f"SELECT {', '.join(self.COLUMNS)} FROM appointments ORDER BY row_id")
+        while True:
+            chunk = cursor.fetchmany(chunk_size)
+            if not chunk:
+                return
+            yield [list(row) for row in chunk]
+
+    def replace_all(self, rows):
+        padded = [[_cell(row, col) for col in range(len(self.COLUMNS))] for row in rows[1:]]
+        with self._write_lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM appointments")
+                conn.executemany(
+                    f"INSERT INTO appointments ({', '.join(self.COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(self.COLUMNS))})", padded)
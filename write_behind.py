@@ -0,0 +1,272 @@
+"""
+Write-behind queue for the Al-Hayah Appointment Booking App
+
+Bookings and edits are recorded in a local journal file and acknowledged right
+away. A background thread coalesces the pending writes and flushes them to the
+sheet in batches, retrying with exponential backoff when the flush fails.
+"""
+
+import json
+import os
+import random
+import threading
+
+class WriteBehindQueue:
+    def __init__(self, journal_path, flush_callback, flush_interval=1.0, max_batch=200,
+                 retry_base_delay=1.0, retry_max_delay=60.0):
+        """
+        Initialize the write-behind queue and start the background flusher.
+
+        Args:
+            journal_path: Path of the file the pending writes are journaled to
+            flush_callback: Function called with (appends, updates) to write a batch.
+                            appends is a list of rows, updates a list of
+                            (appointment_id, {column index: value}) tuples.
+                            It must raise an exception if the batch was not written.
+                            New rows and updates are passed in separate calls,
+                            so a batch is never written twice.
+            flush_interval: Seconds between flush attempts while writes are pending
+            max_batch: Maximum number of journal entries written per flush
+            retry_base_delay: Delay in seconds before the first retry of a failed flush
+            retry_max_delay: Upper bound of the retry delay in seconds
+        """
+        self.journal_path = journal_path
+        self.flush_callback = flush_callback
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+        # Entries waiting to be flushed, and the batch currently being written
+        self._pending = []
+        self._in_flight = []
+        self._failures = 0
+        self._last_error = None
+
+        # Replay writes that were journaled but not flushed before the last shutdown
+        self._load_journal()
+
+        self._thread = threading.Thread(target=self._run, name="write-behind-flusher", daemon=True)
+        self._thread.start()
+
+    def _load_journal(self):
+        """Load the pending entries from the journal file."""
+        if not os.path.exists(self.journal_path):
+            return
+
+        with open(self.journal_path, "r", encoding="utf-8") as journal:
+            for line in journal:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self._coalesce(json.loads(line))
+                except ValueError:
+                    # A torn last line from a crash mid-write; everything before it is intact
+                    print(f"Skipping unreadable journal entry: {line[:80]}")
+
+    def _append_to_journal(self, entry):
+        """Durably append an entry to the journal file."""
+        with open(self.journal_path, "a", encoding="utf-8") as journal:
+            journal.write(json.dumps(entry) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def _rewrite_journal(self):
+        """Replace the journal with the entries that are still pending."""
+        entries = self._in_flight + self._pending
+        tmp_path = self.journal_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as journal:
+            for entry in entries:
+                journal.write(json.dumps(entry) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+    def _coalesce(self, entry):
+        """
+        Merge an entry into the pending list.
+
+        An update to a row whose append is still pending is folded into that
+        row, and several updates to the same row are merged into one.
+        """
+        if entry['op'] == 'update':
+            for pending in self._pending:
+                if pending['op'] == 'append' and pending['row'][0] == entry['id']:
+                    row = pending['row']
+                    for col, value in entry['changes']:
+                        while len(row) <= col:
+                            row.append("")
+                        row[col] = value
+                    return
+                if pending['op'] == 'update' and pending['id'] == entry['id']:
+                    merged = dict(pending['changes'])
+                    merged.update(dict(entry['changes']))
+                    pending['changes'] = sorted(merged.items())
+                    return
+
+        self._pending.append(entry)
+
+    def _enqueue(self, entry):
+        """Journal an entry, then add it to the pending list."""
+        # The flusher picks the entry up on its next tick, so writes arriving
+        # within one flush interval are coalesced into a single batch
+        with self._lock:
+            self._append_to_journal(entry)
+            self._coalesce(entry)
+
+    def enqueue_append(self, row):
+        """
+        Queue a new row to be appended to the sheet.
+
+        Args:
+            row: List of cell values; the first cell is the appointment ID
+        """
+        self._enqueue({'op': 'append', 'row': list(row)})
+
+    def enqueue_update(self, appointment_id, changes):
+        """
+        Queue changed cells of an existing row.
+
+        Args:
+            appointment_id: Unique ID of the appointment to update
+            changes: Dictionary mapping column index to the new value
+        """
+        self._enqueue({'op': 'update', 'id': appointment_id, 'changes': sorted(changes.items())})
+
+    def pending(self):
+        """
+        Get the writes that have not reached the sheet yet, oldest first.
+
+        Returns:
+            list: Entries of the form {'op': 'append', 'row': [...]} or
+                  {'op': 'update', 'id': ..., 'changes': [[col, value], ...]}
+        """
+        with self._lock:
+            return json.loads(json.dumps(self._in_flight + self._pending))
+
+    def pending_count(self):
+        """Get the number of journal entries not yet written to the sheet."""
+        with self._lock:
+            return len(self._in_flight) + len(self._pending)
+
+    def stats(self):
+        """
+        Get the state of the queue, to warn when writes pile up unflushed.
+
+        Returns:
+            dict: Pending entries, consecutive failed flushes and the error of the
+                  last failed flush (None once a flush succeeds)
+        """
+        with self._lock:
+            return {
+                'pending': len(self._in_flight) + len(self._pending),
+                'failures': self._failures,
+                'last_error': self._last_error
+            }
+
+    def flush(self):
+        """
+        Write one batch of pending entries to the sheet.
+
+        Returns:
+            bool: True if the batch was written (or nothing was pending), False otherwise
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return True
+                self._in_flight = self._pending[:self.max_batch]
+                self._pending = self._pending[self.max_batch:]
+                batch = self._in_flight
+
+            # New rows are written and committed before the updates, so an
+            # update that fails doesn't send the rows of its batch again
+            appends = [entry for entry in batch if entry['op'] == 'append']
+            updates = [entry for entry in batch if entry['op'] == 'update']
+            for entries in (appends, updates):
+                if entries and not self._write(entries):
+                    return False
+            return True
+
+    def _write(self, entries):
+        """
+        Write in-flight entries of a single kind with the flush callback.
+
+        Written entries leave the batch and the journal; on failure the rest of
+        the batch goes back in front of the queue.
+
+        Returns:
+            bool: True if the entries were written
+        """
+        try:
+            if entries[0]['op'] == 'append':
+                self.flush_callback([entry['row'] for entry in entries], [])
+            else:
+                self.flush_callback([], [(entry['id'], dict(entry['changes'])) for entry in entries])
+        except Exception as e:
+            print(f"Error flushing pending writes: {e}")
+            with self._lock:
+                # Put the batch back in front of anything queued meanwhile
+                self._pending = self._in_flight + self._pending
+                self._in_flight = []
+                self._failures += 1
+                self._last_error = str(e) or type(e).__name__
+            return False
+
+        with self._lock:
+            written = {id(entry) for entry in entries}
+            self._in_flight = [entry for entry in self._in_flight if id(entry) not in written]
+            self._failures = 0
+            self._last_error = None
+            self._rewrite_journal()
+        return True
+
+    def flush_all(self):
+        """
+        Flush until nothing is pending or a flush fails.
+
+        Returns:
+            bool: True if every pending entry was written
+        """
+        while self.pending_count():
+            if not self.flush():
+                return False
+        return True
+
+    def _retry_delay(self):
+        """Get the jittered exponential backoff delay after consecutive failures."""
+        delay = min(self.retry_max_delay, self.retry_base_delay * (2 ** (self._failures - 1)))
+        return random.uniform(delay / 2, delay)
+
+    def _run(self):
+        """Background loop flushing pending writes."""
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+
+            if self._stopped.is_set():
+                break
+
+            if not self.flush_all():
+                # Back off before trying again; new writes don't cut the wait short
+                self._stopped.wait(self._retry_delay())
+
+    def stop(self, flush=True):
+        """
+        Stop the background flusher.
+
+        Args:
+            flush: Whether to try writing the remaining entries first. Entries
+                   that could not be written stay in the journal for next start.
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        if flush:
+            self.flush_all()